@@ -0,0 +1,138 @@
+"""
+站点刷流 刷流条件校验基准测试
+
+对比逐个种子解析配置（v4.3.5及之前）与预先编译BrushRules、BrushTaskIndex后的校验速度
+需在MoviePilot运行环境中执行（插件已安装到app/plugins/brushflow）：
+    python benchmarks/brushflow_rules.py [种子数] [已有任务数]
+"""
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+from app.core.context import TorrentInfo
+from app.plugins.brushflow.rules import BrushRules, BrushTaskIndex
+
+SITES = [f"site{i}" for i in range(20)]
+
+BRUSH_CONFIG = SimpleNamespace(
+    freeleech="free", hr="yes", include=r"1080p|2160p|WEB-DL", exclude=r"HDR10\+|DV|REMUX",
+    size="1-80", seeder="1-30", pubtime="", timezone_offset=0,
+    hr_seed_time=None, seed_time="120", seed_ratio="3", seed_size=None, download_time=None,
+    seed_avgspeed=None, seed_inactivetime=None, del_no_free=False, delete_size_range=None,
+    delete_except_tags="H&R,keep"
+)
+
+
+def make_torrents(count: int):
+    rnd = random.Random(1)
+    tags = ["1080p", "2160p", "720p", "WEB-DL", "BluRay", "HDR10+", "DV", "REMUX", "x265"]
+    torrents = []
+    for i in range(count):
+        title = f"Show.{i}.S01E{i % 24:02d}.{'.'.join(rnd.sample(tags, 3))}-GRP"
+        torrents.append(TorrentInfo(
+            site_name=rnd.choice(SITES), title=title, description=f"描述 {i} {rnd.choice(tags)}",
+            page_url=f"https://example.org/details.php?id={i}", size=rnd.randint(1, 100) * 1024 ** 3,
+            seeders=rnd.randint(0, 60), downloadvolumefactor=rnd.choice([0, 0, 1]),
+            uploadvolumefactor=rnd.choice([1, 2]), hit_and_run=rnd.random() < 0.1
+        ))
+    return torrents
+
+
+def make_tasks(count: int):
+    return {
+        f"hash{i}": {"site_name": SITES[i % len(SITES)], "title": f"Old.Show.{i}.1080p",
+                     "page_url": f"https://example.org/details.php?id=old{i}",
+                     "seed_time": 0 if i % 5 == 0 else 3600}
+        for i in range(count)
+    }
+
+
+def evaluate_before(brush_config, torrent, torrent_tasks) -> bool:
+    """
+    原实现：每个种子遍历全部任务查重，并重新解析区间配置及正则
+    """
+    task_key = f"{torrent.site_name}{torrent.title}"
+    if any(task_key == f"{task.get('site_name')}{task.get('title')}" for task in torrent_tasks.values()):
+        return False
+    if torrent.page_url:
+        task_page_url = f"{torrent.site_name}{torrent.page_url}"
+        if any(task_page_url == f"{task.get('site_name')}{task.get('page_url')}" for task in torrent_tasks.values()):
+            return False
+    if torrent.title:
+        if any(torrent.site_name != f"{task.get('site_name')}" and torrent.title == f"{task.get('title')}"
+               and not task.get("seed_time") for task in torrent_tasks.values()):
+            return False
+    if brush_config.freeleech and torrent.downloadvolumefactor != 0:
+        return False
+    if brush_config.hr == "yes" and torrent.hit_and_run:
+        return False
+    if brush_config.include and not (re.search(brush_config.include, torrent.title, re.I)
+                                     or re.search(brush_config.include, torrent.description, re.I)):
+        return False
+    if brush_config.exclude and (re.search(brush_config.exclude, torrent.title, re.I)
+                                 or re.search(brush_config.exclude, torrent.description, re.I)):
+        return False
+    if brush_config.size:
+        sizes = [float(size) * 1024 ** 3 for size in brush_config.size.split("-")]
+        if len(sizes) > 1 and not sizes[0] <= torrent.size <= sizes[1]:
+            return False
+    if brush_config.seeder:
+        seeders_range = [float(n) for n in brush_config.seeder.split("-")]
+        if len(seeders_range) > 1 and not (seeders_range[0] <= torrent.seeders <= seeders_range[1]):
+            return False
+    return True
+
+
+def evaluate_after(brush_rules: BrushRules, torrent, task_index: BrushTaskIndex) -> bool:
+    """
+    现实现：使用预先编译的规则及任务索引
+    """
+    if task_index.has_title(site_name=torrent.site_name, title=torrent.title):
+        return False
+    if torrent.page_url and task_index.has_page_url(site_name=torrent.site_name, page_url=torrent.page_url):
+        return False
+    if torrent.title and task_index.has_unfinished_on_other_site(site_name=torrent.site_name, title=torrent.title):
+        return False
+    if brush_rules.freeleech and torrent.downloadvolumefactor != 0:
+        return False
+    if brush_rules.hr == "yes" and torrent.hit_and_run:
+        return False
+    if not brush_rules.match_include(torrent) or brush_rules.match_exclude(torrent):
+        return False
+    if brush_rules.size:
+        min_size, max_size = brush_rules.size
+        if max_size is not None and not min_size <= torrent.size <= max_size:
+            return False
+    if brush_rules.seeder:
+        min_seeders, max_seeders = brush_rules.seeder
+        if max_seeders is not None and not min_seeders <= torrent.seeders <= max_seeders:
+            return False
+    return True
+
+
+def main():
+    torrent_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    task_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    torrents = make_torrents(torrent_count)
+    torrent_tasks = make_tasks(task_count)
+
+    start = time.perf_counter()
+    before = [evaluate_before(BRUSH_CONFIG, torrent, torrent_tasks) for torrent in torrents]
+    before_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    brush_rules = BrushRules(BRUSH_CONFIG)
+    task_index = BrushTaskIndex(torrent_tasks)
+    after = [evaluate_after(brush_rules, torrent, task_index) for torrent in torrents]
+    after_time = time.perf_counter() - start
+
+    assert before == after, "优化前后校验结果不一致"
+    print(f"种子 {torrent_count} 个，已有任务 {task_count} 个，通过 {sum(after)} 个")
+    print(f"优化前：{before_time:.3f} 秒，{torrent_count / before_time:,.0f} 个/秒")
+    print(f"优化后：{after_time:.3f} 秒（含编译规则及建立索引），{torrent_count / after_time:,.0f} 个/秒")
+
+
+if __name__ == "__main__":
+    main()
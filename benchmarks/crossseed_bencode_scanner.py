@@ -0,0 +1,95 @@
+"""
+青蛙辅种助手 种子扫描基准测试
+
+对比完整解码种子再重新编码info计算哈希（v3.0.3及之前）与直接扫描原始字节计算哈希的耗时及峰值内存
+需在MoviePilot运行环境中执行（插件已安装到app/plugins/crossseed）：
+    python benchmarks/crossseed_bencode_scanner.py [文件数] [分块数]
+    python benchmarks/crossseed_bencode_scanner.py 种子文件路径
+"""
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bencode import bdecode, bencode
+
+from app.plugins.crossseed.bencode_scanner import scan_torrent, scan_torrent_file
+
+
+def make_torrent(file_count: int, piece_count: int) -> bytes:
+    """
+    生成多文件种子
+    """
+    rnd = random.Random(1)
+    files = [{"length": rnd.randint(1, 1 << 30), "path": [f"Season {i // 1000 + 1:02d}", f"file{i}.mkv"]}
+             for i in range(file_count)]
+    return bencode({
+        "announce": "https://tracker.example.org/announce.php?passkey=0123456789abcdef",
+        "created by": "benchmark",
+        "info": {
+            "files": files,
+            "name": "Benchmark.Show.S01-S50.2160p.WEB-DL",
+            "piece length": 1 << 22,
+            "pieces": rnd.randbytes(20 * piece_count),
+            "private": 1
+        }
+    })
+
+
+def scan_before(torrent_path: Path):
+    """
+    原实现：读取文件后完整解码，再重新编码info计算哈希
+    """
+    torrent = bdecode(torrent_path.read_bytes())
+    info = torrent["info"]
+    return (hashlib.sha1(bencode(info)).hexdigest(),
+            hashlib.sha1(info["pieces"]).hexdigest(),
+            torrent.get("announce"))
+
+
+def measure(func, *args):
+    """
+    返回结果、耗时及Python内存分配峰值（内存映射的文件内容不计入），内存跟踪会拖慢执行，单独再运行一次统计
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    tmp_dir = None
+    if len(sys.argv) == 2 and os.path.isfile(sys.argv[1]):
+        torrent_path = Path(sys.argv[1])
+    else:
+        file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+        piece_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+        tmp_dir = tempfile.TemporaryDirectory()
+        torrent_path = Path(tmp_dir.name) / "benchmark.torrent"
+        torrent_path.write_bytes(make_torrent(file_count, piece_count))
+    try:
+        before, before_time, before_peak = measure(scan_before, torrent_path)
+        after_file, file_time, file_peak = measure(scan_torrent_file, torrent_path)
+        data = torrent_path.read_bytes()
+        after_data, data_time, data_peak = measure(scan_torrent, data)
+
+        assert before == after_file == after_data, "优化前后计算的哈希不一致"
+        print(f"种子 {torrent_path.name}，大小 {torrent_path.stat().st_size / 1024 ** 2:.1f} MB")
+        print(f"bdecode+bencode：{before_time:.3f} 秒，峰值内存 {before_peak / 1024 ** 2:.1f} MB")
+        print(f"scan_torrent_file：{file_time:.3f} 秒，峰值内存 {file_peak / 1024 ** 2:.1f} MB")
+        print(f"scan_torrent（已读入内存）：{data_time:.3f} 秒，峰值内存 {data_peak / 1024 ** 2:.1f} MB")
+    finally:
+        if tmp_dir:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
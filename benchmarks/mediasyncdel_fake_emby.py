@@ -0,0 +1,159 @@
+"""
+媒体文件同步删除 日志增量读取检查
+
+启动本地模拟的Emby日志接口（System/Logs/{name}），可开关Range支持、追加、截断及轮转日志，
+依次验证LogTailer在206分段返回、不支持Range时200完整返回、416越界及日志轮转时的读取结果
+需在MoviePilot运行环境中执行（插件已安装到app/plugins/mediasyncdel）：
+    python benchmarks/mediasyncdel_fake_emby.py
+"""
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import unquote, urlparse
+
+from app.plugins.mediasyncdel.log_tailer import LogTailer, parse_deleted_media, EMBY_PATTERN, EMBY_KEYWORD
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d+)-$")
+
+
+class FakeEmbyServer:
+    """
+    模拟Emby日志下载接口
+    """
+
+    def __init__(self):
+        self.logs: Dict[str, bytes] = {}
+        # 是否支持Range请求，不支持时始终返回完整文件
+        self.support_range = True
+        # 收到的请求：(文件名, Range请求头, 返回状态码)
+        self.requests: List[tuple] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self.__handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def log_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/System/Logs/{{name}}?api_key=fake"
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def append(self, name: str, content: bytes):
+        self.logs[name] = self.logs.get(name, b"") + content
+
+    def truncate(self, name: str, size: int = 0):
+        self.logs[name] = self.logs.get(name, b"")[:size]
+
+    def rotate(self, name: str, content: bytes):
+        """
+        以新内容替换日志，模拟轮转后同名文件重新开始写入
+        """
+        self.logs[name] = content
+
+    def __handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                path = unquote(urlparse(self.path).path)
+                name = path[len("/System/Logs/"):] if path.startswith("/System/Logs/") else None
+                content = server.logs.get(name) if name else None
+                range_header = self.headers.get("Range")
+                if content is None:
+                    status, body, headers = 404, b"", {}
+                elif range_header and server.support_range and _RANGE_PATTERN.match(range_header):
+                    start = int(_RANGE_PATTERN.match(range_header).group(1))
+                    if start >= len(content):
+                        status, body, headers = 416, b"", {"Content-Range": f"bytes */{len(content)}"}
+                    else:
+                        status, body = 206, content[start:]
+                        headers = {"Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"}
+                else:
+                    status, body, headers = 200, content, {}
+                server.requests.append((name, range_header, status))
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def emby_line(index: int) -> bytes:
+    return (f"2024-01-01 00:00:{index % 60:02d}.000 Info App: Removing item from database, Type: Episode, "
+            f"Name: 第{index}集, Path: /media/电视剧/测试 (2024)/Season 1/测试 - S01E{index:02d}.mkv, "
+            f"Id: {index}\n").encode("utf-8")
+
+
+def other_line(index: int) -> bytes:
+    return f"2024-01-01 00:00:{index % 60:02d}.000 Info Server: line {index}\n".encode("utf-8")
+
+
+def main():
+    name = "embyserver.txt"
+    server = FakeEmbyServer()
+    server.start()
+    states: Dict[str, dict] = {}
+    tailer = LogTailer(log_url=server.log_url, states=states)
+
+    def read() -> List[str]:
+        server.requests.clear()
+        return list(tailer.tail(name))
+
+    def check(case: str, lines: List[str], expected: List[bytes], status: List[int]):
+        assert lines == [line.decode("utf-8") for line in expected], f"{case}：读取内容不符 {lines}"
+        assert [request[2] for request in server.requests] == status, f"{case}：请求不符 {server.requests}"
+        print(f"{case}：通过，读取 {len(lines)} 行，请求状态 {status}")
+
+    try:
+        # 首次读取完整文件，末尾未写完的行留到下次
+        server.append(name, other_line(1) + emby_line(2) + b"2024-01-01 00:00:03.000 Info Ser")
+        check("首次读取", read(), [other_line(1), emby_line(2)], [200])
+
+        # 追加内容，支持Range时只下载新增部分，并补全上次未写完的行
+        server.append(name, b"ver: line 3\n" + emby_line(4))
+        lines = read()
+        check("Range增量读取", lines, [other_line(3), emby_line(4)], [206])
+        medias = list(parse_deleted_media(lines, EMBY_PATTERN, EMBY_KEYWORD))
+        assert [media.get("episode") for media in medias] == ["E04"], f"解析删除记录不符 {medias}"
+
+        # 没有新内容时只返回用于校验的已读末尾，不重复返回
+        check("没有新增内容", read(), [], [206])
+
+        # 不支持Range时返回完整文件，在本地跳过已读部分
+        server.support_range = False
+        server.append(name, emby_line(5))
+        check("不支持Range", read(), [emby_line(5)], [200])
+        server.support_range = True
+
+        # 日志被截断到已读位置之前，Range越界返回416，从头读取
+        server.truncate(name)
+        server.append(name, emby_line(6))
+        check("日志截断", read(), [emby_line(6)], [416, 200])
+
+        # 日志轮转且新文件比已读位置长，分段内容与记录不一致，从头读取
+        server.rotate(name, b"".join(other_line(i) for i in range(10, 20)) + emby_line(20))
+        check("日志轮转（支持Range）", read(),
+              [other_line(i) for i in range(10, 20)] + [emby_line(20)], [206, 200])
+
+        # 不支持Range时轮转，已读位置之前的内容与记录不一致，整个文件重新读取
+        server.support_range = False
+        server.rotate(name, b"".join(other_line(i) for i in range(30, 45)))
+        check("日志轮转（不支持Range）", read(), [other_line(i) for i in range(30, 45)], [200])
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+清理硬链接 删除延迟及启动扫描基准测试
+
+对比遍历全部文件查找同一inode（v2.2及之前）与LinkIndex按inode直接取出硬链接文件的耗时，
+以及启动时完整扫描与沿用目录快照的耗时
+需在MoviePilot运行环境中执行（插件已安装到app/plugins/removelink）：
+    python benchmarks/removelink_link_index.py [文件数] [删除次数]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.plugins.removelink.link_index import LinkIndex
+
+FILES_PER_DIR = 50
+
+
+def make_tree(root: Path, count: int):
+    """
+    生成下载目录及媒体库目录，媒体库中的文件均为下载目录中文件的硬链接
+    """
+    for i in range(count):
+        download_dir = root / "downloads" / f"dir{i // FILES_PER_DIR}"
+        library_dir = root / "library" / f"dir{i // FILES_PER_DIR}"
+        if i % FILES_PER_DIR == 0:
+            download_dir.mkdir(parents=True)
+            library_dir.mkdir(parents=True)
+        src = download_dir / f"file{i}.mkv"
+        src.touch()
+        os.link(src, library_dir / f"file{i}.mkv")
+
+
+def walk_before(monitor_dirs) -> dict:
+    """
+    原实现：完整遍历所有目录并记录每个文件的inode
+    """
+    state_set = {}
+    for mon_path in monitor_dirs:
+        for root, dirs, files in os.walk(mon_path):
+            for file in files:
+                file = Path(root) / file
+                if not file.exists():
+                    continue
+                state_set[str(file)] = file.stat().st_ino
+    return state_set
+
+
+def delete_before(state_set: dict, path: str) -> list:
+    """
+    原实现：复制文件列表后逐个比较inode
+    """
+    deleted_inode = state_set.pop(path)
+    return [p for p, inode in state_set.copy().items() if inode == deleted_inode]
+
+
+def delete_after(link_index: LinkIndex, path: str) -> list:
+    """
+    现实现：按inode直接取出硬链接文件
+    """
+    return link_index.links(link_index.remove(path))
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    delete_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_tree(root, file_count)
+        monitor_dirs = [str(root / "downloads"), str(root / "library")]
+        snapshot_file = root / "link_index.json.gz"
+
+        start = time.perf_counter()
+        state_set = walk_before(monitor_dirs)
+        walk_time = time.perf_counter() - start
+
+        link_index = LinkIndex()
+        start = time.perf_counter()
+        link_index.refresh(monitor_dirs)
+        refresh_time = time.perf_counter() - start
+        link_index.save(snapshot_file)
+
+        link_index = LinkIndex()
+        start = time.perf_counter()
+        link_index.load(snapshot_file)
+        reused, scanned = link_index.refresh(monitor_dirs)
+        snapshot_time = time.perf_counter() - start
+        assert scanned == 0, "目录未变化时不应重新扫描"
+
+        paths = random.Random(1).sample(sorted(state_set), delete_count)
+        start = time.perf_counter()
+        before = [delete_before(state_set, path) for path in paths]
+        before_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        after = [delete_after(link_index, path) for path in paths]
+        after_time = time.perf_counter() - start
+
+        assert [sorted(links) for links in before] == after, "优化前后查找到的硬链接文件不一致"
+        print(f"文件 {file_count * 2} 个，删除 {delete_count} 次")
+        print(f"启动扫描：完整遍历 {walk_time:.3f} 秒，首次建立索引 {refresh_time:.3f} 秒，"
+              f"沿用快照 {snapshot_time:.3f} 秒（沿用目录 {reused} 个）")
+        print(f"删除延迟：优化前平均 {before_time / delete_count * 1000:.3f} 毫秒，"
+              f"优化后平均 {after_time / delete_count * 1000000:.1f} 微秒")
+
+
+if __name__ == "__main__":
+    main()
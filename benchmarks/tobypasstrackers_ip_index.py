@@ -0,0 +1,104 @@
+"""
+绕过Trackers 网段查找基准测试
+
+使用插件实际下载的大陆IPv4/IPv6网段列表，对比逐个网段调用ip_network判断（v1.4.1及之前）与IPRangeIndex二分查找的耗时，
+以及合并输出网段的耗时
+需在MoviePilot运行环境中执行（插件已安装到app/plugins/tobypasstrackers），默认下载插件使用的列表，也可指定本地列表文件：
+    python benchmarks/tobypasstrackers_ip_index.py [查找次数] [IPv4列表文件] [IPv6列表文件]
+"""
+import ipaddress
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from app.plugins.tobypasstrackers.ip_index import IPRangeIndex
+from app.utils.http import RequestUtils
+
+CHNROUTE_URL = "https://ispip.clang.cn/all_cn.txt"
+CHNROUTE6_URL = "https://ispip.clang.cn/all_cn_ipv6.txt"
+
+
+def load_list(url: str, file_path: Optional[str]) -> List[str]:
+    """
+    读取本地列表文件或下载插件使用的列表，与插件一样去掉末尾换行后按行拆分
+    """
+    if file_path:
+        text = Path(file_path).read_text(encoding="utf-8")
+    else:
+        res = RequestUtils().get_res(url=url)
+        if res is None or res.status_code != 200:
+            raise RuntimeError(f"下载 {url} 失败")
+        text = res.text
+    return [line.strip() for line in text[:-1].split("\n") if line.strip()]
+
+
+def make_ips(cidrs: List[str], count: int) -> List[str]:
+    """
+    一半取自列表中的网段，一半随机生成（大多不在列表中）
+    """
+    rnd = random.Random(1)
+    networks = [ipaddress.ip_network(cidr, strict=False) for cidr in cidrs]
+    version = networks[0].version
+    bits = 32 if version == 4 else 128
+    address_class = ipaddress.IPv4Address if version == 4 else ipaddress.IPv6Address
+    ips = []
+    for i in range(count):
+        if i % 2:
+            network = rnd.choice(networks)
+            ips.append(str(network[rnd.randrange(network.num_addresses)]))
+        else:
+            ips.append(str(address_class(rnd.getrandbits(bits))))
+    return ips
+
+
+def search_before(ip: str, ips_list: List[str]) -> int:
+    """
+    原实现：逐个网段解析后判断地址是否在网段中
+    """
+    ip_obj = ipaddress.ip_address(ip)
+    for i, ip_range in enumerate(ips_list):
+        if ip_obj in ipaddress.ip_network(ip_range, strict=False):
+            return i
+    return -1
+
+
+def run(name: str, cidrs: List[str], version: int, count: int):
+    ips = make_ips(cidrs, count)
+
+    start = time.perf_counter()
+    before = [search_before(ip, cidrs) >= 0 for ip in ips]
+    before_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = IPRangeIndex(version=version)
+    index.extend(cidrs)
+    index.build()
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    after = [ip in index for ip in ips]
+    lookup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    merged = index.to_cidrs()
+    merge_time = time.perf_counter() - start
+
+    assert before == after, f"{name} 优化前后查找结果不一致"
+    print(f"{name}：网段 {len(cidrs)} 个，查找 {count} 次，命中 {sum(after)} 次")
+    print(f"  逐个网段判断：{before_time:.3f} 秒，平均 {before_time / count * 1000:.3f} 毫秒/次")
+    print(f"  IPRangeIndex：建立索引 {build_time * 1000:.1f} 毫秒，"
+          f"查找平均 {lookup_time / count * 1000000:.1f} 微秒/次")
+    print(f"  合并输出：{merge_time * 1000:.1f} 毫秒，{len(cidrs)} 个网段合并为 {len(merged)} 个")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    ipv4_file = sys.argv[2] if len(sys.argv) > 2 else None
+    ipv6_file = sys.argv[3] if len(sys.argv) > 3 else None
+    run("IPv4", load_list(CHNROUTE_URL, ipv4_file), 4, count)
+    run("IPv6", load_list(CHNROUTE6_URL, ipv6_file), 6, count)
+
+
+if __name__ == "__main__":
+    main()
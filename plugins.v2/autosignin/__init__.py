@@ -1,6 +1,7 @@
 import re
 import traceback
 from datetime import datetime, timedelta
+from pathlib import Path
 from multiprocessing.dummy import Pool as ThreadPool
 from multiprocessing.pool import ThreadPool
 from typing import Any, List, Dict, Tuple, Optional
@@ -17,10 +18,10 @@ from app.core.event import eventmanager, Event
 from app.db.site_oper import SiteOper
 from app.helper.browser import PlaywrightHelper
 from app.helper.cloudflare import under_challenge
-from app.helper.module import ModuleHelper
 from app.helper.sites import SitesHelper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.autosignin.site_registry import SiteHandlerRegistry
 from app.schemas.types import EventType, NotificationType
 from app.utils.http import RequestUtils
 from app.utils.site import SiteUtils
@@ -36,7 +37,7 @@ class AutoSignIn(_PluginBase):
     # 插件图标
     plugin_icon = "signin.png"
     # 插件版本
-    plugin_version = "2.6"
+    plugin_version = "2.6.1"
     # 插件作者
     plugin_author = "thsrite"
     # 作者主页
@@ -51,7 +52,8 @@ class AutoSignIn(_PluginBase):
     # 定时器
     _scheduler: Optional[BackgroundScheduler] = None
     # 加载的模块
-    _site_schema: list = []
+    # 站点签到类注册表
+    _site_registry: Optional[SiteHandlerRegistry] = None
 
     # 配置属性
     _enabled: bool = False
@@ -96,8 +98,8 @@ class AutoSignIn(_PluginBase):
         # 加载模块
         if self._enabled or self._onlyonce:
 
-            self._site_schema = ModuleHelper.load('app.plugins.autosignin.sites',
-                                                  filter_func=lambda _, obj: hasattr(obj, 'match'))
+            self._site_registry = SiteHandlerRegistry(package='app.plugins.autosignin.sites',
+                                                      path=Path(__file__).parent / "sites")
 
             # 立即运行一次
             if self._onlyonce:
@@ -1476,13 +1478,9 @@ class AutoSignIn(_PluginBase):
         self.__update_config()
 
     def __build_class(self, url) -> Any:
-        for site_schema in self._site_schema:
-            try:
-                if site_schema.match(url):
-                    return site_schema
-            except Exception as e:
-                logger.error("站点模块加载失败：%s" % str(e))
-        return None
+        if not self._site_registry:
+            return None
+        return self._site_registry.get(url)
 
     def signin_by_domain(self, url: str, apikey: str) -> schemas.Response:
         """
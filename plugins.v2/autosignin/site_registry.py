@@ -0,0 +1,118 @@
+import ast
+import importlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.log import logger
+
+
+class SiteHandlerRegistry:
+    """
+    站点签到类注册表
+    静态解析sites目录下各模块中签到类的site_url并按域名建立索引，查找时按域名直接定位签到类，
+    模块在对应站点第一次签到时才导入；无法静态解析site_url的模块仍在初始化时导入并逐个匹配
+    """
+
+    # 签到类的基类名称
+    base_class = "_ISiteSigninHandler"
+
+    def __init__(self, package: str, path: Path):
+        """
+        :param package: 签到模块所在的包名
+        :param path: 签到模块所在的目录
+        """
+        self._package = package
+        self._lock = threading.Lock()
+        # 域名 -> [(模块名, 类名)]
+        self._index: Dict[str, List[Tuple[str, str]]] = {}
+        # 已导入的签到类
+        self._classes: Dict[Tuple[str, str], Any] = {}
+        # 无法建立索引、需逐个匹配的签到类
+        self._unindexed: List[Any] = []
+        self.__scan(Path(path))
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        """
+        提取Url中的域名，去掉www.前缀，与StringUtils.url_equal的比较方式一致
+        """
+        if not url:
+            return ""
+        if url.startswith("http"):
+            url = urlparse(url).netloc
+        return url.replace("www.", "").strip("/").lower()
+
+    def __scan(self, path: Path):
+        """
+        静态解析签到模块
+        """
+        for file in sorted(path.glob("*.py")):
+            if file.name.startswith("_"):
+                continue
+            module_name = file.stem
+            try:
+                tree = ast.parse(file.read_text(encoding="utf-8"))
+            except Exception as e:
+                logger.error(f"解析站点签到模块 {file.name} 失败：{e}")
+                continue
+            for node in tree.body:
+                if not isinstance(node, ast.ClassDef):
+                    continue
+                if not any(getattr(base, "id", None) == self.base_class for base in node.bases):
+                    continue
+                site_url = self.__get_site_url(node)
+                if site_url:
+                    self._index.setdefault(self.normalize(site_url), []).append((module_name, node.name))
+                else:
+                    handler = self.__import(module_name, node.name)
+                    if handler:
+                        self._unindexed.append(handler)
+
+    @staticmethod
+    def __get_site_url(node: ast.ClassDef) -> Optional[str]:
+        for item in node.body:
+            if isinstance(item, ast.Assign) \
+                    and any(getattr(target, "id", None) == "site_url" for target in item.targets) \
+                    and isinstance(item.value, ast.Constant) and isinstance(item.value.value, str):
+                return item.value.value
+        return None
+
+    def __import(self, module_name: str, class_name: str) -> Optional[Any]:
+        key = (module_name, class_name)
+        with self._lock:
+            if key not in self._classes:
+                try:
+                    module = importlib.import_module(f"{self._package}.{module_name}")
+                    self._classes[key] = getattr(module, class_name)
+                except Exception as e:
+                    logger.error(f"站点模块加载失败：{module_name} {e}")
+                    self._classes[key] = None
+            return self._classes[key]
+
+    def get(self, url: str) -> Optional[Any]:
+        """
+        获取站点Url对应的签到类
+        """
+        domain = self.normalize(url)
+        if not domain:
+            return None
+        # 完整域名、上级域名及各级域名标签，兼容按域名片段匹配的签到类
+        labels = domain.split(".")
+        keys = [".".join(labels[i:]) for i in range(len(labels) - 1)] + labels
+        for key in dict.fromkeys(keys):
+            for module_name, class_name in self._index.get(key, []):
+                handler = self.__import(module_name, class_name)
+                try:
+                    if handler and handler.match(url):
+                        return handler
+                except Exception as e:
+                    logger.error(f"站点模块加载失败：{str(e)}")
+        for handler in self._unindexed:
+            try:
+                if handler.match(url):
+                    return handler
+            except Exception as e:
+                logger.error(f"站点模块加载失败：{str(e)}")
+        return None
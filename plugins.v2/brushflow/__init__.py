@@ -4,8 +4,9 @@ import random
 import re
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
-from typing import Any, List, Dict, Tuple, Optional, Union, Set
+from typing import Any, Iterator, List, Dict, Tuple, Optional, Union, Set
 from urllib.parse import urlparse, parse_qs, unquote, parse_qsl, urlencode, urlunparse
 
 import pytz
@@ -25,6 +26,11 @@ from app.log import logger
 from app.modules.qbittorrent import Qbittorrent
 from app.modules.transmission import Transmission
 from app.plugins import _PluginBase
+from app.plugins.brushflow.bandwidth import BandwidthSampler
+from app.plugins.brushflow.matcher import KeywordMatcher
+from app.plugins.brushflow.rules import BrushRules, BrushTaskIndex
+from app.plugins.brushflow.task_store import BrushTaskStore
+from app.plugins.brushflow.torrent_sync import TorrentSyncEngine
 from app.schemas import NotificationType, TorrentInfo, MediaType, ServiceInfo
 from app.schemas.types import EventType
 from app.utils.http import RequestUtils
@@ -259,7 +265,7 @@ class BrushFlow(_PluginBase):
     # 插件图标
     plugin_icon = "brush.jpg"
     # 插件版本
-    plugin_version = "4.3.3"
+    plugin_version = "4.4.1"
     # 插件作者
     plugin_author = "jxxghp,InfinityPacer"
     # 作者主页
@@ -273,14 +279,31 @@ class BrushFlow(_PluginBase):
 
     # 刷流配置
     _brush_config = None
+    # 刷流规则，站点名称 -> 预编译的刷流规则，None 对应全局规则
+    _brush_rules: Dict[Optional[str], BrushRules] = {}
+    # 刷流任务存储
+    _task_store: Optional[BrushTaskStore] = None
+    # 下载器种子同步
+    _torrent_sync: Optional[TorrentSyncEngine] = None
+    # 后台带宽采样
+    _bandwidth_sampler: Optional[BandwidthSampler] = None
     # Brush任务是否启动
     _task_brush_enable = False
     # 订阅缓存信息
     _subscribe_infos = None
+    # 订阅标题匹配器及其对应的订阅标题
+    _subscribe_matcher: Optional[KeywordMatcher] = None
+    _subscribe_matcher_titles: frozenset = frozenset()
     # Brush定时
     _brush_interval = 10
     # Check定时
     _check_interval = 5
+    # 站点种子并发获取的线程数
+    _fetch_workers = 5
+    # 单个站点获取种子的超时时间（秒）
+    _fetch_timeout = 60
+    # 每批次重新汇报及删除的种子数
+    _delete_batch_size = 100
     # 退出事件
     _event = threading.Event()
     _scheduler = None
@@ -299,14 +322,19 @@ class BrushFlow(_PluginBase):
 
         self._tabs = config.get("_tabs", None)
 
+        self.__init_task_store()
+        self._torrent_sync = TorrentSyncEngine()
+
         # 如果配置校验没有通过，那么这里修改配置文件后退出
         if not self.__validate_and_fix_config(config=config):
             self._brush_config = BrushConfig(config=config)
             self._brush_config.enabled = False
+            self.__compile_brush_rules()
             self.__update_config()
             return
 
         self._brush_config = BrushConfig(config=config)
+        self.__compile_brush_rules()
 
         brush_config = self._brush_config
 
@@ -350,6 +378,11 @@ class BrushFlow(_PluginBase):
         if not self.service_info:
             return
 
+        # 启动后台带宽采样，刷流前置条件直接读取采样结果
+        if brush_config.enabled:
+            self._bandwidth_sampler = BandwidthSampler(sample_func=self.__sample_bandwidth)
+            self._bandwidth_sampler.start()
+
         # 检查是否启用了一次性任务
         if brush_config.onlyonce:
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
@@ -411,7 +444,48 @@ class BrushFlow(_PluginBase):
         pass
 
     def get_api(self) -> List[Dict[str, Any]]:
-        pass
+        """
+        获取插件API
+        [{
+            "path": "/xx",
+            "endpoint": self.xxx,
+            "methods": ["GET", "POST"],
+            "summary": "API说明"
+        }]
+        """
+        return [{
+            "path": "/delete_plan",
+            "endpoint": self.delete_plan,
+            "methods": ["GET"],
+            "summary": "删种计划预览",
+            "description": "按当前配置计算删种计划及耗时，仅预览不执行删除",
+        }]
+
+    def delete_plan(self, apikey: str) -> schemas.Response:
+        """
+        预览删种计划，可由API调用
+        """
+        # 校验
+        if apikey != settings.API_TOKEN:
+            return schemas.Response(success=False, message="API密钥错误")
+
+        brush_config = self.__get_brush_config()
+        if not brush_config or not brush_config.downloader or not self._torrent_sync or not self.downloader:
+            return schemas.Response(success=False, message="没有配置下载器或下载器未连接")
+
+        with lock:
+            torrent_tasks = self._task_store.read_tasks()
+            seeding_torrents_dict, _, error = self._torrent_sync.sync(downloader_name=brush_config.downloader,
+                                                                      downloader=self.downloader)
+            if error:
+                return schemas.Response(success=False, message="连接下载器出错")
+            check_torrents = [seeding_torrents_dict[torrent_hash] for torrent_hash in torrent_tasks
+                              if torrent_hash in seeding_torrents_dict]
+            check_torrents = self.__filter_torrents_by_tag(
+                torrents=check_torrents, exclude_tag=",".join(self.__get_brush_rules().delete_except_tags))
+            plan = self.__plan_delete_torrents(torrents=check_torrents, torrent_tasks=torrent_tasks)
+
+        return schemas.Response(success=True, message=f"待删除种子 {len(plan.get('items'))} 个", data=plan)
 
     def get_service(self) -> List[Dict[str, Any]]:
         """
@@ -797,11 +871,72 @@ class BrushFlow(_PluginBase):
         elements = [
             {
                 'component': 'VRow',
-                'content': self.__get_total_elements()
+                'content': self.__get_total_elements() + self.__get_bandwidth_elements()
             }
         ]
         return cols, attrs, elements
 
+    def __get_bandwidth_elements(self) -> List[dict]:
+        """
+        组装实时带宽图表元素
+        """
+        if not self._bandwidth_sampler:
+            return []
+        samples = self._bandwidth_sampler.history()
+        if not samples:
+            return []
+        labels = [datetime.fromtimestamp(sample[0]).strftime("%H:%M:%S") for sample in samples]
+        # 单位 KB/s
+        upload_datas = [round(sample[1] / 1024, 1) for sample in samples]
+        download_datas = [round(sample[2] / 1024, 1) for sample in samples]
+        return [
+            {
+                'component': 'VCol',
+                'props': {
+                    'cols': 12
+                },
+                'content': [
+                    {
+                        'component': 'VApexChart',
+                        'props': {
+                            'height': 160,
+                            'options': {
+                                'chart': {
+                                    'type': 'area',
+                                    'sparkline': {
+                                        'enabled': True
+                                    }
+                                },
+                                'labels': labels,
+                                'title': {
+                                    'text': f'实时带宽 上传 {upload_datas[-1]} KB/s / 下载 {download_datas[-1]} KB/s'
+                                },
+                                'stroke': {
+                                    'curve': 'smooth',
+                                    'width': 2
+                                },
+                                'tooltip': {
+                                    'x': {
+                                        'show': True
+                                    }
+                                }
+                            },
+                            'series': [
+                                {
+                                    'name': '上传（KB/s）',
+                                    'data': upload_datas
+                                },
+                                {
+                                    'name': '下载（KB/s）',
+                                    'data': download_datas
+                                }
+                            ]
+                        }
+                    }
+                ]
+            }
+        ]
+
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
         """
         拼装插件配置页面，需要返回两块数据：1、页面配置；2、数据结构
@@ -1822,7 +1957,7 @@ class BrushFlow(_PluginBase):
 
     def get_page(self) -> List[dict]:
         # 种子明细
-        torrents = self.get_data("torrents") or {}
+        torrents = self._task_store.list_tasks() if self._task_store else []
 
         if not torrents:
             return [
@@ -1835,9 +1970,8 @@ class BrushFlow(_PluginBase):
                 }
             ]
         else:
-            data_list = torrents.values()
             # 按time倒序排序
-            data_list = sorted(data_list, key=lambda x: x.get("time") or 0, reverse=True)
+            data_list = sorted(torrents, key=lambda x: x.get("time") or 0, reverse=True)
 
         # 表格标题
         headers = [
@@ -1911,6 +2045,9 @@ class BrushFlow(_PluginBase):
         退出插件
         """
         try:
+            if self._bandwidth_sampler:
+                self._bandwidth_sampler.stop()
+                self._bandwidth_sampler = None
             if self._scheduler:
                 self._scheduler.remove_all_jobs()
                 if self._scheduler.running:
@@ -1939,7 +2076,7 @@ class BrushFlow(_PluginBase):
         with lock:
             logger.info(f"开始执行刷流任务 ...")
 
-            torrent_tasks: Dict[str, dict] = self.get_data("torrents") or {}
+            torrent_tasks: Dict[str, dict] = self._task_store.load_tasks()
             torrents_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
 
             # 判断能否通过保种体积前置条件
@@ -1974,35 +2111,106 @@ class BrushFlow(_PluginBase):
             # 获取订阅标题
             subscribe_titles = self.__get_subscribe_titles()
 
-            # 处理所有站点
-            for site in site_infos:
-                # 如果站点刷流没有正确响应，说明没有通过前置条件，其他站点也不需要继续刷流了
-                if not self.__brush_site_torrents(siteid=site.id, torrent_tasks=torrent_tasks,
-                                                  statistic_info=statistic_info,
-                                                  subscribe_titles=subscribe_titles):
-                    logger.info(f"站点 {site.name} 刷流中途结束，停止后续刷流")
-                    break
-                else:
-                    logger.info(f"站点 {site.name} 刷流完成")
+            # 并发获取站点的种子，每获取完一个站点就处理一个，筛选及下载仍串行执行，保证体积及数量统计准确
+            site_torrents = self.__fetch_sites_torrents(site_infos=site_infos,
+                                                        sequential=brush_config.brush_sequential)
+            try:
+                # 处理所有站点
+                for site, torrents in site_torrents:
+                    # 如果站点刷流没有正确响应，说明没有通过前置条件，其他站点也不需要继续刷流了
+                    if not self.__brush_site_torrents(siteinfo=site, torrents=torrents,
+                                                      torrent_tasks=torrent_tasks,
+                                                      statistic_info=statistic_info,
+                                                      subscribe_titles=subscribe_titles):
+                        logger.info(f"站点 {site.name} 刷流中途结束，停止后续刷流")
+                        break
+                    else:
+                        logger.info(f"站点 {site.name} 刷流完成")
+            finally:
+                # 提前结束时取消尚未开始获取的站点
+                site_torrents.close()
 
             # 保存数据
-            self.save_data("torrents", torrent_tasks)
+            self._task_store.save_tasks(torrent_tasks)
             # 保存统计数据
             self.save_data("statistic", statistic_info)
             logger.info(f"刷流任务执行完成")
 
-    def __brush_site_torrents(self, siteid, torrent_tasks: Dict[str, dict], statistic_info: Dict[str, int],
+    def __fetch_sites_torrents(self, site_infos: List[Any],
+                               sequential: bool = False) -> Iterator[Tuple[Any, Optional[List[TorrentInfo]]]]:
+        """
+        使用有限的线程池并发获取站点种子，按获取完成的先后（顺序刷流时按站点顺序）逐个返回站点及其种子；
+        每个站点从开始获取时单独计时，超时或出错的站点返回None，本轮不参与刷流；
+        调用方提前结束时不再获取尚未开始的站点
+        """
+        if not site_infos:
+            return
+
+        stop_event = threading.Event()
+        # 站点ID -> 开始获取的时间
+        start_times: Dict[int, float] = {}
+
+        def fetch(siteinfo: Any) -> Optional[List[TorrentInfo]]:
+            if stop_event.is_set():
+                return None
+            start_times[siteinfo.id] = time.time()
+            logger.info(f"开始获取站点 {siteinfo.name} 的新种子 ...")
+            torrents = TorrentsChain().browse(domain=siteinfo.domain) or []
+            logger.info(f"站点 {siteinfo.name} 获取种子完成，数量 {len(torrents)}，"
+                        f"耗时 {time.time() - start_times[siteinfo.id]:.2f} 秒")
+            return torrents
+
+        executor = ThreadPoolExecutor(max_workers=min(self._fetch_workers, len(site_infos)),
+                                      thread_name_prefix="BrushFlow-Fetch")
+        try:
+            futures = {executor.submit(fetch, siteinfo): siteinfo for siteinfo in site_infos}
+            pending = set(futures)
+            # 已有结果的站点，超时或出错时为None
+            results: Dict[int, Optional[List[TorrentInfo]]] = {}
+            waiting = list(site_infos)
+            while waiting:
+                # 返回已有结果的站点，顺序刷流时只能依次返回
+                if sequential:
+                    while waiting and waiting[0].id in results:
+                        siteinfo = waiting.pop(0)
+                        yield siteinfo, results.pop(siteinfo.id)
+                else:
+                    for siteinfo in [site for site in waiting if site.id in results]:
+                        waiting.remove(siteinfo)
+                        yield siteinfo, results.pop(siteinfo.id)
+                if not waiting:
+                    break
+                # 等待到最早开始获取的站点超时为止
+                deadlines = [start_times[futures[future].id] + self._fetch_timeout
+                             for future in pending if futures[future].id in start_times]
+                timeout = max(min(deadlines) - time.time(), 0) if deadlines else self._fetch_timeout
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    siteinfo = futures[future]
+                    try:
+                        results[siteinfo.id] = future.result()
+                    except Exception as e:
+                        logger.error(f"站点 {siteinfo.name} 获取种子失败，错误详情: {e}")
+                        results[siteinfo.id] = None
+                now = time.time()
+                for future in list(pending):
+                    siteinfo = futures[future]
+                    start_time = start_times.get(siteinfo.id)
+                    if start_time and now - start_time >= self._fetch_timeout:
+                        logger.warning(f"站点 {siteinfo.name} 获取种子超时，本次跳过该站点")
+                        pending.discard(future)
+                        results[siteinfo.id] = None
+        finally:
+            # 不等待超时的站点，避免拖慢整个刷流周期
+            stop_event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __brush_site_torrents(self, siteinfo: Any, torrents: Optional[List[TorrentInfo]],
+                              torrent_tasks: Dict[str, dict], statistic_info: Dict[str, int],
                               subscribe_titles: Set[str]) -> bool:
         """
         针对站点进行刷流
         """
-        siteinfo = SiteOper().get(siteid)
-        if not siteinfo:
-            logger.warning(f"站点不存在：{siteid}")
-            return True
-
-        logger.info(f"开始获取站点 {siteinfo.name} 的新种子 ...")
-        torrents = TorrentsChain().browse(domain=siteinfo.domain)
         if not torrents:
             logger.info(f"站点 {siteinfo.name} 没有获取到种子")
             return True
@@ -2014,13 +2222,18 @@ class BrushFlow(_PluginBase):
 
         # 排除包含订阅的种子
         if brush_config.except_subscribe:
-            torrents = self.__filter_torrents_contains_subscribe(torrents=torrents, subscribe_titles=subscribe_titles)
+            torrents = self.__filter_torrents_contains_subscribe(torrents=torrents,
+                                                                 subscribe_matcher=self.__get_subscribe_matcher(
+                                                                     subscribe_titles=subscribe_titles))
 
         # 按发布日期降序排列
         torrents.sort(key=lambda x: x.pubdate or '', reverse=True)
 
         torrents_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
 
+        # 本批种子共用的任务索引，用于排除重复种子
+        task_index = BrushTaskIndex(torrent_tasks=torrent_tasks)
+
         logger.info(f"正在准备种子刷流，数量 {len(torrents)}")
 
         # 过滤种子
@@ -2042,7 +2255,7 @@ class BrushFlow(_PluginBase):
 
             # 判断能否通过刷流条件
             condition_passed, reason = self.__evaluate_conditions_for_brush(torrent=torrent,
-                                                                            torrent_tasks=torrent_tasks)
+                                                                            task_index=task_index)
             self.__log_brush_conditions(passed=condition_passed, reason=reason, torrent=torrent)
             if not condition_passed:
                 continue
@@ -2097,6 +2310,7 @@ class BrushFlow(_PluginBase):
                 "downloader": self.service_info.name
             })
             torrent_tasks[hash_string] = torrent_task
+            task_index.add(torrent_task)
 
             # 统计数据
             torrents_size += torrent.size
@@ -2183,74 +2397,64 @@ class BrushFlow(_PluginBase):
 
         return True, None
 
-    def __evaluate_conditions_for_brush(self, torrent, torrent_tasks) -> Tuple[bool, Optional[str]]:
+    def __evaluate_conditions_for_brush(self, torrent, task_index: BrushTaskIndex) -> Tuple[bool, Optional[str]]:
         """
         过滤不符合条件的种子
         """
-        brush_config = self.__get_brush_config(torrent.site_name)
+        brush_rules = self.__get_brush_rules(torrent.site_name)
 
         # 排除重复种子
         # 默认根据标题和站点名称进行排除
-        task_key = f"{torrent.site_name}{torrent.title}"
-        if any(task_key == f"{task.get('site_name')}{task.get('title')}" for task in torrent_tasks.values()):
+        if task_index.has_title(site_name=torrent.site_name, title=torrent.title):
             return False, "重复种子"
 
         # 部分站点标题会上新时携带后缀，这里进一步根据种子详情地址进行排除
         if torrent.page_url:
-            task_page_url = f"{torrent.site_name}{torrent.page_url}"
-            if any(task_page_url == f"{task.get('site_name')}{task.get('page_url')}" for task in
-                   torrent_tasks.values()):
+            if task_index.has_page_url(site_name=torrent.site_name, page_url=torrent.page_url):
                 return False, "重复种子"
 
         # 不同站点如果遇到相同种子，判断前一个种子是否已经在做种，否则排除处理
         if torrent.title:
-            if any(torrent.site_name != f"{task.get('site_name')}" and torrent.title == f"{task.get('title')}"
-                   and not task.get("seed_time") for task in torrent_tasks.values()):
+            if task_index.has_unfinished_on_other_site(site_name=torrent.site_name, title=torrent.title):
                 return False, "其他站点存在尚未下载完成的相同种子"
 
         # 促销条件
-        if brush_config.freeleech and torrent.downloadvolumefactor != 0:
+        if brush_rules.freeleech and torrent.downloadvolumefactor != 0:
             return False, "非免费种子"
-        if brush_config.freeleech == "2xfree" and torrent.uploadvolumefactor != 2:
+        if brush_rules.freeleech == "2xfree" and torrent.uploadvolumefactor != 2:
             return False, "非双倍上传种子"
 
         # H&R
-        if brush_config.hr == "yes" and torrent.hit_and_run:
+        if brush_rules.hr == "yes" and torrent.hit_and_run:
             return False, "存在H&R"
 
         # 包含规则
-        if brush_config.include and not (
-                re.search(brush_config.include, torrent.title, re.I) or re.search(brush_config.include,
-                                                                                  torrent.description, re.I)):
+        if not brush_rules.match_include(torrent):
             return False, "不符合包含规则"
 
         # 排除规则
-        if brush_config.exclude and (
-                re.search(brush_config.exclude, torrent.title, re.I) or re.search(brush_config.exclude,
-                                                                                  torrent.description, re.I)):
+        if brush_rules.match_exclude(torrent):
             return False, "符合排除规则"
 
         # 种子大小（GB）
-        if brush_config.size:
-            sizes = [float(size) * 1024 ** 3 for size in brush_config.size.split("-")]
-            if len(sizes) == 1 and torrent.size < sizes[0]:
+        if brush_rules.size:
+            min_size, max_size = brush_rules.size
+            if max_size is None and torrent.size < min_size:
                 return False, f"种子大小 {self.__bytes_to_gb(torrent.size):.1f} GB，不符合条件"
-            elif len(sizes) > 1 and not sizes[0] <= torrent.size <= sizes[1]:
+            elif max_size is not None and not min_size <= torrent.size <= max_size:
                 return False, f"种子大小 {self.__bytes_to_gb(torrent.size):.1f} GB，不在指定范围内"
 
         # 做种人数
-        if brush_config.seeder:
-            seeders_range = [float(n) for n in brush_config.seeder.split("-")]
+        if brush_rules.seeder:
+            min_seeders, max_seeders = brush_rules.seeder
             # 检查是否仅指定了一个数字，即做种人数需要小于等于该数字
-            if len(seeders_range) == 1:
+            if max_seeders is None:
                 # 当做种人数大于该数字时，不符合条件
-                if torrent.seeders > seeders_range[0]:
+                if torrent.seeders > min_seeders:
                     return False, f"做种人数 {torrent.seeders}，超过单个指定值"
-            # 如果指定了一个范围
-            elif len(seeders_range) > 1:
-                # 检查做种人数是否在指定的范围内（包括边界）
-                if not (seeders_range[0] <= torrent.seeders <= seeders_range[1]):
-                    return False, f"做种人数 {torrent.seeders}，不在指定范围内"
+            # 如果指定了一个范围，检查做种人数是否在指定的范围内（包括边界）
+            elif not (min_seeders <= torrent.seeders <= max_seeders):
+                return False, f"做种人数 {torrent.seeders}，不在指定范围内"
 
         # 发布时间：用户时间 - 站点时间 - 时区偏移
         # e.g.1: 用户UTC+8，站点UTC，timezone_offset应为+8，种子在UTC 0:00/UTC+8 8:00发布；
@@ -2258,19 +2462,19 @@ class BrushFlow(_PluginBase):
         # e.g.2: 用户UTC，站点UTC+8，timezone_offset应为-8，种子在UTC 0:00/UTC+8 8:00发布：
         #        1:17 - 8:00 - (-8:00) = 1:17；1小时17分为正确的发布时间与当前的时间差
         # timezone_offset为后加功能，默认为0，方便后续更多与时间相关的功能开发，之前在单独站点配置中使用pubtime计算过时区偏移的用户也不受影响
-        pubdate_minutes = self.__get_pubminutes(torrent.pubdate) - brush_config.timezone_offset
+        pubdate_minutes = self.__get_pubminutes(torrent.pubdate) - brush_rules.timezone_offset
         # 已支持独立站点配置，取消单独适配站点时区逻辑，可通过配置项「pubtime」自行适配
         # pubdate_minutes = self.__adjust_site_pubminutes(pubdate_minutes, torrent)
-        if brush_config.pubtime:
-            pubtimes = [float(n) for n in brush_config.pubtime.split("-")]
-            if len(pubtimes) == 1:
+        if brush_rules.pubtime:
+            min_pubtime, max_pubtime = brush_rules.pubtime
+            if max_pubtime is None:
                 # 单个值：选择发布时间小于等于该值的种子
-                if pubdate_minutes > pubtimes[0]:
-                    return False, f"发布时间（站点时区）{torrent.pubdate}，当前配置时区偏移 {brush_config.timezone_offset} 小时，{pubdate_minutes:.0f} 分钟前，不符合条件"
+                if pubdate_minutes > min_pubtime:
+                    return False, f"发布时间（站点时区）{torrent.pubdate}，当前配置时区偏移 {brush_rules.timezone_offset} 小时，{pubdate_minutes:.0f} 分钟前，不符合条件"
             else:
                 # 范围值：选择发布时间在范围内的种子
-                if not (pubtimes[0] <= pubdate_minutes <= pubtimes[1]):
-                    return False, f"发布时间（站点时区）{torrent.pubdate}，当前配置时区偏移 {brush_config.timezone_offset} 小时，{pubdate_minutes:.0f} 分钟前，不在指定范围内"
+                if not (min_pubtime <= pubdate_minutes <= max_pubtime):
+                    return False, f"发布时间（站点时区）{torrent.pubdate}，当前配置时区偏移 {brush_rules.timezone_offset} 小时，{pubdate_minutes:.0f} 分钟前，不在指定范围内"
 
         return True, None
 
@@ -2300,23 +2504,27 @@ class BrushFlow(_PluginBase):
 
         with lock:
             logger.info("开始检查刷流下载任务 ...")
-            torrent_tasks: Dict[str, dict] = self.get_data("torrents") or {}
+            torrent_tasks: Dict[str, dict] = self._task_store.load_tasks()
             unmanaged_tasks: Dict[str, dict] = self.get_data("unmanaged") or {}
 
             downloader = self.downloader
-            seeding_torrents, error = downloader.get_torrents()
+            # 增量同步下载器种子，仅处理自上次检查以来发生变化的种子
+            seeding_torrents_dict, changed_hashes, error = self._torrent_sync.sync(
+                downloader_name=brush_config.downloader, downloader=downloader)
             if error:
                 logger.warning("连接下载器出错，将在下个时间周期重试")
                 return
 
-            seeding_torrents_dict = {self.__get_hash(torrent): torrent for torrent in seeding_torrents}
+            logger.debug(f"下载器共 {len(seeding_torrents_dict)} 个种子，自上次检查以来变化 {len(changed_hashes)} 个")
+            changed_torrents_dict = {torrent_hash: seeding_torrents_dict[torrent_hash] for torrent_hash in changed_hashes}
 
             # 检查种子刷流标签变更情况
             self.__update_seeding_tasks_based_on_tags(torrent_tasks=torrent_tasks, unmanaged_tasks=unmanaged_tasks,
-                                                      seeding_torrents_dict=seeding_torrents_dict)
+                                                      seeding_torrents_dict=changed_torrents_dict)
 
             torrent_check_hashes = list(torrent_tasks.keys())
             if not torrent_tasks or not torrent_check_hashes:
+                self._torrent_sync.mark_processed(changed_hashes)
                 logger.info("没有需要检查的刷流下载任务")
                 return
 
@@ -2325,8 +2533,10 @@ class BrushFlow(_PluginBase):
             # 获取到当前所有做种数据中需要被检查的种子数据
             check_torrents = [seeding_torrents_dict[th] for th in torrent_check_hashes if th in seeding_torrents_dict]
 
-            # 先更新刷流任务的最新状态，上下传，分享率
-            self.__update_torrent_tasks_state(torrents=check_torrents, torrent_tasks=torrent_tasks)
+            # 先更新刷流任务的最新状态，上下传，分享率，只有发生变化的种子才需要更新
+            self.__update_torrent_tasks_state(torrents=[changed_torrents_dict[th] for th in torrent_check_hashes
+                                                        if th in changed_torrents_dict],
+                                              torrent_tasks=torrent_tasks)
 
             # 更新刷流任务列表中在下载器中删除的种子为删除状态
             self.__update_undeleted_torrents_missing_in_downloader(torrent_tasks, torrent_check_hashes, check_torrents)
@@ -2334,11 +2544,8 @@ class BrushFlow(_PluginBase):
             # 根据配置的标签进行种子排除
             if check_torrents:
                 logger.info(f"当前刷流任务共 {len(check_torrents)} 个有效种子，正在准备按设定的种子标签进行排除")
-                # 初始化一个空的列表来存储需要排除的标签
-                tags_to_exclude = set()
-                # 如果 delete_except_tags 非空且不是纯空白，则添加到排除列表中
-                if brush_config.delete_except_tags and brush_config.delete_except_tags.strip():
-                    tags_to_exclude.update(tag.strip() for tag in brush_config.delete_except_tags.split(','))
+                # 需要排除的标签已在加载配置时预先拆分
+                tags_to_exclude = self.__get_brush_rules().delete_except_tags
                 # 将所有需要排除的标签组合成一个字符串，每个标签之间用逗号分隔
                 combined_tags = ",".join(tags_to_exclude)
                 if combined_tags:  # 确保有标签需要排除
@@ -2356,37 +2563,22 @@ class BrushFlow(_PluginBase):
             if not check_torrents:
                 logger.info("没有需要检查的任务，跳过")
             else:
-                need_delete_hashes = []
-
-                # 如果配置了动态删除以及删种阈值，则根据动态删种进行分组处理
+                # 如果配置了动态删除以及删种阈值，则根据动态删种进行分组处理，否则均认为是没有开启动态删种
                 if brush_config.proxy_delete and brush_config.delete_size_range:
                     logger.info("已开启动态删种，按系统默认动态删种条件开始检查任务")
-                    proxy_delete_hashes = self.__delete_torrent_for_proxy(torrents=check_torrents,
-                                                                          torrent_tasks=torrent_tasks) or []
-                    need_delete_hashes.extend(proxy_delete_hashes)
-                # 否则均认为是没有开启动态删种
                 else:
                     logger.info("没有开启动态删种，按用户设置删种条件开始检查任务")
-                    not_proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(torrents=check_torrents,
-                                                                                            torrent_tasks=torrent_tasks) or []
-                    need_delete_hashes.extend(not_proxy_delete_hashes)
-
-                if need_delete_hashes:
-                    # 如果是QB，则重新汇报Tracker
-                    if DownloaderHelper().is_downloader("qbittorrent", service=self.service_info):
-                        self.__qb_torrents_reannounce(torrent_hashes=need_delete_hashes)
-                    # 删除种子
-                    if downloader.delete_torrents(ids=need_delete_hashes, delete_file=True):
-                        for torrent_hash in need_delete_hashes:
-                            torrent_tasks[torrent_hash]["deleted"] = True
-                            torrent_tasks[torrent_hash]["deleted_time"] = time.time()
+                delete_plan = self.__plan_delete_torrents(torrents=check_torrents, torrent_tasks=torrent_tasks)
+                logger.info(f"删种计划计算完成，待删除种子 {len(delete_plan.get('items'))} 个，"
+                            f"耗时 {delete_plan.get('timings').get('total')} 毫秒")
+                self.__execute_delete_plan(plan=delete_plan, torrent_tasks=torrent_tasks)
 
             # 归档数据
             self.__auto_archive_tasks(torrent_tasks=torrent_tasks)
 
             self.__update_and_save_statistic_info(torrent_tasks)
 
-            self.save_data("torrents", torrent_tasks)
+            self._torrent_sync.mark_processed(changed_hashes)
 
             logger.info("刷流下载任务检查完成")
 
@@ -2394,14 +2586,15 @@ class BrushFlow(_PluginBase):
         """
         更新刷流任务的最新状态，上下传，分享率
         """
+        is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
         for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
+            torrent_hash = self.__get_hash(torrent, is_qbittorrent=is_qbittorrent)
             torrent_task = torrent_tasks.get(torrent_hash, None)
             # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
             if not torrent_task:
                 continue
 
-            torrent_info = self.__get_torrent_info(torrent)
+            torrent_info = self.__get_torrent_info(torrent, is_qbittorrent=is_qbittorrent)
 
             # 更新上传量、下载量
             torrent_task.update({
@@ -2464,7 +2657,7 @@ class BrushFlow(_PluginBase):
                     logger.info(f"站点 {torrent_task.get('site_name')}，"
                                 f"刷流任务种子移除：{torrent_task.get('title')}|{torrent_task.get('description')}")
 
-        self.save_data("torrents", torrent_tasks)
+        self._task_store.save_tasks(torrent_tasks)
         self.save_data("unmanaged", unmanaged_tasks)
 
         # 发送汇总消息
@@ -2479,50 +2672,25 @@ class BrushFlow(_PluginBase):
                                                             reason="在下载器中找到已标记删除的刷流任务对应的种子信息",
                                                             torrent_tasks=reset_tasks)
 
-    def __group_torrents_by_proxy_delete(self, torrents: List[Any], torrent_tasks: Dict[str, dict]):
-        """
-        根据是否启用动态删种进行分组
-        """
-        proxy_delete_torrents = []
-        not_proxy_delete_torrents = []
-
-        for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
-            torrent_task = torrent_tasks.get(torrent_hash, None)
-
-            # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
-            if not torrent_task:
-                continue
-
-            site_name = torrent_task.get("site_name", "")
-
-            brush_config = self.__get_brush_config(site_name)
-            if brush_config.proxy_delete:
-                proxy_delete_torrents.append(torrent)
-            else:
-                not_proxy_delete_torrents.append(torrent)
-
-        return proxy_delete_torrents, not_proxy_delete_torrents
-
     def __evaluate_conditions_for_delete(self, site_name: str, torrent_info: dict, torrent_task: dict) \
             -> Tuple[bool, str]:
         """
         评估删除条件并返回是否应删除种子及其原因
         """
         brush_config = self.__get_brush_config(sitename=site_name)
+        brush_rules = self.__get_brush_rules(sitename=site_name)
 
         reason = "未能满足设置的删除条件"
 
         # 当配置了H&R做种时间/分享率时，则H&R种子只有达到预期行为时，才会进行删除，如果没有配置H&R做种时间/分享率，则普通种子的删除规则也适用于H&R种子
         # 判断是否为H&R种子并且是否配置了特定的H&R条件
         hit_and_run = torrent_task.get("hit_and_run", False)
-        hr_specific_conditions_configured = hit_and_run and (brush_config.hr_seed_time or brush_config.seed_ratio)
+        hr_specific_conditions_configured = hit_and_run and (brush_rules.hr_seed_time or brush_rules.seed_ratio)
         if hr_specific_conditions_configured:
-            if (brush_config.hr_seed_time and torrent_info.get("seeding_time")
-                    >= float(brush_config.hr_seed_time) * 3600):
+            if brush_rules.hr_seed_time and torrent_info.get("seeding_time") >= brush_rules.hr_seed_time:
                 return True, (f"H&R种子，做种时间 {torrent_info.get('seeding_time') / 3600:.1f} 小时，"
                               f"大于 {brush_config.hr_seed_time} 小时")
-            if brush_config.seed_ratio and torrent_info.get("ratio") >= float(brush_config.seed_ratio):
+            if brush_rules.seed_ratio and torrent_info.get("ratio") >= brush_rules.seed_ratio:
                 return True, f"H&R种子，分享率 {torrent_info.get('ratio'):.2f}，大于 {brush_config.seed_ratio}"
             return False, "H&R种子，未能满足设置的H&R删除条件"
 
@@ -2547,20 +2715,19 @@ class BrushFlow(_PluginBase):
 
         # 处理其他场景，1. 不是H&R种子；2. 是H&R种子但没有特定条件配置
         reason = reason if not hit_and_run else "H&R种子（未设置H&R条件），未能满足设置的删除条件"
-        if brush_config.seed_time and torrent_info.get("seeding_time") >= float(brush_config.seed_time) * 3600:
+        if brush_rules.seed_time and torrent_info.get("seeding_time") >= brush_rules.seed_time:
             reason = f"做种时间 {torrent_info.get('seeding_time') / 3600:.1f} 小时，大于 {brush_config.seed_time} 小时"
-        elif brush_config.seed_ratio and torrent_info.get("ratio") >= float(brush_config.seed_ratio):
+        elif brush_rules.seed_ratio and torrent_info.get("ratio") >= brush_rules.seed_ratio:
             reason = f"分享率 {torrent_info.get('ratio'):.2f}，大于 {brush_config.seed_ratio}"
-        elif brush_config.seed_size and torrent_info.get("uploaded") >= float(brush_config.seed_size) * 1024 ** 3:
+        elif brush_rules.seed_size and torrent_info.get("uploaded") >= brush_rules.seed_size:
             reason = f"上传量 {torrent_info.get('uploaded') / 1024 ** 3:.1f} GB，大于 {brush_config.seed_size} GB"
-        elif brush_config.download_time and torrent_info.get("downloaded") < torrent_info.get(
-                "total_size") and torrent_info.get("dltime") >= float(brush_config.download_time) * 3600:
+        elif brush_rules.download_time and torrent_info.get("downloaded") < torrent_info.get(
+                "total_size") and torrent_info.get("dltime") >= brush_rules.download_time:
             reason = f"下载耗时 {torrent_info.get('dltime') / 3600:.1f} 小时，大于 {brush_config.download_time} 小时"
-        elif brush_config.seed_avgspeed and torrent_info.get("avg_upspeed") <= float(
-                brush_config.seed_avgspeed) * 1024 and torrent_info.get("seeding_time") >= 30 * 60:
+        elif brush_rules.seed_avgspeed and torrent_info.get("avg_upspeed") <= brush_rules.seed_avgspeed \
+                and torrent_info.get("seeding_time") >= 30 * 60:
             reason = f"平均上传速度 {torrent_info.get('avg_upspeed') / 1024:.1f} KB/s，低于 {brush_config.seed_avgspeed} KB/s"
-        elif brush_config.seed_inactivetime and torrent_info.get("iatime") >= float(
-                brush_config.seed_inactivetime) * 60:
+        elif brush_rules.seed_inactivetime and torrent_info.get("iatime") >= brush_rules.seed_inactivetime:
             reason = f"未活动时间 {torrent_info.get('iatime') / 60:.0f} 分钟，大于 {brush_config.seed_inactivetime} 分钟"
         else:
             return False, reason
@@ -2573,6 +2740,7 @@ class BrushFlow(_PluginBase):
         评估动态删除前置条件并返回是否应删除种子及其原因
         """
         brush_config = self.__get_brush_config(sitename=site_name)
+        brush_rules = self.__get_brush_rules(sitename=site_name)
 
         should_delete = False
         reason = "未能满足动态删除设置的前置删除条件"
@@ -2596,232 +2764,230 @@ class BrushFlow(_PluginBase):
                 logger.debug(f"error: {e}")
             break
 
-        if brush_config.download_time and torrent_info.get("downloaded") < torrent_info.get(
-                "total_size") and torrent_info.get("dltime") >= float(brush_config.download_time) * 3600:
+        if brush_rules.download_time and torrent_info.get("downloaded") < torrent_info.get(
+                "total_size") and torrent_info.get("dltime") >= brush_rules.download_time:
             reason = f"下载耗时 {torrent_info.get('dltime') / 3600:.1f} 小时，大于 {brush_config.download_time} 小时"
         elif not should_delete:
             return False, reason
 
         return True, reason
 
-    def __delete_torrent_for_evaluate_conditions(self, torrents: List[Any], torrent_tasks: Dict[str, dict],
-                                                 proxy_delete: bool = False) -> List:
+    def __plan_delete_torrents(self, torrents: List[Any], torrent_tasks: Dict[str, dict]) -> Dict[str, Any]:
         """
-        根据条件删除种子并获取已删除列表
+        计算删种计划，单次遍历生成候选种子后依次评估删除规则，不执行任何删除及通知
+        动态删除规则如下：
+        - 不管做种体积是否超过设定的动态删除阈值，默认优先执行排除H&R种子后满足「下载超时时间」的种子
+        - 上述规则执行完成后，当做种体积依旧超过设定的动态删除阈值时，继续执行下述种子删除规则
+        - 优先删除满足用户设置删除规则的全部种子，即便在删除过程中已经低于了阈值下限，也会继续删除
+        - 若删除后还没有达到阈值，则在已完成种子中排除H&R种子后按做种时间倒序进行删除
+        - 动态删除阈值：100，当做种体积 > 100G 时，则开始删除种子，直至降低至 100G
+        - 动态删除阈值：50-100，当做种体积 > 100G 时，则开始删除种子，直至降至为 50G
+        :return: 删种计划，items 为待删除的种子及原因，timings 为各阶段耗时（毫秒）
         """
-        delete_hashes = []
+        start_time = time.perf_counter()
+        timings = {}
+        plan = {"items": [], "proxy_triggered": False, "proxy_size_range": False, "total_size": 0, "timings": timings}
 
+        # 单次遍历，生成候选种子：Hash、任务、种子信息
+        is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
+        candidates = []
         for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
+            torrent_hash = self.__get_hash(torrent, is_qbittorrent=is_qbittorrent)
             torrent_task = torrent_tasks.get(torrent_hash, None)
             # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
             if not torrent_task:
                 continue
-            site_name = torrent_task.get("site_name", "")
-            torrent_title = torrent_task.get("title", "")
-            torrent_desc = torrent_task.get("description", "")
-
-            torrent_info = self.__get_torrent_info(torrent)
+            candidates.append((torrent_hash, torrent_task,
+                               self.__get_torrent_info(torrent, is_qbittorrent=is_qbittorrent)))
+        timings["collect"] = round((time.perf_counter() - start_time) * 1000, 2)
+
+        def add_item(candidate: tuple, reason: str, notify: bool = True):
+            torrent_hash, torrent_task, torrent_info = candidate
+            plan["items"].append({
+                "hash": torrent_hash,
+                "site_name": torrent_task.get("site_name", ""),
+                "title": torrent_task.get("title", ""),
+                "description": torrent_task.get("description", ""),
+                "size": torrent_info.get("total_size") or 0,
+                "reason": reason,
+                "notify": notify
+            })
 
-            # 删除种子的具体实现可能会根据实际情况略有不同
-            should_delete, reason = self.__evaluate_conditions_for_delete(site_name=site_name,
-                                                                          torrent_info=torrent_info,
-                                                                          torrent_task=torrent_task)
-            if should_delete:
-                delete_hashes.append(torrent_hash)
-                reason = "触发动态删除阈值，" + reason if proxy_delete else reason
-                self.__send_delete_message(site_name=site_name, torrent_title=torrent_title, torrent_desc=torrent_desc,
-                                           reason=reason)
-                logger.info(f"站点：{site_name}，{reason}，删除种子：{torrent_title}|{torrent_desc}")
-            else:
-                logger.debug(f"站点：{site_name}，{reason}，不删除种子：{torrent_title}|{torrent_desc}")
+        def evaluate(items: List[tuple], proxy_delete: bool = False) -> Set[str]:
+            deleted = set()
+            for candidate in items:
+                torrent_hash, torrent_task, torrent_info = candidate
+                site_name = torrent_task.get("site_name", "")
+                should_delete, reason = self.__evaluate_conditions_for_delete(site_name=site_name,
+                                                                              torrent_info=torrent_info,
+                                                                              torrent_task=torrent_task)
+                if should_delete:
+                    add_item(candidate, reason="触发动态删除阈值，" + reason if proxy_delete else reason)
+                    deleted.add(torrent_hash)
+                else:
+                    logger.debug(f"站点：{site_name}，{reason}，不删除种子："
+                                 f"{torrent_task.get('title', '')}|{torrent_task.get('description', '')}")
+            return deleted
 
-        return delete_hashes
+        brush_config = self.__get_brush_config()
+        brush_rules = self.__get_brush_rules()
 
-    def __delete_torrent_for_evaluate_proxy_pre_conditions(self, torrents: List[Any],
-                                                           torrent_tasks: Dict[str, dict]) -> List:
-        """
-        根据动态删除前置条件排除H&R种子后删除种子并获取已删除列表
-        """
-        delete_hashes = []
+        # 没有开启动态删种时，按用户设置删种条件检查全部种子
+        if not (brush_config.proxy_delete and brush_rules.delete_size_range):
+            evaluate(candidates)
+            timings["evaluate"] = round((time.perf_counter() - start_time) * 1000 - timings["collect"], 2)
+            timings["total"] = round((time.perf_counter() - start_time) * 1000, 2)
+            return plan
 
-        for torrent in torrents:
-            torrent_hash = self.__get_hash(torrent)
-            torrent_task = torrent_tasks.get(torrent_hash, None)
-            # 如果找不到种子任务，说明不在管理的种子范围内，直接跳过
-            if not torrent_task:
-                continue
+        # 计算当前总做种体积
+        total_torrent_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
+        logger.info(
+            f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB，正在准备计算满足动态前置删除条件的种子")
 
+        # 执行排除H&R种子后满足前置删除条件的种子
+        pre_delete_hashes = set()
+        pre_delete_total_size = 0
+        for candidate in candidates:
+            torrent_hash, torrent_task, torrent_info = candidate
             # 如果是H&R种子，前置条件中不进行处理
-            if torrent_task.get('hit_and_run', False):
+            if torrent_task.get("hit_and_run", False):
                 continue
-
             site_name = torrent_task.get("site_name", "")
-            torrent_title = torrent_task.get("title", "")
-            torrent_desc = torrent_task.get("description", "")
-
-            torrent_info = self.__get_torrent_info(torrent)
-
-            # 删除种子的具体实现可能会根据实际情况略有不同
             should_delete, reason = self.__evaluate_proxy_pre_conditions_for_delete(site_name=site_name,
                                                                                     torrent_info=torrent_info,
                                                                                     torrent_task=torrent_task)
             if should_delete:
-                delete_hashes.append(torrent_hash)
-                self.__send_delete_message(site_name=site_name, torrent_title=torrent_title, torrent_desc=torrent_desc,
-                                           reason=reason)
-                logger.info(f"站点：{site_name}，{reason}，删除种子：{torrent_title}|{torrent_desc}")
-            else:
-                logger.debug(f"站点：{site_name}，{reason}，不删除种子：{torrent_title}|{torrent_desc}")
-
-        return delete_hashes
-
-    def __delete_torrent_for_proxy(self, torrents: List[Any], torrent_tasks: Dict[str, dict]) -> List:
-        """
-        动态删除种子，删除规则如下；
-        - 不管做种体积是否超过设定的动态删除阈值，默认优先执行排除H&R种子后满足「下载超时时间」的种子
-        - 上述规则执行完成后，当做种体积依旧超过设定的动态删除阈值时，继续执行下述种子删除规则
-        - 优先删除满足用户设置删除规则的全部种子，即便在删除过程中已经低于了阈值下限，也会继续删除
-        - 若删除后还没有达到阈值，则在已完成种子中排除H&R种子后按做种时间倒序进行删除
-        - 动态删除阈值：100，当做种体积 > 100G 时，则开始删除种子，直至降低至 100G
-        - 动态删除阈值：50-100，当做种体积 > 100G 时，则开始删除种子，直至降至为 50G
-        """
-        brush_config = self.__get_brush_config()
-
-        # 如果没有启用动态删除或没有设置删除阈值，则不执行删除操作
-        if not (brush_config.proxy_delete and brush_config.delete_size_range):
-            return []
-
-        # 获取种子信息Map
-        torrent_info_map = {self.__get_hash(torrent): self.__get_torrent_info(torrent=torrent) for torrent in torrents}
-
-        # 计算当前总做种体积
-        total_torrent_size = self.__calculate_seeding_torrents_size(torrent_tasks=torrent_tasks)
-
-        logger.info(
-            f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB，正在准备计算满足动态前置删除条件的种子")
-
-        # 执行排除H&R种子后满足前置删除条件的种子
-        pre_delete_hashes = self.__delete_torrent_for_evaluate_proxy_pre_conditions(torrents=torrents,
-                                                                                    torrent_tasks=torrent_tasks) or []
+                add_item(candidate, reason=reason)
+                pre_delete_hashes.add(torrent_hash)
+                pre_delete_total_size += torrent_info.get("total_size") or 0
 
         # 如果存在前置删除种子，这里进行额外判断，总做种体积排除前置删除种子的体积
         if pre_delete_hashes:
-            pre_delete_total_size = sum(torrent_info_map[self.__get_hash(torrent)].get("total_size", 0)
-                                        for torrent in torrents if self.__get_hash(torrent) in pre_delete_hashes)
-            total_torrent_size = total_torrent_size - pre_delete_total_size
-            torrents = [torrent for torrent in torrents if self.__get_hash(torrent) not in pre_delete_hashes]
+            total_torrent_size -= pre_delete_total_size
+            candidates = [candidate for candidate in candidates if candidate[0] not in pre_delete_hashes]
             logger.info(
                 f"满足动态删除前置条件的种子共 {len(pre_delete_hashes)} 个，体积 {self.__bytes_to_gb(pre_delete_total_size):.1f} GB，"
                 f"删除种子后，当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB")
         else:
             logger.info(f"没有找到任何满足动态删除前置条件的种子")
 
-        # 解析删除阈值范围
-        sizes = [float(size) * 1024 ** 3 for size in brush_config.delete_size_range.split("-")]
-        min_size = sizes[0]  # 至少需要达到的做种体积
-        max_size = sizes[1] if len(sizes) > 1 else sizes[0]  # 触发删除操作的做种体积上限
-
-        # 判断是否为区间删除
-        proxy_size_range = len(sizes) > 1
+        # 删除阈值范围，单个值时上下限相同
+        min_size, max_size = brush_rules.delete_size_range
+        proxy_size_range = max_size is not None
+        max_size = max_size if proxy_size_range else min_size
+        plan["proxy_size_range"] = proxy_size_range
 
         # 当总体积未超过最大阈值时，不需要执行删除操作
         if total_torrent_size < max_size:
             logger.info(
                 f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB，上限 {self.__bytes_to_gb(max_size):.1f} GB，"
                 f"下限 {self.__bytes_to_gb(min_size):.1f} GB，未进一步触发动态删除")
-            return pre_delete_hashes or []
         else:
             logger.info(
                 f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB，上限 {self.__bytes_to_gb(max_size):.1f} GB，"
                 f"下限 {self.__bytes_to_gb(min_size):.1f} GB，进一步触发动态删除")
+            plan["proxy_triggered"] = True
 
-        need_delete_hashes = []
-        need_delete_hashes.extend(pre_delete_hashes)
-
-        # 即使开了动态删除，但是也有可能部分站点单独设置了关闭，这里根据种子托管进行分组，先处理不需要托管的种子，按设置的规则进行删除
-        proxy_delete_torrents, not_proxy_delete_torrents = self.__group_torrents_by_proxy_delete(torrents=torrents,
-                                                                                                 torrent_tasks=torrent_tasks)
-        logger.info(f"托管种子数 {len(proxy_delete_torrents)}，未托管种子数 {len(not_proxy_delete_torrents)}")
-        if not_proxy_delete_torrents:
-            not_proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(torrents=not_proxy_delete_torrents,
-                                                                                    torrent_tasks=torrent_tasks) or []
-            need_delete_hashes.extend(not_proxy_delete_hashes)
-            total_torrent_size -= sum(
-                torrent_info_map[self.__get_hash(torrent)].get("total_size", 0) for torrent in not_proxy_delete_torrents
-                if self.__get_hash(torrent) in not_proxy_delete_hashes)
-
-        # 如果删除非托管种子后仍未达到最小体积要求，则处理托管种子
-        if total_torrent_size > min_size and proxy_delete_torrents:
-            proxy_delete_hashes = self.__delete_torrent_for_evaluate_conditions(torrents=proxy_delete_torrents,
-                                                                                torrent_tasks=torrent_tasks,
-                                                                                proxy_delete=True) or []
-            need_delete_hashes.extend(proxy_delete_hashes)
-            total_torrent_size -= sum(
-                torrent_info_map[self.__get_hash(torrent)].get("total_size", 0) for torrent in proxy_delete_torrents if
-                self.__get_hash(torrent) in proxy_delete_hashes)
-
-        # 在完成初始删除步骤后，如果总体积仍然超过最小阈值，则进一步找到已完成种子并排除HR种子后按做种时间正序进行删除
-        if total_torrent_size > min_size:
-            # 重新计算当前的种子列表，排除已删除的种子
-            remaining_hashes = list(
-                {self.__get_hash(torrent) for torrent in proxy_delete_torrents} - set(need_delete_hashes))
-            # 这里根据排除后的种子列表，再次从下载器中找到已完成的任务
-            downloader = self.downloader
-            completed_torrents = downloader.get_completed_torrents(ids=remaining_hashes)
-            remaining_hashes = {self.__get_hash(torrent) for torrent in completed_torrents}
-            remaining_torrents = [(_hash, torrent_info_map[_hash]) for _hash in remaining_hashes]
-
-            # 准备一个列表，用于存放满足条件的种子，即非HR种子且有明确做种时间
-            filtered_torrents = [(_hash, info['seeding_time']) for _hash, info in remaining_torrents if
-                                 not torrent_tasks[_hash].get("hit_and_run", False)]
-            sorted_torrents = sorted(filtered_torrents, key=lambda x: x[1], reverse=True)
-
-            # 进行额外的删除操作，直到满足最小阈值或没有更多种子可删除
-            for torrent_hash, _ in sorted_torrents:
-                if total_torrent_size <= min_size:
-                    break
-                torrent_task = torrent_tasks.get(torrent_hash, None)
-                torrent_info = torrent_info_map.get(torrent_hash, None)
-                if not torrent_task or not torrent_info:
-                    continue
-
-                need_delete_hashes.append(torrent_hash)
-                total_torrent_size -= torrent_info.get("total_size", 0)
-
-                site_name = torrent_task.get("site_name", "")
-                torrent_title = torrent_task.get("title", "")
-                torrent_desc = torrent_task.get("description", "")
-                seeding_time = torrent_task.get("seeding_time", 0)
-                if seeding_time:
+            # 即使开了动态删除，但是也有可能部分站点单独设置了关闭，这里根据种子托管进行分组，先处理不需要托管的种子，按设置的规则进行删除
+            proxy_delete_candidates, not_proxy_delete_candidates = [], []
+            for candidate in candidates:
+                if self.__get_brush_config(candidate[1].get("site_name", "")).proxy_delete:
+                    proxy_delete_candidates.append(candidate)
+                else:
+                    not_proxy_delete_candidates.append(candidate)
+            logger.info(f"托管种子数 {len(proxy_delete_candidates)}，未托管种子数 {len(not_proxy_delete_candidates)}")
+
+            deleted_hashes = set()
+            if not_proxy_delete_candidates:
+                deleted_hashes |= evaluate(not_proxy_delete_candidates)
+                total_torrent_size -= sum(candidate[2].get("total_size") or 0 for candidate in
+                                          not_proxy_delete_candidates if candidate[0] in deleted_hashes)
+
+            # 如果删除非托管种子后仍未达到最小体积要求，则处理托管种子
+            if total_torrent_size > min_size and proxy_delete_candidates:
+                proxy_deleted_hashes = evaluate(proxy_delete_candidates, proxy_delete=True)
+                deleted_hashes |= proxy_deleted_hashes
+                total_torrent_size -= sum(candidate[2].get("total_size") or 0 for candidate in
+                                          proxy_delete_candidates if candidate[0] in proxy_deleted_hashes)
+
+            # 在完成初始删除步骤后，如果总体积仍然超过最小阈值，则进一步找到已完成种子并排除H&R种子后按做种时间倒序进行删除
+            if total_torrent_size > min_size:
+                remaining_candidates = sorted(
+                    (candidate for candidate in proxy_delete_candidates
+                     if candidate[0] not in deleted_hashes and candidate[2].get("completed")
+                     and not candidate[1].get("hit_and_run", False)),
+                    key=lambda x: x[2].get("seeding_time") or 0, reverse=True)
+                # 进行额外的删除操作，直到满足最小阈值或没有更多种子可删除
+                for candidate in remaining_candidates:
+                    if total_torrent_size <= min_size:
+                        break
+                    total_torrent_size -= candidate[2].get("total_size") or 0
+                    seeding_time = candidate[1].get("seeding_time", 0)
                     reason = (f"触发动态删除阈值，系统自动删除，做种时间 {seeding_time / 3600:.1f} 小时，"
                               f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB")
                     # 如果是区间删除，一次性删除的数据过多，取消消息推送
-                    if not proxy_size_range:
-                        self.__send_delete_message(site_name=site_name, torrent_title=torrent_title,
-                                                   torrent_desc=torrent_desc,
-                                                   reason=reason)
-                    logger.info(f"站点：{site_name}，{reason}，删除种子：{torrent_title}|{torrent_desc}")
+                    add_item(candidate, reason=reason, notify=bool(seeding_time) and not proxy_size_range)
 
-        delete_sites = {torrent_tasks[hash_key].get('site_name', '') for hash_key in need_delete_hashes if
-                        hash_key in torrent_tasks}
-        msg = (f"站点：{'，'.join(delete_sites)}\n内容：已完成 {len(need_delete_hashes)} 个种子删除，"
-               f"当前做种体积 {self.__bytes_to_gb(total_torrent_size):.1f} GB\n原因：触发动态删除阈值，系统自动删除")
-        logger.info(msg)
+        plan["total_size"] = total_torrent_size
+        timings["evaluate"] = round((time.perf_counter() - start_time) * 1000 - timings["collect"], 2)
+        timings["total"] = round((time.perf_counter() - start_time) * 1000, 2)
+        return plan
 
-        # 如果是区间删除，这里则进行统一推送
-        if proxy_size_range:
-            self.__send_message(title="【刷流任务种子删除】", text=msg)
+    def __execute_delete_plan(self, plan: Dict[str, Any], torrent_tasks: Dict[str, dict]) -> List[str]:
+        """
+        按批次执行删种计划，QB会在删除前重新汇报Tracker
+        :return: 已删除的种子Hash
+        """
+        items = plan.get("items")
+        if not items:
+            return []
 
-        # 返回所有需要删除的种子的哈希列表
-        return need_delete_hashes
+        downloader = self.downloader
+        if not downloader:
+            return []
+        is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
+
+        deleted_hashes = []
+        for i in range(0, len(items), self._delete_batch_size):
+            batch_items = items[i:i + self._delete_batch_size]
+            batch_hashes = [item.get("hash") for item in batch_items]
+            # 如果是QB，则重新汇报Tracker
+            if is_qbittorrent:
+                self.__qb_torrents_reannounce(torrent_hashes=batch_hashes)
+            # 删除种子
+            if not downloader.delete_torrents(ids=batch_hashes, delete_file=True):
+                logger.warning(f"删除种子失败，本批次共 {len(batch_hashes)} 个种子，将在下个时间周期重试")
+                continue
+            deleted_time = time.time()
+            for item in batch_items:
+                torrent_task = torrent_tasks.get(item.get("hash"))
+                if torrent_task:
+                    torrent_task["deleted"] = True
+                    torrent_task["deleted_time"] = deleted_time
+                if item.get("notify"):
+                    self.__send_delete_message(site_name=item.get("site_name"), torrent_title=item.get("title"),
+                                               torrent_desc=item.get("description"), reason=item.get("reason"))
+                logger.info(f"站点：{item.get('site_name')}，{item.get('reason')}，"
+                            f"删除种子：{item.get('title')}|{item.get('description')}")
+            deleted_hashes.extend(batch_hashes)
+
+        if plan.get("proxy_triggered"):
+            delete_sites = {item.get("site_name") for item in items}
+            msg = (f"站点：{'，'.join(delete_sites)}\n内容：已完成 {len(deleted_hashes)} 个种子删除，"
+                   f"当前做种体积 {self.__bytes_to_gb(plan.get('total_size')):.1f} GB\n原因：触发动态删除阈值，系统自动删除")
+            logger.info(msg)
+            # 如果是区间删除，这里则进行统一推送
+            if plan.get("proxy_size_range"):
+                self.__send_message(title="【刷流任务种子删除】", text=msg)
+
+        return deleted_hashes
 
     def __update_undeleted_torrents_missing_in_downloader(self, torrent_tasks, torrent_check_hashes, torrents):
         """
         处理已经被删除，但是任务记录中还没有被标记删除的种子
         """
         # 先通过获取的全量种子，判断已经被删除，但是任务记录中还没有被标记删除的种子
-        torrent_all_hashes = self.__get_all_hashes(torrents)
+        torrent_all_hashes = set(self.__get_all_hashes(torrents))
         missing_hashes = [hash_value for hash_value in torrent_check_hashes if hash_value not in torrent_all_hashes]
         undeleted_hashes = [hash_value for hash_value in missing_hashes if not torrent_tasks[hash_value].get("deleted")]
 
@@ -2890,10 +3056,13 @@ class BrushFlow(_PluginBase):
         active_uploaded, active_downloaded, active_count, total_unarchived = 0, 0, 0, 0
 
         statistic_info = self.__get_statistic_info()
-        archived_tasks = self.get_data("archived") or {}
-        combined_tasks = {**torrent_tasks, **archived_tasks}
+        # 归档任务直接在存储中汇总，无需加载全部归档记录
+        archived_statistic = self._task_store.get_archived_statistic()
+        total_deleted += archived_statistic.get("deleted")
+        total_downloaded += archived_statistic.get("downloaded")
+        total_uploaded += archived_statistic.get("uploaded")
 
-        for task in combined_tasks.values():
+        for task in torrent_tasks.values():
             if task.get("deleted", False):
                 total_deleted += 1
             total_downloaded += task.get("downloaded", 0)
@@ -2909,7 +3078,7 @@ class BrushFlow(_PluginBase):
                 total_unarchived += 1
 
         # 更新统计信息
-        total_count = len(combined_tasks)
+        total_count = len(torrent_tasks) + archived_statistic.get("count")
         statistic_info.update({
             "uploaded": total_uploaded,
             "downloaded": total_downloaded,
@@ -2929,7 +3098,7 @@ class BrushFlow(_PluginBase):
                     f"总下载量：{StringUtils.str_filesize(total_downloaded)}")
 
         self.save_data("statistic", statistic_info)
-        self.save_data("torrents", torrent_tasks)
+        self._task_store.save_tasks(torrent_tasks)
 
     def __get_brush_config(self, sitename: str = None) -> BrushConfig:
         """
@@ -2937,6 +3106,24 @@ class BrushFlow(_PluginBase):
         """
         return self._brush_config if not sitename else self._brush_config.get_site_config(sitename=sitename)
 
+    def __compile_brush_rules(self):
+        """
+        预编译全局及各站点独立配置的刷流规则，配置加载或变更时调用
+        """
+        brush_config = self._brush_config
+        self._brush_rules = {None: BrushRules(brush_config)}
+        if brush_config.enable_site_config:
+            for sitename, site_config in brush_config.group_site_configs.items():
+                self._brush_rules[sitename] = BrushRules(site_config)
+
+    def __get_brush_rules(self, sitename: str = None) -> BrushRules:
+        """
+        获取预编译的刷流规则，没有站点独立配置时返回全局规则
+        """
+        if sitename and sitename in self._brush_rules:
+            return self._brush_rules[sitename]
+        return self._brush_rules[None]
+
     def __validate_and_fix_config(self, config: dict = None) -> bool:
         """
         检查并修正配置值
@@ -3262,13 +3449,14 @@ class BrushFlow(_PluginBase):
         except Exception as err:
             logger.error(f"强制重新汇报失败：{str(err)}")
 
-    def __get_hash(self, torrent: Any):
+    def __get_hash(self, torrent: Any, is_qbittorrent: Optional[bool] = None):
         """
         获取种子hash
         """
         try:
-            return torrent.get("hash") if DownloaderHelper().is_downloader("qbittorrent", service=self.service_info) \
-                else torrent.hashString
+            if is_qbittorrent is None:
+                is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
+            return torrent.get("hash") if is_qbittorrent else torrent.hashString
         except Exception as e:
             print(str(e))
             return ""
@@ -3294,25 +3482,29 @@ class BrushFlow(_PluginBase):
             print(str(e))
             return []
 
-    def __get_label(self, torrent: Any):
+    def __get_label(self, torrent: Any, is_qbittorrent: Optional[bool] = None):
         """
         获取种子标签
         """
         try:
+            if is_qbittorrent is None:
+                is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
             return [str(tag).strip() for tag in torrent.get("tags").split(',')] \
-                if DownloaderHelper().is_downloader("qbittorrent",
-                                                    service=self.service_info) else torrent.labels or []
+                if is_qbittorrent else torrent.labels or []
         except Exception as e:
             print(str(e))
             return []
 
-    def __get_torrent_info(self, torrent: Any) -> dict:
+    def __get_torrent_info(self, torrent: Any, is_qbittorrent: Optional[bool] = None) -> dict:
         """
         获取种子信息
+        :param is_qbittorrent: 是否为QB，批量处理时由调用方预先判断，避免对每个种子重复获取下载器
         """
         date_now = int(time.time())
+        if is_qbittorrent is None:
+            is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
         # QB
-        if DownloaderHelper().is_downloader("qbittorrent", service=self.service_info):
+        if is_qbittorrent:
             """
             {
               "added_on": 1693359031,
@@ -3401,6 +3593,8 @@ class BrushFlow(_PluginBase):
             downloaded = torrent.get("downloaded")
             # 种子大小
             total_size = torrent.get("total_size")
+            # 是否已完成
+            completed = (torrent.get("progress") or 0) >= 1
             # 添加时间
             add_on = (torrent.get("added_on") or 0)
             add_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(add_on))
@@ -3445,6 +3639,8 @@ class BrushFlow(_PluginBase):
                 iatime = date_now - int(torrent.date_active.timestamp())
             # 种子大小
             total_size = torrent.total_size
+            # 是否已完成
+            completed = (torrent.progress or 0) >= 100
             # 添加时间
             add_on = (torrent.date_added.timestamp() if torrent.date_added else 0)
             add_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(add_on))
@@ -3464,6 +3660,7 @@ class BrushFlow(_PluginBase):
             "iatime": iatime,
             "dltime": dltime,
             "total_size": total_size,
+            "completed": completed,
             "add_time": add_time,
             "add_on": add_on,
             "tags": tags,
@@ -3571,38 +3768,47 @@ class BrushFlow(_PluginBase):
         获取任务中的种子总大小
         """
         # 读取种子记录
-        task_info = self.get_data("torrents") or {}
+        task_info = self._task_store.list_tasks() if self._task_store else []
         if not task_info:
             return 0
-        total_size = sum([task.get("size") or 0 for task in task_info.values()])
+        total_size = sum([task.get("size") or 0 for task in task_info])
         return total_size
 
-    def __get_average_bandwidth(self, sample_count: int = 5, interval: float = 3.0) \
-            -> Tuple[Optional[float], Optional[float]]:
+    def __get_average_bandwidth(self, window: float = 15.0) -> Tuple[Optional[float], Optional[float]]:
         """
-        多次采样上传和下载带宽，取平均值
+        获取最近一段时间内的上传和下载平均带宽，直接读取后台采样结果，不阻塞等待
         """
-        upload_speeds = []
-        download_speeds = []
-        start_time = time.time()
-        for _ in range(sample_count):
+        sampler = self._bandwidth_sampler
+        if not sampler:
+            # 没有启动后台采样时，立即采样一次
             downloader_info = self.__get_downloader_info()
-            if downloader_info:
-                upload_speeds.append(downloader_info.upload_speed or 0)
-                download_speeds.append(downloader_info.download_speed or 0)
-            # 采样间隔
-            time.sleep(interval)
-        end_time = time.time()
-        total_duration = end_time - start_time
-        if not upload_speeds or not download_speeds:
+            if not downloader_info:
+                return None, None
+            return downloader_info.upload_speed or 0, downloader_info.download_speed or 0
+
+        avg_upload_speed, avg_download_speed = sampler.average(window=window)
+        if avg_upload_speed is None or avg_download_speed is None:
+            # 窗口内没有采样记录，立即补充采样后使用加权平均值
+            sampler.sample()
+            avg_upload_speed, avg_download_speed = sampler.ewma()
+        if avg_upload_speed is None or avg_download_speed is None:
             return None, None
-        avg_upload_speed = sum(upload_speeds) / len(upload_speeds) if upload_speeds else 0
-        avg_download_speed = sum(download_speeds) / len(download_speeds) if download_speeds else 0
         logger.debug(f"平均上传带宽 {StringUtils.str_filesize(avg_upload_speed)}, "
-                     f"平均下载带宽 {StringUtils.str_filesize(avg_download_speed)}, "
-                     f"采样次数={sample_count}, 时长={total_duration:.2f} 秒")
+                     f"平均下载带宽 {StringUtils.str_filesize(avg_download_speed)}, 采样窗口={window:.0f} 秒")
         return avg_upload_speed, avg_download_speed
 
+    def __sample_bandwidth(self) -> Optional[Tuple[float, float]]:
+        """
+        后台带宽采样，下载器未连接时跳过
+        """
+        service = DownloaderHelper().get_service(name=self.__get_brush_config().downloader)
+        if not service or service.instance.is_inactive():
+            return None
+        downloader_info = self.__get_downloader_info()
+        if not downloader_info:
+            return None
+        return downloader_info.upload_speed or 0, downloader_info.download_speed or 0
+
     def __get_downloader_info(self) -> schemas.DownloaderInfo:
         """
         获取下载器实时信息（所有下载器）
@@ -3696,10 +3902,11 @@ class BrushFlow(_PluginBase):
         # 将 exclude_tag 字符串分割成一个集合，并去除每个标签两端的空白，忽略空白标签并自动去重
         exclude_tags = set(tag.strip() for tag in exclude_tag.split(',') if tag.strip())
 
+        is_qbittorrent = DownloaderHelper().is_downloader("qbittorrent", service=self.service_info)
         filter_torrents = []
         for torrent in torrents:
             # 使用 __get_label 方法获取每个 torrent 的标签列表
-            labels = self.__get_label(torrent)
+            labels = self.__get_label(torrent, is_qbittorrent=is_qbittorrent)
             # 检查是否有任何一个排除标签存在于标签列表中
             if not any(exclude in labels for exclude in exclude_tags):
                 filter_torrents.append(torrent)
@@ -3761,8 +3968,17 @@ class BrushFlow(_PluginBase):
         unique_titles = {title for titles in self._subscribe_infos.values() for title in titles}
         return unique_titles
 
+    def __get_subscribe_matcher(self, subscribe_titles: Set[str]) -> KeywordMatcher:
+        """
+        获取订阅标题匹配器，仅在订阅标题变化时重新构建
+        """
+        if self._subscribe_matcher is None or self._subscribe_matcher_titles != subscribe_titles:
+            self._subscribe_matcher = KeywordMatcher(subscribe_titles)
+            self._subscribe_matcher_titles = frozenset(subscribe_titles)
+        return self._subscribe_matcher
+
     @staticmethod
-    def __filter_torrents_contains_subscribe(torrents: Any, subscribe_titles: Set[str]):
+    def __filter_torrents_contains_subscribe(torrents: Any, subscribe_matcher: KeywordMatcher):
         # 初始化两个列表，一个用于收集未被排除的种子，一个用于记录被排除的种子
         included_torrents = []
         excluded_torrents = []
@@ -3773,7 +3989,7 @@ class BrushFlow(_PluginBase):
             title = torrent.title or ''
             description = torrent.description or ''
 
-            if any(subscribe_title in title or subscribe_title in description for subscribe_title in subscribe_titles):
+            if subscribe_matcher.search(title) or subscribe_matcher.search(description):
                 # 如果种子的标题或描述包含订阅标题中的任一项，则记录为被排除
                 excluded_torrents.append(torrent)
                 logger.info(f"命中订阅内容，排除种子：{title}|{description}")
@@ -3832,47 +4048,43 @@ class BrushFlow(_PluginBase):
             logger.info("自动归档记录天数小于等于0，取消自动归档")
             return
 
-        # 用于存储已删除的数据
-        archived_tasks: Dict[str, dict] = self.get_data("archived") or {}
-
         current_time = time.time()
         archive_threshold_seconds = self._brush_config.auto_archive_days * 86400  # 将天数转换为秒数
 
-        # 准备一个列表，记录所有需要从原始数据中删除的键
-        keys_to_delete = set()
-
-        # 遍历所有 torrent 条目
-        for key, value in torrent_tasks.items():
-            deleted_time = value.get("deleted_time")
-            # 场景 1: 检查任务是否已被标记为删除且超出保留天数
-            if (value.get("deleted") and isinstance(deleted_time, (int, float)) and
-                    current_time - deleted_time > archive_threshold_seconds):
-                keys_to_delete.add(key)
-                archived_tasks[key] = value
-                continue
-
-            # 场景 2: 检查没有明确删除时间的历史数据
-            if value.get("deleted") and deleted_time is None:
-                keys_to_delete.add(key)
-                archived_tasks[key] = value
-                continue
-
-        # 从原始字典中移除已删除的条目
-        for key in keys_to_delete:
-            del torrent_tasks[key]
-
-        self.save_data("archived", archived_tasks)
+        # 已被标记为删除且超出保留天数，或没有明确删除时间的历史数据，通过一次范围更新归档，并从任务中移除
+        archived_hashes = self._task_store.archive_tasks(torrent_tasks=torrent_tasks,
+                                                         deleted_before=current_time - archive_threshold_seconds)
+        if archived_hashes:
+            logger.info(f"已自动归档 {len(archived_hashes)} 个已删除的刷流任务")
 
     def __clear_tasks(self):
         """
         清除统计数据
         彻底重置所有刷流数据，如当前还存在正在做种的刷流任务，待定时检查任务执行后，会自动纳入刷流管理
         """
-        self.save_data("torrents", {})
-        self.save_data("archived", {})
+        self._task_store.clear()
         self.save_data("unmanaged", {})
         self.save_data("statistic", {})
 
+    def __init_task_store(self):
+        """
+        初始化刷流任务存储，首次使用时迁移旧版本保存在插件数据中的任务及归档记录
+        """
+        self._task_store = BrushTaskStore(db_path=self.get_data_path() / "tasks.db")
+        if not self._task_store.is_empty():
+            return
+        torrent_tasks = self.get_data("torrents")
+        archived_tasks = self.get_data("archived")
+        if not torrent_tasks and not archived_tasks:
+            return
+        try:
+            count = self._task_store.import_tasks(torrent_tasks=torrent_tasks, archived_tasks=archived_tasks)
+            self.del_data("torrents")
+            self.del_data("archived")
+            logger.info(f"已将 {count} 条刷流任务及归档记录迁移至任务存储")
+        except Exception as e:
+            logger.error(f"迁移刷流任务记录失败，错误详情: {e}")
+
     def __get_statistic_info(self) -> Dict[str, int]:
         """
         获取统计数据
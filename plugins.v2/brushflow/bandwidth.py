@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from app.log import logger
+
+
+class BandwidthSampler:
+    """
+    带宽采样
+    在后台线程中定时采样下载器上传、下载速度并保存在环形缓冲区中，查询时直接返回加权或窗口平均值，无需阻塞等待采样
+    """
+
+    def __init__(self, sample_func: Callable[[], Optional[Tuple[float, float]]],
+                 interval: float = 3.0, capacity: int = 100, alpha: float = 0.3):
+        """
+        :param sample_func: 采样函数，返回上传速度、下载速度（Byte/s）
+        :param interval: 采样间隔（秒）
+        :param capacity: 环形缓冲区容量
+        :param alpha: 指数加权移动平均的平滑系数
+        """
+        self._sample_func = sample_func
+        self._interval = interval
+        self._alpha = alpha
+        self._lock = threading.Lock()
+        # 采样记录：采样时间、上传速度、下载速度
+        self._samples: deque = deque(maxlen=capacity)
+        # 指数加权移动平均：上传速度、下载速度
+        self._ewma: Optional[Tuple[float, float]] = None
+        self._event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        """
+        启动后台采样
+        """
+        if self.running:
+            return
+        self._event.clear()
+        self._thread = threading.Thread(target=self.__run, name="BrushFlow-Bandwidth", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        停止后台采样
+        """
+        self._event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self._interval + 1)
+        self._thread = None
+
+    def __run(self):
+        while not self._event.is_set():
+            self.sample()
+            self._event.wait(self._interval)
+
+    def sample(self) -> bool:
+        """
+        立即采样一次
+        """
+        try:
+            speeds = self._sample_func()
+        except Exception as e:
+            logger.debug(f"带宽采样失败：{e}")
+            return False
+        if not speeds:
+            return False
+        upload_speed, download_speed = speeds[0] or 0, speeds[1] or 0
+        with self._lock:
+            self._samples.append((time.time(), upload_speed, download_speed))
+            if self._ewma is None:
+                self._ewma = (upload_speed, download_speed)
+            else:
+                self._ewma = (self._alpha * upload_speed + (1 - self._alpha) * self._ewma[0],
+                              self._alpha * download_speed + (1 - self._alpha) * self._ewma[1])
+        return True
+
+    def ewma(self) -> Tuple[Optional[float], Optional[float]]:
+        """
+        获取上传、下载速度的指数加权移动平均值，没有采样记录时返回None
+        """
+        with self._lock:
+            return self._ewma if self._ewma is not None else (None, None)
+
+    def average(self, window: float = 15.0) -> Tuple[Optional[float], Optional[float]]:
+        """
+        获取最近一段时间内（秒）上传、下载速度的平均值，没有采样记录时返回None
+        """
+        since = time.time() - window
+        with self._lock:
+            samples = [sample for sample in self._samples if sample[0] >= since]
+        if not samples:
+            return None, None
+        return (sum(sample[1] for sample in samples) / len(samples),
+                sum(sample[2] for sample in samples) / len(samples))
+
+    def history(self) -> List[Tuple[float, float, float]]:
+        """
+        获取缓冲区中的全部采样记录：采样时间、上传速度、下载速度
+        """
+        with self._lock:
+            return list(self._samples)
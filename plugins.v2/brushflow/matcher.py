@@ -0,0 +1,69 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class KeywordMatcher:
+    """
+    多关键字匹配
+    基于 Aho–Corasick 自动机，一次遍历文本即可判断是否包含任一关键字
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        # 状态转移表，每个状态对应 字符 -> 下一状态
+        self._goto: List[Dict[str, int]] = [{}]
+        # 失配指针
+        self._fail: List[int] = [0]
+        # 状态是否命中关键字（含通过失配指针可达的关键字）
+        self._output: List[Optional[str]] = [None]
+        for keyword in keywords:
+            if keyword:
+                self.__add(keyword)
+        self.__build()
+
+    def __add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+        self._output[state] = keyword
+
+    def __build(self):
+        """
+        按广度优先构建失配指针
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def search(self, text: str) -> Optional[str]:
+        """
+        返回文本中命中的第一个关键字，没有命中时返回None
+        """
+        if not text or len(self._goto) == 1:
+            return None
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
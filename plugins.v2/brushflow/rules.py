@@ -0,0 +1,134 @@
+import re
+from typing import Any, Dict, Optional, Pattern, Set, Tuple
+
+from app.log import logger
+
+
+class BrushRules:
+    """
+    刷流规则
+    将BrushConfig中的刷流及删种条件预先编译为数值边界、正则及标签集合，避免在每个种子上重复解析配置
+    """
+
+    def __init__(self, brush_config: Any):
+        # 促销及H&R
+        self.freeleech = brush_config.freeleech
+        self.hr = brush_config.hr
+        # 包含、排除规则
+        # 正则无效时包含规则不匹配任何种子、排除规则匹配所有种子，避免误刷
+        self.include = self.__compile(brush_config.include, "包含规则", fallback=r"(?!)")
+        self.exclude = self.__compile(brush_config.exclude, "排除规则", fallback=r"")
+        # 种子大小（Byte）、做种人数、发布时间（分钟），单个值时上界为None
+        self.size = self.__parse_range(brush_config.size, scale=1024 ** 3)
+        self.seeder = self.__parse_range(brush_config.seeder)
+        self.pubtime = self.__parse_range(brush_config.pubtime)
+        self.timezone_offset = brush_config.timezone_offset
+        # 删种条件，统一换算为秒、Byte、Byte/s
+        self.hr_seed_time = self.__scale(brush_config.hr_seed_time, 3600)
+        self.seed_time = self.__scale(brush_config.seed_time, 3600)
+        self.seed_ratio = self.__scale(brush_config.seed_ratio)
+        self.seed_size = self.__scale(brush_config.seed_size, 1024 ** 3)
+        self.download_time = self.__scale(brush_config.download_time, 3600)
+        self.seed_avgspeed = self.__scale(brush_config.seed_avgspeed, 1024)
+        self.seed_inactivetime = self.__scale(brush_config.seed_inactivetime, 60)
+        self.del_no_free = brush_config.del_no_free
+        # 动态删种阈值（Byte）
+        self.delete_size_range = self.__parse_range(brush_config.delete_size_range, scale=1024 ** 3)
+        # 删种排除标签
+        self.delete_except_tags: Set[str] = {tag.strip() for tag in (brush_config.delete_except_tags or "").split(",")
+                                             if tag.strip()}
+
+    @staticmethod
+    def __compile(pattern: Optional[str], desc: str, fallback: str) -> Optional[Pattern]:
+        """
+        编译规则正则，正则无效时使用fallback，不会因规则无效而放行种子
+        """
+        if not pattern:
+            return None
+        try:
+            return re.compile(pattern, re.I)
+        except re.error as e:
+            logger.error(f"刷流{desc} {pattern} 不是有效的正则表达式，将不会刷流任何种子，错误详情: {e}")
+            return re.compile(fallback)
+
+    @staticmethod
+    def __parse_range(value: Optional[str], scale: float = 1) -> Optional[Tuple[float, Optional[float]]]:
+        """
+        解析'5'或'5-10'格式的数值范围
+        """
+        if not value:
+            return None
+        try:
+            numbers = [float(n) * scale for n in str(value).split("-")]
+        except ValueError:
+            return None
+        return numbers[0], numbers[1] if len(numbers) > 1 else None
+
+    @staticmethod
+    def __scale(value: Any, scale: float = 1) -> Optional[float]:
+        """
+        按单位换算数值，未配置时返回None
+        """
+        if not value:
+            return None
+        try:
+            return float(value) * scale
+        except (ValueError, TypeError):
+            return None
+
+    def match_include(self, torrent: Any) -> bool:
+        """
+        标题或描述是否符合包含规则，未配置时视为符合
+        """
+        if not self.include:
+            return True
+        return bool(self.include.search(torrent.title or "") or self.include.search(torrent.description or ""))
+
+    def match_exclude(self, torrent: Any) -> bool:
+        """
+        标题或描述是否符合排除规则，未配置时视为不符合
+        """
+        if not self.exclude:
+            return False
+        return bool(self.exclude.search(torrent.title or "") or self.exclude.search(torrent.description or ""))
+
+
+class BrushTaskIndex:
+    """
+    刷流任务索引
+    用于在一批种子的刷流条件校验中以集合查找替代对全部任务的线性遍历
+    """
+
+    def __init__(self, torrent_tasks: Dict[str, dict]):
+        # 站点+标题
+        self.titles: Set[str] = set()
+        # 站点+详情地址
+        self.page_urls: Set[str] = set()
+        # 尚未下载完成的任务标题 -> 站点
+        self.unfinished_titles: Dict[str, Set[str]] = {}
+        for task in torrent_tasks.values():
+            self.add(task)
+
+    def add(self, task: dict):
+        """
+        加入新的任务
+        """
+        site_name = f"{task.get('site_name')}"
+        title = f"{task.get('title')}"
+        self.titles.add(f"{site_name}{title}")
+        self.page_urls.add(f"{site_name}{task.get('page_url')}")
+        if not task.get("seed_time"):
+            self.unfinished_titles.setdefault(title, set()).add(site_name)
+
+    def has_title(self, site_name: str, title: str) -> bool:
+        return f"{site_name}{title}" in self.titles
+
+    def has_page_url(self, site_name: str, page_url: str) -> bool:
+        return f"{site_name}{page_url}" in self.page_urls
+
+    def has_unfinished_on_other_site(self, site_name: str, title: str) -> bool:
+        """
+        其他站点是否存在尚未下载完成的相同标题任务
+        """
+        sites = self.unfinished_titles.get(title)
+        return bool(sites) and any(site != site_name for site in sites)
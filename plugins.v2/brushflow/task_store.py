@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.log import logger
+
+
+class BrushTaskStore:
+    """
+    刷流任务存储
+    以种子Hash为主键逐行保存任务，每个周期只写入发生变化的记录，归档通过一次范围更新完成
+    """
+
+    def __init__(self, db_path: Path):
+        self._db_path = Path(db_path)
+        self._lock = threading.Lock()
+        # 最近一次加载或保存后各任务的序列化快照，用于判断任务是否发生变化
+        self._snapshots: Dict[str, str] = {}
+        self.__init_db()
+
+    @contextmanager
+    def __connect(self):
+        """
+        获取数据库连接，退出时自动提交或回滚
+        """
+        conn = sqlite3.connect(str(self._db_path), timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def __init_db(self):
+        """
+        初始化数据表及索引
+        """
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self.__connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    hash TEXT PRIMARY KEY,
+                    site INTEGER,
+                    site_name TEXT,
+                    size REAL NOT NULL DEFAULT 0,
+                    uploaded REAL NOT NULL DEFAULT 0,
+                    downloaded REAL NOT NULL DEFAULT 0,
+                    deleted INTEGER NOT NULL DEFAULT 0,
+                    deleted_time REAL,
+                    has_deleted_time INTEGER NOT NULL DEFAULT 0,
+                    archived INTEGER NOT NULL DEFAULT 0,
+                    data TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_site ON tasks (site)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deleted ON tasks (archived, deleted)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_deleted_time ON tasks (deleted_time)")
+
+    @staticmethod
+    def __serialize(task: dict) -> str:
+        return json.dumps(task, ensure_ascii=False, sort_keys=True, default=str)
+
+    @staticmethod
+    def __to_row(torrent_hash: str, task: dict, data: str, archived: bool = False) -> tuple:
+        """
+        将任务转换为数据行，索引列从任务中提取；
+        删除时间不是数字时只记录有删除时间，与原来一样不参与归档
+        """
+        deleted_time = task.get("deleted_time")
+        return (torrent_hash,
+                task.get("site"),
+                task.get("site_name"),
+                task.get("size") or 0,
+                task.get("uploaded") or 0,
+                task.get("downloaded") or 0,
+                1 if task.get("deleted") else 0,
+                deleted_time if isinstance(deleted_time, (int, float)) else None,
+                0 if deleted_time is None else 1,
+                1 if archived else 0,
+                data)
+
+    def __upsert(self, conn: sqlite3.Connection, rows: List[tuple]):
+        conn.executemany("""
+            INSERT INTO tasks (hash, site, site_name, size, uploaded, downloaded, deleted, deleted_time,
+                               has_deleted_time, archived, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(hash) DO UPDATE SET
+                site = excluded.site,
+                site_name = excluded.site_name,
+                size = excluded.size,
+                uploaded = excluded.uploaded,
+                downloaded = excluded.downloaded,
+                deleted = excluded.deleted,
+                deleted_time = excluded.deleted_time,
+                has_deleted_time = excluded.has_deleted_time,
+                archived = excluded.archived,
+                data = excluded.data
+        """, rows)
+
+    def is_empty(self) -> bool:
+        """
+        是否没有任何任务记录
+        """
+        with self._lock, self.__connect() as conn:
+            return conn.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is None
+
+    def import_tasks(self, torrent_tasks: Optional[Dict[str, dict]], archived_tasks: Optional[Dict[str, dict]]) -> int:
+        """
+        导入旧版本以插件数据保存的任务及归档数据，返回导入数量
+        """
+        rows = []
+        for torrent_hash, task in (archived_tasks or {}).items():
+            rows.append(self.__to_row(torrent_hash, task, self.__serialize(task), archived=True))
+        # 同一个Hash同时存在于任务及归档中时，以当前任务为准
+        for torrent_hash, task in (torrent_tasks or {}).items():
+            rows.append(self.__to_row(torrent_hash, task, self.__serialize(task)))
+        if not rows:
+            return 0
+        with self._lock, self.__connect() as conn:
+            self.__upsert(conn, rows)
+        return len(rows)
+
+    def load_tasks(self) -> Dict[str, dict]:
+        """
+        加载所有未归档的任务，并记录快照用于后续增量保存
+        """
+        with self._lock, self.__connect() as conn:
+            rows = conn.execute("SELECT hash, data FROM tasks WHERE archived = 0").fetchall()
+            self._snapshots = {torrent_hash: data for torrent_hash, data in rows}
+        return {torrent_hash: json.loads(data) for torrent_hash, data in rows}
+
+    def read_tasks(self) -> Dict[str, dict]:
+        """
+        只读加载所有未归档的任务，不影响增量保存的快照
+        """
+        with self._lock, self.__connect() as conn:
+            rows = conn.execute("SELECT hash, data FROM tasks WHERE archived = 0").fetchall()
+        return {torrent_hash: json.loads(data) for torrent_hash, data in rows}
+
+    def list_tasks(self, archived: bool = False) -> List[dict]:
+        """
+        只读查询任务列表，不影响增量保存的快照
+        """
+        with self._lock, self.__connect() as conn:
+            rows = conn.execute("SELECT data FROM tasks WHERE archived = ?", (1 if archived else 0,)).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def save_tasks(self, torrent_tasks: Dict[str, dict]) -> Tuple[int, int]:
+        """
+        增量保存任务，仅写入相对快照发生变化的记录，并删除已从任务中移除的记录
+        :return: 写入数量、删除数量
+        """
+        with self._lock:
+            rows = []
+            snapshots = {}
+            for torrent_hash, task in torrent_tasks.items():
+                data = self.__serialize(task)
+                snapshots[torrent_hash] = data
+                if self._snapshots.get(torrent_hash) != data:
+                    rows.append(self.__to_row(torrent_hash, task, data))
+            removed_hashes = [(torrent_hash,) for torrent_hash in self._snapshots.keys() - torrent_tasks.keys()]
+            if rows or removed_hashes:
+                with self.__connect() as conn:
+                    if rows:
+                        self.__upsert(conn, rows)
+                    if removed_hashes:
+                        conn.executemany("DELETE FROM tasks WHERE hash = ? AND archived = 0", removed_hashes)
+            self._snapshots = snapshots
+        if rows or removed_hashes:
+            logger.debug(f"刷流任务增量保存完成，写入 {len(rows)} 条，移除 {len(removed_hashes)} 条")
+        return len(rows), len(removed_hashes)
+
+    def archive_tasks(self, torrent_tasks: Dict[str, dict], deleted_before: float) -> List[str]:
+        """
+        归档已删除且删除时间早于指定时间或没有删除时间的任务，并从传入的任务中移除
+        :return: 已归档的种子Hash
+        """
+        # 先落盘当前周期的变更，保证范围更新基于最新状态
+        self.save_tasks(torrent_tasks)
+        condition = "archived = 0 AND deleted = 1 AND (has_deleted_time = 0 OR deleted_time < ?)"
+        with self._lock:
+            with self.__connect() as conn:
+                archived_hashes = [torrent_hash for torrent_hash, in
+                                   conn.execute(f"SELECT hash FROM tasks WHERE {condition}", (deleted_before,))]
+                if archived_hashes:
+                    conn.execute(f"UPDATE tasks SET archived = 1 WHERE {condition}", (deleted_before,))
+            for torrent_hash in archived_hashes:
+                self._snapshots.pop(torrent_hash, None)
+                torrent_tasks.pop(torrent_hash, None)
+        return archived_hashes
+
+    def get_archived_statistic(self) -> Dict[str, float]:
+        """
+        汇总归档任务的统计数据
+        """
+        with self._lock, self.__connect() as conn:
+            count, deleted, uploaded, downloaded = conn.execute(
+                "SELECT COUNT(*), SUM(deleted), SUM(uploaded), SUM(downloaded) FROM tasks WHERE archived = 1"
+            ).fetchone()
+        return {
+            "count": count or 0,
+            "deleted": deleted or 0,
+            "uploaded": uploaded or 0,
+            "downloaded": downloaded or 0
+        }
+
+    def clear(self):
+        """
+        清空所有任务及归档记录
+        """
+        with self._lock, self.__connect() as conn:
+            conn.execute("DELETE FROM tasks")
+            self._snapshots = {}
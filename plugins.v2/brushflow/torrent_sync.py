@@ -0,0 +1,119 @@
+import threading
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+from app.log import logger
+from app.modules.qbittorrent import Qbittorrent
+from app.modules.transmission import Transmission
+
+
+class TorrentSyncEngine:
+    """
+    下载器种子同步
+    在本地维护下载器种子镜像，qBittorrent 通过 sync/maindata 的 rid 增量同步，Transmission 通过字段差异比对，
+    每次同步返回自上次确认处理后发生变化的种子Hash
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 当前镜像对应的下载器名称
+        self._downloader_name: Optional[str] = None
+        # qBittorrent sync/maindata 的响应ID
+        self._rid = 0
+        # 种子镜像，Hash -> 种子
+        self._torrents: Dict[str, Any] = {}
+        # Transmission 种子字段快照，用于比对变化
+        self._fields: Dict[str, dict] = {}
+        # 尚未确认处理的变化种子Hash
+        self._pending: Set[str] = set()
+
+    def reset(self):
+        """
+        清空镜像，下次同步时进行全量同步
+        """
+        with self._lock:
+            self.__reset()
+
+    def __reset(self):
+        self._rid = 0
+        self._torrents = {}
+        self._fields = {}
+        self._pending = set()
+
+    def sync(self, downloader_name: str, downloader: Union[Qbittorrent, Transmission]) \
+            -> Tuple[Dict[str, Any], Set[str], bool]:
+        """
+        同步下载器种子
+        :return: 种子镜像（Hash -> 种子）、变化的种子Hash、是否出错
+        """
+        with self._lock:
+            if downloader_name != self._downloader_name:
+                self.__reset()
+                self._downloader_name = downloader_name
+            try:
+                if isinstance(downloader, Qbittorrent):
+                    changed = self.__sync_qbittorrent(downloader)
+                else:
+                    changed = self.__sync_transmission(downloader)
+            except Exception as e:
+                logger.error(f"同步下载器种子失败，将在下次同步时进行全量同步：{e}")
+                self.__reset()
+                return {}, set(), True
+            if changed is None:
+                return {}, set(), True
+            self._pending.update(changed)
+            # 已被移除的种子无需再处理
+            self._pending.intersection_update(self._torrents.keys())
+            return dict(self._torrents), set(self._pending), False
+
+    def mark_processed(self, torrent_hashes: Optional[Set[str]] = None):
+        """
+        确认变化的种子已处理完成，未指定时确认所有变化
+        """
+        with self._lock:
+            if torrent_hashes is None:
+                self._pending.clear()
+            else:
+                self._pending.difference_update(torrent_hashes)
+
+    def __sync_qbittorrent(self, downloader: Qbittorrent) -> Optional[Set[str]]:
+        """
+        根据 sync/maindata 增量合并种子镜像
+        """
+        if not downloader.qbc:
+            return None
+        maindata = downloader.qbc.sync_maindata(rid=self._rid)
+        if maindata.get("full_update"):
+            self._torrents = {}
+        changed = set()
+        for torrent_hash, delta in (maindata.get("torrents") or {}).items():
+            torrent = self._torrents.get(torrent_hash)
+            if torrent is None:
+                torrent = {"hash": torrent_hash}
+                self._torrents[torrent_hash] = torrent
+            torrent.update(delta)
+            changed.add(torrent_hash)
+        for torrent_hash in maindata.get("torrents_removed") or []:
+            self._torrents.pop(torrent_hash, None)
+        self._rid = maindata.get("rid", 0)
+        return changed
+
+    def __sync_transmission(self, downloader: Transmission) -> Optional[Set[str]]:
+        """
+        获取全量种子，并与上次同步的字段快照比对出变化的种子
+        """
+        torrents, error = downloader.get_torrents()
+        if error:
+            return None
+        changed = set()
+        latest_torrents = {}
+        latest_fields = {}
+        for torrent in torrents:
+            torrent_hash = torrent.hashString
+            fields = dict(torrent.fields)
+            if self._fields.get(torrent_hash) != fields:
+                changed.add(torrent_hash)
+            latest_torrents[torrent_hash] = torrent
+            latest_fields[torrent_hash] = fields
+        self._torrents = latest_torrents
+        self._fields = latest_fields
+        return changed
@@ -1,4 +1,7 @@
+import os
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, List, Dict, Tuple, Optional
@@ -12,6 +15,7 @@ from app.core.event import eventmanager, Event
 from app.helper.downloader import DownloaderHelper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.cleaninvalidseed.path_trie import PathTrie
 from app.schemas import NotificationType
 from app.schemas import ServiceInfo
 from app.schemas.types import EventType
@@ -26,7 +30,7 @@ class CleanInvalidSeed(_PluginBase):
     # 插件图标
     plugin_icon = "clean_a.png"
     # 插件版本
-    plugin_version = "2.0"
+    plugin_version = "2.2"
     # 插件作者
     plugin_author = "DzAvril"
     # 作者主页
@@ -55,6 +59,8 @@ class CleanInvalidSeed(_PluginBase):
     _exclude_labels = ""
     _more_logs = False
     _downloaders = []
+    # 并发获取种子Tracker的线程数
+    _tracker_workers = 8
     # 定时器
     _scheduler: Optional[BackgroundScheduler] = None
     _error_msg = [
@@ -338,6 +344,41 @@ class CleanInvalidSeed(_PluginBase):
             return []
         return all_torrents
 
+    def get_torrents_trackers(self, service, torrents: list) -> Dict[str, list]:
+        """
+        并发获取种子的Tracker状态，返回 种子hash -> Tracker列表。
+        主列表中tracker字段不为空（有Tracker正在工作）的种子无需检查，trackers_count为0的种子没有Tracker，均不发起请求
+        """
+        torrent_trackers = {}
+        pending = []
+        for torrent in torrents:
+            if torrent.get("tracker"):
+                continue
+            if torrent.get("trackers_count") == 0:
+                torrent_trackers[torrent.get("hash")] = []
+                continue
+            pending.append(torrent)
+        if not pending:
+            return torrent_trackers
+
+        def get_trackers(_torrent):
+            return _torrent.get("hash"), _torrent.trackers
+
+        start_time = time.time()
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self._tracker_workers) as executor:
+            futures = [executor.submit(get_trackers, torrent) for torrent in pending]
+            for future in as_completed(futures):
+                try:
+                    torrent_hash, trackers = future.result()
+                    torrent_trackers[torrent_hash] = trackers
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"获取种子Tracker失败：{e}")
+        logger.info(f"下载器:{service.name} 共 {len(torrents)} 个种子，获取 {len(pending)} 个种子的Tracker，"
+                    f"失败 {failed} 个，耗时 {time.time() - start_time:.2f} 秒")
+        return torrent_trackers
+
     def clean_invalid_seed(self):
         for service in self.service_info.values():
             downloader_name = service.name
@@ -347,6 +388,8 @@ class CleanInvalidSeed(_PluginBase):
                 continue
             logger.info(f"开始清理 {downloader_name} 无效做种...")
             all_torrents = self.get_all_torrents(service)
+            # 本次运行中各种子的Tracker，当前有Tracker在工作的种子不获取
+            torrent_trackers = self.get_torrents_trackers(service, all_torrents)
             temp_invalid_torrents = []
             # tracker未工作，但暂时不能判定为失效做种，需人工判断
             tracker_not_working_torrents = []
@@ -363,7 +406,12 @@ class CleanInvalidSeed(_PluginBase):
             error_msgs = self._error_msg + custom_msgs
             # 第一轮筛选出所有未工作的种子
             for torrent in all_torrents:
-                trackers = torrent.trackers
+                trackers = torrent_trackers.get(torrent.get("hash"))
+                if trackers is None:
+                    # 有Tracker正在工作的种子为有效做种，获取Tracker失败的种子本次不处理
+                    if torrent.get("tracker"):
+                        working_tracker_set.add(StringUtils.get_url_netloc(torrent.get("tracker"))[1])
+                    continue
                 is_invalid = True
                 is_tracker_working = False
                 for tracker in trackers:
@@ -400,7 +448,7 @@ class CleanInvalidSeed(_PluginBase):
             invalid_torrent_tuple_list = []
             deleted_torrent_tuple_list = []
             for torrent in temp_invalid_torrents:
-                trackers = torrent.trackers
+                trackers = torrent_trackers.get(torrent.get("hash")) or []
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
                         continue
@@ -472,7 +520,7 @@ class CleanInvalidSeed(_PluginBase):
 
             for index in range(len(tracker_not_working_torrents)):
                 torrent = tracker_not_working_torrents[index]
-                trackers = torrent.trackers
+                trackers = torrent_trackers.get(torrent.get("hash")) or []
                 tracker_msg = ""
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
@@ -483,7 +531,7 @@ class CleanInvalidSeed(_PluginBase):
 
             for index in range(len(invalid_torrents_exclude_categories)):
                 torrent = invalid_torrents_exclude_categories[index]
-                trackers = torrent.trackers
+                trackers = torrent_trackers.get(torrent.get("hash")) or []
                 tracker_msg = ""
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
@@ -494,7 +542,7 @@ class CleanInvalidSeed(_PluginBase):
 
             for index in range(len(invalid_torrents_exclude_labels)):
                 torrent = invalid_torrents_exclude_labels[index]
-                trackers = torrent.trackers
+                trackers = torrent_trackers.get(torrent.get("hash")) or []
                 tracker_msg = ""
                 for tracker in trackers:
                     if tracker.get("tier") == -1:
@@ -552,8 +600,8 @@ class CleanInvalidSeed(_PluginBase):
                             text=exclude_labels_msg,
                         )
             logger.info("检测无效做种任务结束")
-            if self._detect_invalid_files:
-                self.detect_invalid_files()
+        if self._detect_invalid_files:
+            self.detect_invalid_files()
 
     def detect_invalid_files(self):
         logger.info("开始检测未做种的无效源文件")
@@ -587,10 +635,8 @@ class CleanInvalidSeed(_PluginBase):
             mp_path, qb_path = path.split(":")
             source_path_map[mp_path] = qb_path
             source_paths.append(mp_path)
-        # 所有做种源文件路径
-        content_path_set = set()
-        for torrent in all_torrents:
-            content_path_set.add(torrent.content_path)
+        # 所有下载器的做种源文件路径索引
+        content_path_trie = PathTrie(torrent.content_path for torrent in all_torrents)
 
         message = "检测未做种无效源文件：\n"
         for source_path_str in source_paths:
@@ -621,12 +667,8 @@ class CleanInvalidSeed(_PluginBase):
                 qb_path = (str(source_file)).replace(
                     source_path_str, source_path_map[source_path_str]
                 )
-                # todo: 优化性能
-                is_exist = False
-                for content_path in content_path_set:
-                    if qb_path in content_path:
-                        is_exist = True
-                        break
+                # 该路径本身或其下级存在做种内容
+                is_exist = content_path_trie.contains_prefix(qb_path)
 
                 if not is_exist:
                     deleted_file_cnt += 1
@@ -656,10 +698,18 @@ class CleanInvalidSeed(_PluginBase):
         total_size = 0
         if path.is_file():
             return path.stat().st_size
-        # rglob 方法用于递归遍历所有文件和目录
-        for entry in path.rglob("*"):
-            if entry.is_file():
-                total_size += entry.stat().st_size
+        # scandir 遍历时复用目录项缓存的文件类型，减少stat调用
+        dirs = [path]
+        while dirs:
+            try:
+                with os.scandir(dirs.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.path)
+                        elif entry.is_file():
+                            total_size += entry.stat().st_size
+            except OSError as e:
+                logger.debug(f"获取目录大小出错：{e}")
         return total_size
 
     def get_form(self) -> Tuple[List[dict], Dict[str, Any]]:
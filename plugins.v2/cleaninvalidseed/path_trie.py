@@ -0,0 +1,48 @@
+from typing import Dict, Iterable, List
+
+
+class PathTrie:
+    """
+    路径前缀树
+    按路径层级保存做种内容路径，查询某个路径下是否有做种内容时只需按层级向下查找，耗时与路径深度成正比
+    """
+
+    def __init__(self, paths: Iterable[str] = None):
+        self._root: Dict[str, dict] = {}
+        self._size = 0
+        for path in paths or []:
+            self.add(path)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def split(path: str) -> List[str]:
+        """
+        将路径拆分为各级名称，兼容Windows路径分隔符，忽略末尾的分隔符
+        """
+        return str(path).replace("\\", "/").rstrip("/").split("/")
+
+    def add(self, path: str):
+        """
+        添加做种内容路径
+        """
+        if not path:
+            return
+        node = self._root
+        for part in self.split(path):
+            node = node.setdefault(part, {})
+        self._size += 1
+
+    def contains_prefix(self, path: str) -> bool:
+        """
+        路径本身或其下级是否存在做种内容
+        """
+        if not path:
+            return False
+        node = self._root
+        for part in self.split(path):
+            node = node.get(part)
+            if node is None:
+                return False
+        return True
@@ -1,7 +1,6 @@
-import hashlib
 import os
 import re
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pathlib import Path
 from threading import Event
@@ -11,7 +10,6 @@ import pytz
 import requests
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from bencode import bdecode, bencode
 
 from app.core.config import settings
 from app.core.event import eventmanager
@@ -21,6 +19,8 @@ from app.helper.sites import SitesHelper
 from app.helper.torrent import TorrentHelper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.crossseed.bencode_scanner import scan_torrent
+from app.plugins.crossseed.torrent_index import TorrentIndex
 from app.schemas import NotificationType, ServiceInfo
 from app.schemas.types import EventType
 from app.utils.string import StringUtils
@@ -96,19 +96,25 @@ class TorInfo:
     @staticmethod
     def from_data(data: bytes) -> Tuple[Optional[Any], Optional[str]]:
         try:
-            torrent = bdecode(data)
-            info = torrent["info"]
-            pieces = info["pieces"]
-            info_hash = hashlib.sha1(bencode(info)).hexdigest()
-            pieces_hash = hashlib.sha1(pieces).hexdigest()
+            info_hash, pieces_hash, announce = scan_torrent(data)
             local_tor = TorInfo(info_hash=info_hash, pieces_hash=pieces_hash)
             # 从种子中获取 announce, qb可能存在获取不到的情况，会存在于fastresume文件中
-            if "announce" in torrent:
-                local_tor.torrent_announce = torrent["announce"]
+            local_tor.torrent_announce = announce
             return local_tor, None
         except Exception as err:
             return None, str(err)
 
+    @staticmethod
+    def from_index(torrent_path: str, info: dict):
+        """
+        由种子索引中的记录生成本地种子信息
+        """
+        local_tor = TorInfo.local(torrent_path=torrent_path,
+                                  info_hash=info.get("info_hash"),
+                                  pieces_hash=info.get("pieces_hash"))
+        local_tor.torrent_announce = info.get("announce")
+        return local_tor
+
     def get_name_id_tag(self):
         return f"{self.site_name}:{self.torrent_id}"
 
@@ -119,22 +125,6 @@ class TorInfo:
 class CrossSeedHelper(object):
     _version = "0.2.0"
 
-    @staticmethod
-    def get_local_torrent_info(torrent_path: Path | str) -> Tuple[Optional[TorInfo], str]:
-        try:
-            if isinstance(torrent_path, Path):
-                torrent_data = torrent_path.read_bytes()
-            else:
-                with open(torrent_path, "rb") as f:
-                    torrent_data = f.read()
-            local_tor, err = TorInfo.from_data(torrent_data)
-            if not local_tor:
-                return None, err
-            local_tor.torrent_path = str(torrent_path)
-            return local_tor, ""
-        except Exception as err:
-            return None, str(err)
-
     @staticmethod
     def get_target_torrent(
             site: CSSiteConfig,
@@ -165,7 +155,6 @@ class CrossSeedHelper(object):
                     remote_torrent_infos.append(
                         TorInfo.remote(site.name, pieces_hash, torrent_id)
                     )
-            time.sleep(site.query_gap)
         except requests.exceptions.RequestException as e:
             return None, f"站点{site.name}请求失败：{e}"
         return remote_torrent_infos, None
@@ -179,7 +168,7 @@ class CrossSeed(_PluginBase):
     # 插件图标
     plugin_icon = "qingwa.png"
     # 插件版本
-    plugin_version = "3.0.1"
+    plugin_version = "3.0.4"
     # 插件作者
     plugin_author = "233@qingwa"
     # 作者主页
@@ -194,6 +183,8 @@ class CrossSeed(_PluginBase):
     # 私有属性
     _scheduler = None
     cross_helper = None
+    # 本地种子文件索引
+    _torrent_index: Optional[TorrentIndex] = None
     # 开关
     _enabled = False
     _cron = None
@@ -220,6 +211,8 @@ class CrossSeed(_PluginBase):
     _permanent_error_caches = []
     _torrentpaths = []
     _site_cs_infos = []
+    # 同时查询的站点数
+    _query_workers = 5
     # 辅种计数
     total = 0
     realtotal = 0
@@ -321,6 +314,7 @@ class CrossSeed(_PluginBase):
         # 启动定时任务 & 立即运行一次
         if self.get_state() or self._onlyonce:
             self.cross_helper = CrossSeedHelper()
+            self._torrent_index = TorrentIndex(db_path=self.get_data_path() / "torrent_index.db")
             self._scheduler = BackgroundScheduler(timezone=settings.TZ)
 
             if self._onlyonce:
@@ -772,6 +766,11 @@ class CrossSeed(_PluginBase):
         self.exist = 0
         self.fail = 0
         self.cached = 0
+        # 本次扫描到的种子文件及成功获取种子列表的种子目录，用于清理索引
+        torrent_paths = set()
+        listed_dirs = set()
+        # 未能获取种子列表的下载器的种子目录，不清理其中的索引
+        unlisted_dirs = set()
         # 扫描下载器辅种
         for idx, service in enumerate(self.service_infos.values()):
             downloader = service.name
@@ -781,9 +780,16 @@ class CrossSeed(_PluginBase):
             torrents = downloader_obj.get_completed_torrents()
             if torrents:
                 logger.info(f"下载器 {downloader} 已完成种子数：{len(torrents)}")
+                listed_dirs.add(str(Path(self._torrentpaths[idx])))
             else:
                 logger.info(f"下载器 {downloader} 没有已完成种子")
+                unlisted_dirs.add(str(Path(self._torrentpaths[idx])))
                 continue
+            # 批量读取种子文件信息，未变化的种子文件直接使用索引
+            service_torrent_paths = [Path(self._torrentpaths[idx]) / f"{self.__get_hash(torrent, service.type)}.torrent"
+                                     for torrent in torrents]
+            torrent_paths.update(str(path) for path in service_torrent_paths)
+            local_torrent_infos = self._torrent_index.get_torrent_infos(service_torrent_paths)
             hash_strs = []
             for torrent in torrents:
                 if self._event.is_set():
@@ -798,7 +804,8 @@ class CrossSeed(_PluginBase):
                 # 获取种子文件路径
                 torrent_path = Path(self._torrentpaths[idx]) / f"{hash_str}.torrent"
                 torrent_info = None
-                if not torrent_path.exists():
+                local_torrent_info = local_torrent_infos.get(str(torrent_path))
+                if not local_torrent_info:
                     if False and service.type == "qbittorrent":
                         # qb开启SQLite功能后将不再以hash命名的方式保存torrent文件
                         # TODO 导出功能需要qb4.5.0以上版本才支持
@@ -817,10 +824,11 @@ class CrossSeed(_PluginBase):
 
                 # 读取种子文件具体信息
                 if not torrent_info:
-                    torrent_info, err = self.cross_helper.get_local_torrent_info(torrent_path)
-                    if not torrent_info:
+                    info, err = local_torrent_info
+                    if not info:
                         logger.error(f"未能读取到种子文件具体信息：{torrent_path} {err}")
                         continue
+                    torrent_info = TorInfo.from_index(torrent_path=str(torrent_path), info=info)
 
                 # 用站点+pieces_hash记录该站点是否已经在该下载器中,需要从tracker补充站点名字
                 tracker_urls = set()
@@ -882,6 +890,9 @@ class CrossSeed(_PluginBase):
                 self.check_recheck()
             else:
                 logger.info("没有需要辅种的种子")
+        # 清理已不存在的种子索引，下载器离线或没有返回种子时保留其索引，避免下次重新解析全部种子文件
+        if listed_dirs - unlisted_dirs:
+            self._torrent_index.prune(torrent_paths, listed_dirs - unlisted_dirs)
         # 保存缓存
         self.__update_config()
         # 发送消息
@@ -971,73 +982,98 @@ class CrossSeed(_PluginBase):
         logger.info(f"去重后，总共需要辅种查询的种子数：{len(pieces_hash_set)}")
         pieces_hashes = list(pieces_hash_set)
 
-        # 分站点逐个批次辅种
-        # 逐个站点查询可辅种数据
-        chunk_size = 100
+        # 各站点并行查询可辅种数据，同一站点按请求间隔逐批查询，先返回的站点先开始辅种
+        site_configs = []
         for site_config in self._site_cs_infos:
             # 检查站点是否已经停用
             db_site = SiteOper().get(site_config.id)
             if db_site and not db_site.is_active:
                 logger.info(f"站点{site_config.name}已停用，跳过辅种")
                 continue
-            remote_tors: List[TorInfo] = []
-            total_size = len(pieces_hashes)
-            for i in range(0, len(pieces_hashes), chunk_size):
-                if self._event.is_set():
-                    logger.info("辅种服务停止")
-                    return
-                # 切片操作
-                chunk = pieces_hashes[i:i + chunk_size]
-                # 处理分组
-                chunk_tors, err_msg = self.cross_helper.get_target_torrent(site_config, chunk)
-                if not chunk_tors and err_msg:
-                    logger.info(
-                        f"查询站点{site_config.name}可辅种的信息出错 {err_msg},进度={i + 1}/{total_size}"
-                    )
-                else:
-                    logger.info(
-                        f"站点{site_config.name}本批次的可辅种/查询数={len(chunk_tors)}/{len(chunk)},进度={i + 1}/{total_size}"
-                    )
-                    remote_tors = remote_tors + chunk_tors
-
-            logger.info(f"站点{site_config.name}返回可以辅种的种子总数为{len(remote_tors)}")
-
-            # 去除已经下载过的种子
-            local_cnt = 0
-            not_local_tors = []
-            for tor_info in remote_tors:
-                if (
-                        tor_info
-                        and tor_info.site_name
-                        and tor_info.pieces_hash
-                        and tor_info.get_name_pieces_tag() in site_pieces_hash_set
-                ):
-                    local_cnt = local_cnt + 1
-                else:
-                    not_local_tors.append(tor_info)
-            logger.info(f"站点{site_config.name}正在做种或已经辅种过的种子数为{local_cnt}")
+            site_configs.append(site_config)
+        if not site_configs:
+            return
 
-            for tor_info in not_local_tors:
+        with ThreadPoolExecutor(max_workers=min(self._query_workers, len(site_configs)),
+                                thread_name_prefix="CrossSeed-Query") as executor:
+            futures = {executor.submit(self.__query_site_torrents, site_config, pieces_hashes): site_config
+                       for site_config in site_configs}
+            for future in as_completed(futures):
+                site_config = futures[future]
+                try:
+                    remote_tors = future.result()
+                except Exception as e:
+                    logger.error(f"查询站点{site_config.name}可辅种的信息出错 {e}")
+                    continue
                 if self._event.is_set():
                     logger.info("辅种服务停止")
                     return
-                if not tor_info:
-                    continue
-                if not tor_info.torrent_id or not tor_info.pieces_hash:
-                    continue
-                if tor_info.get_name_id_tag() in self._success_caches:
-                    logger.info(f"{tor_info.get_name_id_tag()} 已处理过辅种，跳过 ...")
-                    continue
-                if tor_info.get_name_id_tag() in self._error_caches or tor_info.get_name_id_tag() in self._permanent_error_caches:
-                    logger.info(f"种子 {tor_info.get_name_id_tag()} 辅种失败且已缓存，跳过 ...")
-                    continue
-                # 添加任务
-                self.__download_torrent(tor=tor_info, site_config=site_config,
-                                        service=service,
-                                        save_path=save_paths.get(tor_info.pieces_hash))
+                logger.info(f"站点{site_config.name}返回可以辅种的种子总数为{len(remote_tors)}")
+
+                # 去除已经下载过的种子
+                local_cnt = 0
+                not_local_tors = []
+                for tor_info in remote_tors:
+                    if (
+                            tor_info
+                            and tor_info.site_name
+                            and tor_info.pieces_hash
+                            and tor_info.get_name_pieces_tag() in site_pieces_hash_set
+                    ):
+                        local_cnt = local_cnt + 1
+                    else:
+                        not_local_tors.append(tor_info)
+                logger.info(f"站点{site_config.name}正在做种或已经辅种过的种子数为{local_cnt}")
+
+                for tor_info in not_local_tors:
+                    if self._event.is_set():
+                        logger.info("辅种服务停止")
+                        return
+                    if not tor_info:
+                        continue
+                    if not tor_info.torrent_id or not tor_info.pieces_hash:
+                        continue
+                    if tor_info.get_name_id_tag() in self._success_caches:
+                        logger.info(f"{tor_info.get_name_id_tag()} 已处理过辅种，跳过 ...")
+                        continue
+                    if tor_info.get_name_id_tag() in self._error_caches \
+                            or tor_info.get_name_id_tag() in self._permanent_error_caches:
+                        logger.info(f"种子 {tor_info.get_name_id_tag()} 辅种失败且已缓存，跳过 ...")
+                        continue
+                    # 添加任务
+                    self.__download_torrent(tor=tor_info, site_config=site_config,
+                                            service=service,
+                                            save_path=save_paths.get(tor_info.pieces_hash))
 
         logger.info(f"下载器 {service.name} 辅种完成")
 
+    def __query_site_torrents(self, site_config: CSSiteConfig, pieces_hashes: List[str]) -> List[TorInfo]:
+        """
+        分批查询站点可辅种的种子，在查询线程中执行，每批请求之间按站点配置的间隔等待
+        """
+        chunk_size = 100
+        remote_tors: List[TorInfo] = []
+        total_size = len(pieces_hashes)
+        for i in range(0, total_size, chunk_size):
+            if i and self._event.wait(site_config.query_gap):
+                break
+            if self._event.is_set():
+                break
+            # 切片操作
+            chunk = pieces_hashes[i:i + chunk_size]
+            # 处理分组
+            chunk_tors, err_msg = self.cross_helper.get_target_torrent(site_config, chunk)
+            if not chunk_tors and err_msg:
+                logger.info(
+                    f"查询站点{site_config.name}可辅种的信息出错 {err_msg},进度={i + 1}/{total_size}"
+                )
+            else:
+                logger.info(
+                    f"站点{site_config.name}本批次的可辅种/查询数={len(chunk_tors)}/{len(chunk)},进度={i + 1}/{total_size}"
+                )
+                remote_tors = remote_tors + chunk_tors
+        return remote_tors
+
     @staticmethod
     def __download(service: ServiceInfo, content: Union[bytes, str],
                    save_path: str) -> Optional[str]:
@@ -0,0 +1,131 @@
+import hashlib
+import mmap
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+# 需支持find及按下标取整数，memoryview不支持find，不作为输入
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+_DIGITS = frozenset(b"0123456789")
+
+
+class BencodeScanner:
+    """
+    种子文件扫描
+    直接在原始字节上定位info字典和pieces字符串的位置并计算哈希，不解码成Python对象，也不重新编码info，
+    info_hash与下载器一致，按原始字节计算
+    """
+
+    def __init__(self, data: Buffer):
+        self._data = data
+        self._size = len(self._data)
+
+    def __read_string(self, pos: int) -> Tuple[int, int]:
+        """
+        读取位于pos的字符串，返回内容的起止位置
+        """
+        colon = self._data.find(b":", pos)
+        if colon < 0:
+            raise ValueError(f"invalid string at {pos}")
+        length = int(self._data[pos:colon])
+        start = colon + 1
+        end = start + length
+        if length < 0 or end > self._size:
+            raise ValueError(f"string out of range at {pos}")
+        return start, end
+
+    def __skip(self, pos: int) -> int:
+        """
+        跳过位于pos的值，返回下一个值的位置
+        """
+        data, size, find = self._data, self._size, self._data.find
+        depth = 0
+        while True:
+            if pos >= size:
+                raise ValueError("unexpected end of data")
+            token = data[pos]
+            if 0x30 <= token <= 0x39:  # 字符串
+                colon = find(b":", pos)
+                if colon < 0:
+                    raise ValueError(f"invalid string at {pos}")
+                pos = colon + 1 + int(data[pos:colon])
+            elif token == 0x64 or token == 0x6C:  # d l
+                depth += 1
+                pos += 1
+            elif token == 0x65:  # e
+                if not depth:
+                    raise ValueError(f"unexpected end token at {pos}")
+                depth -= 1
+                pos += 1
+            elif token == 0x69:  # i
+                end = find(b"e", pos)
+                if end < 0:
+                    raise ValueError(f"invalid integer at {pos}")
+                pos = end + 1
+            else:
+                raise ValueError(f"invalid token at {pos}")
+            if not depth:
+                if pos > size:
+                    raise ValueError("string out of range")
+                return pos
+
+    def __find_keys(self, pos: int, *keys: bytes) -> dict:
+        """
+        在位于pos的字典中查找指定键，返回 键 -> 值的起止位置
+        """
+        if self._data[pos] != 0x64:
+            raise ValueError(f"expect dict at {pos}")
+        found = {}
+        pos += 1
+        while pos < self._size and self._data[pos] != 0x65:
+            key_start, key_end = self.__read_string(pos)
+            end = self.__skip(key_end)
+            key = self._data[key_start:key_end]
+            if key in keys:
+                found[key] = (key_end, end)
+            pos = end
+        if pos >= self._size:
+            raise ValueError("unexpected end of data")
+        return found
+
+    def scan(self) -> Tuple[str, str, Optional[str]]:
+        """
+        返回info_hash、pieces_hash及announce
+        """
+        if not self._size:
+            raise ValueError("empty torrent")
+        top = self.__find_keys(0, b"info", b"announce")
+        if b"info" not in top:
+            raise KeyError("info")
+        info_start, info_end = top[b"info"]
+        pieces = self.__find_keys(info_start, b"pieces").get(b"pieces")
+        if not pieces:
+            raise KeyError("pieces")
+        pieces_start, pieces_end = self.__read_string(pieces[0])
+        announce = None
+        if b"announce" in top and self._data[top[b"announce"][0]] in _DIGITS:
+            announce_start, announce_end = self.__read_string(top[b"announce"][0])
+            announce = self._data[announce_start:announce_end].decode("utf-8", errors="ignore")
+        view = memoryview(self._data)
+        try:
+            return (hashlib.sha1(view[info_start:info_end]).hexdigest(),
+                    hashlib.sha1(view[pieces_start:pieces_end]).hexdigest(),
+                    announce)
+        finally:
+            view.release()
+
+
+def scan_torrent(data: Buffer) -> Tuple[str, str, Optional[str]]:
+    """
+    扫描种子内容，返回info_hash、pieces_hash及announce
+    """
+    return BencodeScanner(data).scan()
+
+
+def scan_torrent_file(torrent_path: Union[Path, str]) -> Tuple[str, str, Optional[str]]:
+    """
+    以内存映射方式扫描种子文件，返回info_hash、pieces_hash及announce
+    """
+    with open(torrent_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return BencodeScanner(data).scan()
@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.log import logger
+from app.plugins.crossseed.bencode_scanner import scan_torrent_file
+
+
+def parse_torrent_file(torrent_path: str) -> Tuple[str, Optional[dict], Optional[str]]:
+    """
+    解析种子文件，返回种子路径、种子信息（info_hash、pieces_hash、announce）及错误信息，
+    在子进程中执行，需保持为模块级函数
+    """
+    try:
+        info_hash, pieces_hash, announce = scan_torrent_file(torrent_path)
+        return torrent_path, {
+            "info_hash": info_hash,
+            "pieces_hash": pieces_hash,
+            "announce": announce
+        }, None
+    except Exception as err:
+        return torrent_path, None, str(err)
+
+
+class TorrentIndex:
+    """
+    本地种子文件索引
+    以种子文件路径、修改时间及大小为键持久化种子的info_hash、pieces_hash和announce，
+    文件未变化时直接读取索引，新增或变化的文件使用进程池并行解析
+    """
+
+    def __init__(self, db_path: Path, workers: int = 4, parallel_threshold: int = 50):
+        """
+        :param db_path: 数据库文件路径
+        :param workers: 解析种子文件的进程数
+        :param parallel_threshold: 待解析文件数超过该值时才使用进程池
+        """
+        self._db_path = Path(db_path)
+        self._workers = workers
+        self._parallel_threshold = parallel_threshold
+        self._lock = threading.Lock()
+        self.__init_db()
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self._db_path), timeout=30)
+
+    def __init_db(self):
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.__connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS torrent_index (
+                    path TEXT PRIMARY KEY,
+                    mtime INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    info_hash TEXT NOT NULL,
+                    pieces_hash TEXT NOT NULL,
+                    announce TEXT
+                ) WITHOUT ROWID
+            """)
+        conn.close()
+
+    def get_torrent_infos(self, torrent_paths: Iterable[Path | str]) -> Dict[str, Tuple[Optional[dict], str]]:
+        """
+        批量获取种子文件信息，返回 种子路径 -> (种子信息, 错误信息)，文件不存在的路径不会返回
+        """
+        # 读取文件状态
+        stats: Dict[str, Tuple[int, int]] = {}
+        for torrent_path in torrent_paths:
+            try:
+                stat = os.stat(torrent_path)
+            except OSError:
+                continue
+            stats[str(torrent_path)] = (stat.st_mtime_ns, stat.st_size)
+        if not stats:
+            return {}
+
+        results: Dict[str, Tuple[Optional[dict], str]] = {}
+        with self._lock:
+            # 命中索引且文件未变化的直接返回
+            with self.__connect() as conn:
+                rows = self.__select(conn, list(stats.keys()))
+            conn.close()
+            for path, mtime, size, info_hash, pieces_hash, announce in rows:
+                if stats.get(path) == (mtime, size):
+                    results[path] = {
+                        "info_hash": info_hash,
+                        "pieces_hash": pieces_hash,
+                        "announce": announce
+                    }, ""
+            # 解析新增或变化的文件
+            pending = [path for path in stats if path not in results]
+            if not pending:
+                return results
+            logger.info(f"种子索引命中 {len(results)} 个，需要解析 {len(pending)} 个种子文件 ...")
+            records = []
+            for path, info, err in self.__parse(pending):
+                results[path] = info, err or ""
+                if info:
+                    mtime, size = stats[path]
+                    records.append((path, mtime, size, info.get("info_hash"),
+                                    info.get("pieces_hash"), info.get("announce")))
+            if records:
+                try:
+                    with self.__connect() as conn:
+                        conn.executemany("INSERT OR REPLACE INTO torrent_index "
+                                         "(path, mtime, size, info_hash, pieces_hash, announce) "
+                                         "VALUES (?, ?, ?, ?, ?, ?)", records)
+                    conn.close()
+                except Exception as e:
+                    logger.error(f"保存种子索引失败：{e}")
+        return results
+
+    @staticmethod
+    def __select(conn: sqlite3.Connection, paths: List[str]) -> list:
+        """
+        按路径分批查询，避免超过SQLite参数数量限制
+        """
+        rows = []
+        chunk_size = 500
+        for i in range(0, len(paths), chunk_size):
+            chunk = paths[i:i + chunk_size]
+            rows.extend(conn.execute(
+                "SELECT path, mtime, size, info_hash, pieces_hash, announce FROM torrent_index "
+                f"WHERE path IN ({','.join('?' * len(chunk))})", chunk).fetchall())
+        return rows
+
+    def __parse(self, paths: List[str]) -> List[Tuple[str, Optional[dict], Optional[str]]]:
+        """
+        解析种子文件，数量较多时使用进程池，进程池不可用时退回到当前进程解析
+        """
+        if len(paths) > self._parallel_threshold and self._workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=self._workers) as executor:
+                    return list(executor.map(parse_torrent_file, paths, chunksize=64))
+            except Exception as e:
+                logger.warn(f"使用进程池解析种子文件失败，改为逐个解析：{e}")
+        return [parse_torrent_file(path) for path in paths]
+
+    def prune(self, torrent_paths: Iterable[Path | str], torrent_dirs: Iterable[Path | str]) -> int:
+        """
+        删除给定目录中不在给定路径中的索引记录，其它目录的记录保留，返回删除数量
+        """
+        keep = {str(path) for path in torrent_paths}
+        dirs = {str(Path(torrent_dir)) for torrent_dir in torrent_dirs}
+        if not dirs:
+            return 0
+        with self._lock:
+            with self.__connect() as conn:
+                paths = [row[0] for row in conn.execute("SELECT path FROM torrent_index").fetchall()]
+                removed = [(path,) for path in paths if path not in keep and str(Path(path).parent) in dirs]
+                if removed:
+                    conn.executemany("DELETE FROM torrent_index WHERE path = ?", removed)
+            conn.close()
+        return len(removed)
+
+    def clear(self):
+        """
+        清空索引
+        """
+        with self._lock:
+            with self.__connect() as conn:
+                conn.execute("DELETE FROM torrent_index")
+            conn.close()
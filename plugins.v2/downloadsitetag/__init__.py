@@ -10,7 +10,7 @@ from apscheduler.triggers.cron import CronTrigger
 from app.core.config import settings
 from app.core.context import Context
 from app.core.event import eventmanager, Event
-from app.db.downloadhistory_oper import DownloadHistoryOper
+from app.db import SessionFactory
 from app.db.models.downloadhistory import DownloadHistory
 from app.helper.downloader import DownloaderHelper
 from app.log import logger
@@ -28,7 +28,7 @@ class DownloadSiteTag(_PluginBase):
     # 插件图标
     plugin_icon = "Youtube-dl_B.png"
     # 插件版本
-    plugin_version = "2.2"
+    plugin_version = "2.3"
     # 插件作者
     plugin_author = "叮叮当"
     # 作者主页
@@ -203,6 +203,8 @@ class DownloadSiteTag(_PluginBase):
         # JackettIndexers索引器支持多个站点, 如果不存在历史记录, 则通过tracker会再次附加其他站点名称
         indexers.append("JackettIndexers")
         indexers = set(indexers)
+        # tracker域名对应的站点信息
+        domain_sites: Dict[str, Optional[dict]] = {}
         tracker_mappings = {
             "chdbits.xyz": "ptchdbits.co",
             "agsvpt.trackers.work": "agsvpt.com",
@@ -224,14 +226,19 @@ class DownloadSiteTag(_PluginBase):
             # 按添加时间进行排序, 时间靠前的按大小和名称加入处理历史, 判定为原始种子, 其他为辅种
             torrents = self._torrents_sort(torrents=torrents, dl_type=service.type)
             logger.info(f"{self.LOG_TAG}下载器 {downloader} 分析种子信息中 ...")
-            downloadhis = DownloadHistoryOper()
+            # 一次性查询所有种子的下载历史
+            histories = self._get_histories_by_hashes(
+                [self._get_hash(torrent=torrent, dl_type=service.type) for torrent in torrents])
             siteshelper = SitesHelper()
+            # 需要设置的标签 -> 种子hash，分类 -> 种子hash
+            tag_groups: Dict[Tuple[str, ...], List[str]] = {}
+            cat_groups: Dict[str, List[str]] = {}
             for torrent in torrents:
                 try:
                     if self._event.is_set():
                         logger.info(
                             f"{self.LOG_TAG}停止服务")
-                        return
+                        break
                     # 获取已处理种子的key (size, name)
                     _key = self._torrent_key(torrent=torrent, dl_type=service.type)
                     # 获取种子hash
@@ -242,7 +249,7 @@ class DownloadSiteTag(_PluginBase):
                     torrent_tags = self._get_label(torrent=torrent, dl_type=service.type)
                     torrent_cat = self._get_category(torrent=torrent, dl_type=service.type)
                     # 提取种子hash对应的下载历史
-                    history: DownloadHistory = downloadhis.get_by_hash(_hash)
+                    history: DownloadHistory = histories.get(_hash)
                     if not history:
                         # 如果找到已处理种子的历史, 表明当前种子是辅种, 否则创建一个空DownloadHistory
                         if _key and _key in dispose_history:
@@ -269,7 +276,9 @@ class DownloadSiteTag(_PluginBase):
                                     break
                             else:
                                 domain = StringUtils.get_url_domain(tracker)
-                            site_info = siteshelper.get_indexer(domain)
+                            if domain not in domain_sites:
+                                domain_sites[domain] = siteshelper.get_indexer(domain)
+                            site_info = domain_sites.get(domain)
                             if site_info:
                                 history.torrent_site = site_info.get("name")
                                 break
@@ -307,15 +316,83 @@ class DownloadSiteTag(_PluginBase):
                     # 判断当前种子是否不需要修改
                     if not _cat and not _tags:
                         continue
-                    # 执行通用方法, 设置种子标签与分类
-                    self._set_torrent_info(service=service, _hash=_hash, _torrent=torrent, _tags=_tags, _cat=_cat,
-                                           _original_tags=torrent_tags)
+                    # 按标签与分类分组, 稍后批量设置
+                    if _tags:
+                        if service.type != "qbittorrent" and torrent_tags:
+                            # tr需要合并原始标签
+                            _tags = list(set(torrent_tags).union(set(_tags)))
+                        tag_groups.setdefault(tuple(sorted(_tags)), []).append(_hash)
+                    if _cat:
+                        cat_groups.setdefault(_cat, []).append(_hash)
+                    logger.info(
+                        f"{self.LOG_TAG}下载器: {service.name} 种子id: {_hash} {('  标签: ' + ','.join(_tags)) if _tags else ''} {('  分类: ' + _cat) if _cat else ''}")
                 except Exception as e:
                     logger.error(
                         f"{self.LOG_TAG}分析种子信息时发生了错误: {str(e)}")
+            # 批量设置种子标签与分类
+            self._set_torrents_info(service=service, tag_groups=tag_groups, cat_groups=cat_groups)
+            if self._event.is_set():
+                return
 
         logger.info(f"{self.LOG_TAG}执行完成")
 
+    @staticmethod
+    def _get_histories_by_hashes(hashes: List[str]) -> Dict[str, DownloadHistory]:
+        """
+        批量查询种子hash对应的下载历史, 同一hash存在多条记录时取最新的一条
+        """
+        histories: Dict[str, DownloadHistory] = {}
+        hashes = list({_hash for _hash in hashes if _hash})
+        chunk_size = 500
+        with SessionFactory() as db:
+            for i in range(0, len(hashes), chunk_size):
+                chunk = hashes[i:i + chunk_size]
+                for history in db.query(DownloadHistory) \
+                        .filter(DownloadHistory.download_hash.in_(chunk)) \
+                        .order_by(DownloadHistory.date.asc(), DownloadHistory.id.asc()) \
+                        .all():
+                    histories[history.download_hash] = history
+            db.expunge_all()
+        return histories
+
+    def _set_torrents_info(self, service: ServiceInfo, tag_groups: Dict[Tuple[str, ...], List[str]],
+                           cat_groups: Dict[str, List[str]]):
+        """
+        按标签与分类分组批量设置种子, 每组按批次调用一次下载器接口
+        """
+        if not service or not service.instance:
+            return
+        downloader_obj = service.instance
+        batch_size = 200
+        for tags, hashes in tag_groups.items():
+            for i in range(0, len(hashes), batch_size):
+                ids = hashes[i:i + batch_size]
+                try:
+                    if service.type == "qbittorrent":
+                        downloader_obj.set_torrents_tag(ids=ids, tags=list(tags))
+                    else:
+                        downloader_obj.set_torrent_tag(ids=ids, tags=list(tags))
+                except Exception as e:
+                    logger.error(f"{self.LOG_TAG}下载器 {service.name} 设置标签 {','.join(tags)} 失败：{str(e)}")
+        # 设置分类 <tr暂不支持>
+        if service.type != "qbittorrent":
+            return
+        for _cat, hashes in cat_groups.items():
+            for i in range(0, len(hashes), batch_size):
+                ids = hashes[i:i + batch_size]
+                # 尝试设置种子分类, 如果失败, 则创建再设置一遍
+                try:
+                    downloader_obj.qbc.torrents_set_category(category=_cat, torrent_hashes=ids)
+                except Exception as e:
+                    logger.warn(f"下载器 {service.name} 设置分类 {_cat} 失败：{str(e)}, 尝试创建分类再设置 ...")
+                    try:
+                        downloader_obj.qbc.torrents_createCategory(name=_cat)
+                        downloader_obj.qbc.torrents_set_category(category=_cat, torrent_hashes=ids)
+                    except Exception as err:
+                        logger.error(f"{self.LOG_TAG}下载器 {service.name} 设置分类 {_cat} 失败：{str(err)}")
+        if tag_groups or cat_groups:
+            logger.info(f"{self.LOG_TAG}下载器 {service.name} 批量设置标签 {len(tag_groups)} 组、分类 {len(cat_groups)} 组")
+
     def _genre_ids_get_cat(self, mtype, genre_ids=None):
         """
         根据genre_ids判断是否<动漫>分类
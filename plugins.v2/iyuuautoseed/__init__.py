@@ -1,8 +1,11 @@
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from threading import Event
-from typing import Any, Dict, List, Optional, Tuple
+from queue import Queue
+from threading import Event, Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -19,6 +22,8 @@ from app.helper.torrent import TorrentHelper
 from app.log import logger
 from app.plugins import _PluginBase
 from app.plugins.iyuuautoseed.iyuu_helper import IyuuHelper
+from app.plugins.iyuuautoseed.rate_limiter import TokenBucket
+from app.plugins.iyuuautoseed.seed_cache import SeedCache
 from app.schemas import NotificationType, ServiceInfo
 from app.schemas.types import EventType
 from app.utils.http import RequestUtils
@@ -33,7 +38,7 @@ class IYUUAutoSeed(_PluginBase):
     # 插件图标
     plugin_icon = "IYUU.png"
     # 插件版本
-    plugin_version = "2.14"
+    plugin_version = "2.17.2"
     # 插件作者
     plugin_author = "jxxghp,CKun"
     # 作者主页
@@ -81,12 +86,22 @@ class IYUUAutoSeed(_PluginBase):
     # 待校全种子hash清单
     _recheck_torrents = {}
     _is_recheck_running = False
-    # 辅种缓存，出错的种子不再重复辅种，可清除
-    _error_caches = []
-    # 辅种缓存，辅种成功的种子，可清除
-    _success_caches = []
-    # 辅种缓存，出错的种子不再重复辅种，且无法清除。种子被删除404等情况
-    _permanent_error_caches = []
+    # 辅种缓存，包括辅种成功、出错（有效期内不再重复辅种）及永久出错（种子被删除404等情况）的种子
+    _seed_cache: Optional[SeedCache] = None
+    # 出错缓存有效期（天）
+    _error_cache_ttl = 7
+    # 本次辅种开始时下载器中已有种子的Hash快照，下载器名称 -> Hash集合，获取失败时为None
+    _torrent_hashes: Dict[str, Optional[Set[str]]] = {}
+    # 种子文件并行下载的线程数，不同站点并行、同一站点串行
+    _download_workers = 5
+    # 每个站点种子文件下载的令牌桶速率（个/秒）及容量
+    _site_rate = 0.5
+    _site_burst = 2
+    # 站点域名 -> 令牌桶
+    _site_buckets: Dict[str, TokenBucket] = {}
+    # 本次辅种各站点种子文件下载统计
+    _site_stats: Dict[str, dict] = {}
+    _site_stats_lock = Lock()
     # 辅种计数
     total = 0
     realtotal = 0
@@ -117,9 +132,6 @@ class IYUUAutoSeed(_PluginBase):
             self._addhosttotag = config.get("addhosttotag")
             self._size = float(config.get("size")) if config.get("size") else 0
             self._clearcache = config.get("clearcache")
-            self._permanent_error_caches = [] if self._clearcache else config.get("permanent_error_caches") or []
-            self._error_caches = [] if self._clearcache else config.get("error_caches") or []
-            self._success_caches = [] if self._clearcache else config.get("success_caches") or []
 
             # 过滤掉已删除的站点
             all_sites = [site.id for site in SiteOper().list_order_by_pri()] + [site.get("id") for site in
@@ -127,6 +139,9 @@ class IYUUAutoSeed(_PluginBase):
             self._sites = [site_id for site_id in all_sites if site_id in self._sites]
             self.__update_config()
 
+        # 辅种缓存，没有配置时也需要初始化
+        self.__init_seed_cache(config=config or {})
+
         # 停止现有任务
         self.stop_service()
 
@@ -673,12 +688,27 @@ class IYUUAutoSeed(_PluginBase):
             "addhosttotag": self._addhosttotag,
             "auto_category": self._auto_category,
             "auto_start": self._auto_start,
-            "size": self._size,
-            "success_caches": self._success_caches,
-            "error_caches": self._error_caches,
-            "permanent_error_caches": self._permanent_error_caches
+            "size": self._size
         })
 
+    def __init_seed_cache(self, config: dict):
+        """
+        初始化辅种缓存，首次使用时迁移旧版本保存在插件配置中的缓存列表
+        """
+        if self._seed_cache:
+            self._seed_cache.flush()
+        self._seed_cache = SeedCache(db_path=self.get_data_path() / "seed_cache.db",
+                                     error_ttl=self._error_cache_ttl * 86400)
+        if self._clearcache:
+            self._seed_cache.clear()
+            return
+        count = self._seed_cache.import_hashes(config.get("success_caches"), SeedCache.SUCCESS) \
+            + self._seed_cache.import_hashes(config.get("error_caches"), SeedCache.ERROR) \
+            + self._seed_cache.import_hashes(config.get("permanent_error_caches"), SeedCache.PERMANENT_ERROR)
+        if count:
+            self._seed_cache.flush()
+            logger.info(f"已将 {count} 条辅种缓存从插件配置迁移至缓存文件")
+
     def auto_seed(self):
         """
         开始辅种
@@ -694,6 +724,9 @@ class IYUUAutoSeed(_PluginBase):
         self.exist = 0
         self.fail = 0
         self.cached = 0
+        # 每次辅种重新获取下载器种子快照
+        self._torrent_hashes = {}
+        self._site_stats = {}
         # 扫描下载器辅种
         for service in self.service_infos.values():
             downloader = service.name
@@ -713,7 +746,7 @@ class IYUUAutoSeed(_PluginBase):
                     return
                 # 获取种子hash
                 hash_str = self.__get_hash(torrent=torrent, dl_type=service.type)
-                if hash_str in self._error_caches or hash_str in self._permanent_error_caches:
+                if self._seed_cache.is_error(hash_str):
                     logger.info(f"种子 {hash_str} 辅种失败且已缓存，跳过 ...")
                     continue
                 save_path = self.__get_save_path(torrent=torrent, dl_type=service.type)
@@ -767,7 +800,9 @@ class IYUUAutoSeed(_PluginBase):
                 logger.info(f"没有需要辅种的种子")
 
         # 保存缓存
-        self.__update_config()
+        self._seed_cache.flush()
+        # 输出各站点下载速率
+        self.__log_site_stats()
         # 发送消息
         if self._notify:
             if self.success or self.fail:
@@ -847,6 +882,7 @@ class IYUUAutoSeed(_PluginBase):
         logger.info(f"下载器 {service.name} 开始查询辅种，数量：{len(hash_strs)} ...")
         # 下载器中的Hashs
         hashs = [item.get("hash") for item in hash_strs]
+        hash_set = set(hashs)
         # 每个Hash的保存目录
         save_paths = {}
         save_category = {}
@@ -864,7 +900,20 @@ class IYUUAutoSeed(_PluginBase):
             return
         else:
             logger.info(f"IYUU返回可辅种数：{len(seed_list)}")
-        # 遍历
+        # 添加任务 如果配置了主辅分离使用辅种下载器
+        seed_service = self.auto_service_info if self._auto_downloader else service
+        # 一次性判断本批可辅种的种子是否已在下载器中
+        seed_hashes = set()
+        for seed_info in seed_list.values():
+            seed_torrents = seed_info.get("torrent") if seed_info else None
+            if not isinstance(seed_torrents, list):
+                seed_torrents = [seed_torrents]
+            seed_hashes.update(seed.get("info_hash") for seed in seed_torrents
+                               if isinstance(seed, dict) and seed.get("info_hash"))
+        existing_hashes = self.__get_existing_hashes(torrent_hashes=seed_hashes - hash_set, service=seed_service)
+        # 遍历，先筛选出需要下载的种子
+        jobs = []
+        queued_hashes = set()
         for current_hash, seed_info in seed_list.items():
             if not seed_info:
                 continue
@@ -872,9 +921,6 @@ class IYUUAutoSeed(_PluginBase):
             if not isinstance(seed_torrents, list):
                 seed_torrents = [seed_torrents]
 
-            # 本次辅种成功的种子
-            success_torrents = []
-
             for seed in seed_torrents:
                 if not seed:
                     continue
@@ -882,37 +928,74 @@ class IYUUAutoSeed(_PluginBase):
                     continue
                 if not seed.get("sid") or not seed.get("info_hash"):
                     continue
-                if seed.get("info_hash") in hashs:
+                if seed.get("info_hash") in hash_set:
                     logger.info(f"{seed.get('info_hash')} 已在下载器中，跳过 ...")
                     continue
-                if seed.get("info_hash") in self._success_caches:
+                if seed.get("info_hash") in queued_hashes or self._seed_cache.is_success(seed.get("info_hash")):
                     logger.info(f"{seed.get('info_hash')} 已处理过辅种，跳过 ...")
                     continue
-                if seed.get("info_hash") in self._error_caches or seed.get("info_hash") in self._permanent_error_caches:
+                if self._seed_cache.is_error(seed.get("info_hash")):
                     logger.info(f"种子 {seed.get('info_hash')} 辅种失败且已缓存，跳过 ...")
                     continue
-                # 添加任务 如果配置了主辅分离使用辅种下载器
-                if self._auto_downloader:
-                    success = self.__download_torrent(seed=seed,
-                                                      service=self.auto_service_info,
-                                                      save_path=save_paths.get(current_hash),
-                                                      save_category=save_category.get(current_hash))
-                else:
-                    success = self.__download_torrent(seed=seed,
-                                                      service=service,
-                                                      save_path=save_paths.get(current_hash),
-                                                      save_category=save_category.get(current_hash))
-                if success:
-                    success_torrents.append(seed.get("info_hash"))
-
-            # 辅种成功的去重放入历史
-            if len(success_torrents) > 0:
-                self.__save_history(current_hash=current_hash,
-                                    downloader=service.name,
-                                    success_torrents=success_torrents)
+                job = self.__prepare_seed(seed=seed,
+                                          service=seed_service,
+                                          save_path=save_paths.get(current_hash),
+                                          save_category=save_category.get(current_hash),
+                                          exists=seed.get("info_hash") in existing_hashes)
+                if job:
+                    job["current_hash"] = current_hash
+                    jobs.append(job)
+                    queued_hashes.add(seed.get("info_hash"))
+
+        # 本次辅种成功的种子
+        success_torrents: Dict[str, List[str]] = {}
+        for job in self.__fetch_seed_torrents(jobs=jobs):
+            if self.__add_seed_torrent(job=job):
+                success_torrents.setdefault(job.get("current_hash"), []).append(job.get("seed").get("info_hash"))
+
+        # 辅种成功的去重放入历史
+        for current_hash, torrents in success_torrents.items():
+            self.__save_history(current_hash=current_hash,
+                                downloader=service.name,
+                                success_torrents=torrents)
 
         logger.info(f"下载器 {service.name} 辅种完成")
 
+    def __get_torrent_hashes(self, service: ServiceInfo) -> Optional[Set[str]]:
+        """
+        获取下载器中已有种子的Hash快照，每次辅种每个下载器只获取一次
+        """
+        if service.name not in self._torrent_hashes:
+            torrents, error = service.instance.get_torrents()
+            if error:
+                logger.warning(f"获取下载器 {service.name} 种子列表失败，将按批次查询种子是否存在")
+                self._torrent_hashes[service.name] = None
+            else:
+                self._torrent_hashes[service.name] = {self.__get_hash(torrent=torrent, dl_type=service.type)
+                                                      for torrent in torrents or []}
+        return self._torrent_hashes[service.name]
+
+    def __get_existing_hashes(self, torrent_hashes: Set[str], service: ServiceInfo) -> Set[str]:
+        """
+        批量判断种子是否已在下载器中，开启主辅分离时同时检查所有配置的下载器
+        """
+        if not torrent_hashes:
+            return set()
+        services = {service.name: service} if service else {}
+        if self._auto_downloader:
+            services.update(self.service_infos or {})
+        existing_hashes = set()
+        for check_service in services.values():
+            hashes = self.__get_torrent_hashes(check_service)
+            if hashes is not None:
+                existing_hashes |= torrent_hashes & hashes
+            else:
+                # 快照获取失败时，整批查询一次
+                torrents, _ = check_service.instance.get_torrents(ids=list(torrent_hashes))
+                existing_hashes |= {self.__get_hash(torrent=torrent, dl_type=check_service.type)
+                                    for torrent in torrents or []}
+        return existing_hashes
+
     def __save_history(self, current_hash: str, downloader: str, success_torrents: []):
         """
         [
@@ -1012,106 +1095,183 @@ class IYUUAutoSeed(_PluginBase):
         logger.error(f"不支持的下载器：{service.type}")
         return None
 
-    def __download_torrent(self, seed: dict, service: ServiceInfo, save_path: str, save_category: str):
+    def __prepare_seed(self, seed: dict, service: ServiceInfo, save_path: str, save_category: str,
+                       exists: bool = False) -> Optional[dict]:
         """
-        下载种子
-        torrent: {
-                    "sid": 3,
-                    "torrent_id": 377467,
-                    "info_hash": "a444850638e7a6f6220e2efdde94099c53358159"
-                }
+        校验可辅种的种子并生成下载任务
+        seed: {
+                "sid": 3,
+                "torrent_id": 377467,
+                "info_hash": "a444850638e7a6f6220e2efdde94099c53358159"
+            }
+        exists: 种子是否已在下载器中，由调用方批量判断
         """
-
-        def __is_special_site(url):
-            """
-            判断是否为特殊站点（是否需要添加https）
-            """
-            if "hdsky.me" in url:
-                return False
-            return True
-
         self.total += 1
         # 获取种子站点及下载地址模板
         site_url, download_page = self.iyuu_helper.get_torrent_url(seed.get("sid"))
         if not site_url or not download_page:
             # 加入缓存
-            self._error_caches.append(seed.get("info_hash"))
+            self._seed_cache.add(seed.get("info_hash"), SeedCache.ERROR)
             self.fail += 1
             self.cached += 1
-            return False
+            return None
         # 查询站点
         site_domain = StringUtils.get_url_domain(site_url)
         # 站点信息
-        sites_helper = SitesHelper()
-        site_info = sites_helper.get_indexer(site_domain)
+        site_info = SitesHelper().get_indexer(site_domain)
         if not site_info or not site_info.get('url'):
             logger.debug(f"没有维护种子对应的站点：{site_url}")
-            return False
+            return None
         if self._sites and site_info.get('id') not in self._sites:
             logger.info("当前站点不在选择的辅种站点范围，跳过 ...")
-            return False
+            return None
         self.realtotal += 1
-        # 查询hash值是否已经在下载器中
-        downloader_obj = service.instance
-        torrent_info, _ = downloader_obj.get_torrents(ids=[seed.get("info_hash")])
-        if torrent_info:
+        # hash值是否已经在下载器中
+        if exists:
             logger.info(f"{seed.get('info_hash')} 已在下载器中，跳过 ...")
             self.exist += 1
-            return False
+            return None
+        return {
+            "seed": seed,
+            "service": service,
+            "save_path": save_path,
+            "save_category": save_category,
+            "site_domain": site_domain,
+            "site_info": site_info,
+            "download_page": download_page
+        }
+
+    def __fetch_seed_torrents(self, jobs: List[dict]):
+        """
+        按站点并行下载种子文件，同一站点内按令牌桶限流串行下载，每下载完一个任务即通过队列返回给调用方处理
+        """
+        if not jobs:
+            return
+        site_jobs: Dict[str, List[dict]] = {}
+        for job in jobs:
+            site_jobs.setdefault(job.get("site_domain"), []).append(job)
+        done_queue: Queue = Queue()
+
+        def fetch_site(site_domain: str, items: List[dict]):
+            bucket = self._site_buckets.setdefault(site_domain,
+                                                   TokenBucket(rate=self._site_rate, capacity=self._site_burst))
+            for item in items:
+                try:
+                    if self._event.is_set() or not bucket.acquire(event=self._event):
+                        item["status"] = "stopped"
+                        continue
+                    start_time = time.time()
+                    self.__fetch_seed_torrent(job=item)
+                    self.__update_site_stat(site_name=item.get("site_info").get("name"),
+                                            elapsed=time.time() - start_time,
+                                            size=len(item.get("content") or b""),
+                                            success=bool(item.get("content")))
+                except Exception as e:
+                    # 单个任务出错不影响同站点的其它任务
+                    item["status"] = "error"
+                    item["error_msg"] = str(e)
+                finally:
+                    done_queue.put(item)
+
+        with ThreadPoolExecutor(max_workers=min(self._download_workers, len(site_jobs)),
+                                thread_name_prefix="IYUUAutoSeed-Download") as executor:
+            for site_domain, items in site_jobs.items():
+                executor.submit(fetch_site, site_domain, items)
+            # 每个任务都会放入队列一次，取满任务数即全部完成
+            for _ in range(len(jobs)):
+                yield done_queue.get()
+
+    def __fetch_seed_torrent(self, job: dict):
+        """
+        下载种子文件，在下载线程中执行，结果写入任务
+        """
+        seed = job.get("seed")
+        site_info = job.get("site_info")
         # 站点流控
-        check, checkmsg = sites_helper.check(site_domain)
+        check, checkmsg = SitesHelper().check(job.get("site_domain"))
         if check:
             logger.warn(checkmsg)
-            self.fail += 1
-            return False
+            job["status"] = "flow_control"
+            return
         # 下载种子
         torrent_url = self.__get_download_url(seed=seed,
                                               site=site_info,
-                                              base_url=download_page)
+                                              base_url=job.get("download_page"))
         if not torrent_url:
-            # 加入失败缓存
-            self._error_caches.append(seed.get("info_hash"))
-            self.fail += 1
-            self.cached += 1
-            return False
+            job["status"] = "no_url"
+            return
         # 强制使用Https
-        if __is_special_site(torrent_url):
+        if "hdsky.me" not in torrent_url:
             if "?" in torrent_url:
                 torrent_url += "&https=1"
             else:
                 torrent_url += "?https=1"
+        job["torrent_url"] = torrent_url
         # 下载种子文件
         _, content, _, _, error_msg = TorrentHelper().download_torrent(
             url=torrent_url,
             cookie=site_info.get("cookie"),
             ua=site_info.get("ua") or settings.USER_AGENT,
             proxy=site_info.get("proxy"))
-        if not content:
+        job["content"] = content
+        job["error_msg"] = error_msg
+        job["status"] = "downloaded" if content else "download_failed"
+
+    def __add_seed_torrent(self, job: dict) -> bool:
+        """
+        处理种子文件下载结果，添加下载任务并校验
+        """
+        seed = job.get("seed")
+        service = job.get("service")
+        site_info = job.get("site_info")
+        torrent_url = job.get("torrent_url")
+        status = job.get("status")
+        if status == "stopped":
+            return False
+        if status == "flow_control":
+            self.fail += 1
+            return False
+        if status == "error":
+            logger.error(f"下载种子文件出错：{job.get('error_msg')}")
+            self.fail += 1
+            return False
+        if status == "no_url":
+            # 加入失败缓存
+            self._seed_cache.add(seed.get("info_hash"), SeedCache.ERROR)
+            self.fail += 1
+            self.cached += 1
+            return False
+        if status != "downloaded":
             # 下载失败
             self.fail += 1
             # 加入失败缓存
+            error_msg = job.get("error_msg")
             if error_msg and ('无法打开链接' in error_msg or '触发站点流控' in error_msg):
-                self._error_caches.append(seed.get("info_hash"))
+                self._seed_cache.add(seed.get("info_hash"), SeedCache.ERROR)
             else:
                 # 种子不存在的情况
-                self._permanent_error_caches.append(seed.get("info_hash"))
+                self._seed_cache.add(seed.get("info_hash"), SeedCache.PERMANENT_ERROR)
             logger.error(f"下载种子文件失败：{torrent_url}")
             return False
         # 添加下载，辅种任务默认暂停
         logger.info(f"添加下载任务：{torrent_url} ...")
+        downloader_obj = service.instance
         download_id = self.__download(service=service,
-                                      content=content,
-                                      save_path=save_path,
-                                      save_category=save_category,
+                                      content=job.get("content"),
+                                      save_path=job.get("save_path"),
+                                      save_category=job.get("save_category"),
                                       site_name=site_info.get("name"))
         if not download_id:
             # 下载失败
             self.fail += 1
             # 加入失败缓存
-            self._error_caches.append(seed.get("info_hash"))
+            self._seed_cache.add(seed.get("info_hash"), SeedCache.ERROR)
             return False
         else:
             self.success += 1
+            # 更新下载器种子快照，避免同一种子被重复添加
+            if self._torrent_hashes.get(service.name) is not None:
+                self._torrent_hashes[service.name].add(download_id)
             if service.type == "qbittorrent":
                 if self._skipverify:
                     if self._auto_start:
@@ -1129,9 +1289,31 @@ class IYUUAutoSeed(_PluginBase):
             # 下载成功
             logger.info(f"成功添加辅种下载，站点：{site_info.get('name')}，种子链接：{torrent_url}")
             # 成功也加入缓存，有一些改了路径校验不通过的，手动删除后，下一次又会辅上
-            self._success_caches.append(seed.get("info_hash"))
+            self._seed_cache.add(seed.get("info_hash"), SeedCache.SUCCESS)
             return True
 
+    def __update_site_stat(self, site_name: str, elapsed: float, size: int, success: bool):
+        """
+        记录站点种子文件下载统计，在下载线程中调用
+        """
+        with self._site_stats_lock:
+            stat = self._site_stats.setdefault(site_name, {"count": 0, "success": 0, "size": 0, "elapsed": 0.0})
+            stat["count"] += 1
+            stat["success"] += 1 if success else 0
+            stat["size"] += size
+            stat["elapsed"] += elapsed
+
+    def __log_site_stats(self):
+        """
+        输出各站点种子文件下载速率
+        """
+        for site_name, stat in self._site_stats.items():
+            elapsed = stat.get("elapsed") or 0
+            rate = stat.get("count") / elapsed if elapsed else 0
+            logger.info(f"站点 {site_name} 下载种子文件 {stat.get('count')} 个，成功 {stat.get('success')} 个，"
+                        f"共 {StringUtils.str_filesize(stat.get('size'))}，耗时 {elapsed:.1f} 秒，"
+                        f"速率 {rate:.2f} 个/秒")
+
     def __add_recheck_torrents(self, service: ServiceInfo, download_id: str):
         # 追加校验任务
         logger.info(f"添加校验检查任务：{download_id} ...")
@@ -1379,6 +1561,8 @@ class IYUUAutoSeed(_PluginBase):
                     self._scheduler.shutdown()
                     self._event.clear()
                 self._scheduler = None
+            if self._seed_cache:
+                self._seed_cache.flush()
         except Exception as e:
             print(str(e))
 
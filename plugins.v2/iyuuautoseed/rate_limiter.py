@@ -0,0 +1,39 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    令牌桶限流
+    按固定速率补充令牌，允许短时间内突发不超过容量的请求
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        """
+        :param rate: 每秒补充的令牌数
+        :param capacity: 令牌桶容量
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, event: threading.Event = None) -> bool:
+        """
+        获取一个令牌，令牌不足时等待，等待期间收到退出事件返回False
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_seconds = (1 - self._tokens) / self._rate
+            if event:
+                if event.wait(wait_seconds):
+                    return False
+            else:
+                time.sleep(wait_seconds)
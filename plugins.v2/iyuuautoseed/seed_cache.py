@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.log import logger
+
+
+class SeedCache:
+    """
+    辅种缓存
+    以集合保存辅种成功、出错及永久出错的种子Hash，并记录加入时间，出错缓存超过有效期后自动失效，
+    数据持久化到独立的SQLite文件，每次辅种结束时只写入新增的记录
+    """
+
+    # 辅种成功
+    SUCCESS = "success"
+    # 出错，超过有效期后重新辅种
+    ERROR = "error"
+    # 永久出错，种子被删除404等情况
+    PERMANENT_ERROR = "permanent_error"
+
+    def __init__(self, db_path: Path, error_ttl: Optional[float] = None):
+        """
+        :param db_path: 数据库文件路径
+        :param error_ttl: 出错缓存的有效期（秒），为空时不过期
+        """
+        self._db_path = Path(db_path)
+        self._error_ttl = error_ttl
+        self._lock = threading.Lock()
+        # 缓存类型 -> Hash -> 加入时间
+        self._caches: Dict[str, Dict[str, float]] = {self.SUCCESS: {}, self.ERROR: {}, self.PERMANENT_ERROR: {}}
+        # 尚未持久化的记录
+        self._pending: List[Tuple[str, str, float]] = []
+        self.__init_db()
+        self.__load()
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self._db_path), timeout=30)
+
+    def __init_db(self):
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.__connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS seed_cache (
+                    hash TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    time REAL NOT NULL,
+                    PRIMARY KEY (hash, kind)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_seed_cache_kind_time ON seed_cache (kind, time)")
+        conn.close()
+
+    def __load(self):
+        """
+        加载缓存，并清理已过期的出错缓存
+        """
+        with self.__connect() as conn:
+            if self._error_ttl:
+                conn.execute("DELETE FROM seed_cache WHERE kind = ? AND time < ?",
+                             (self.ERROR, time.time() - self._error_ttl))
+            rows = conn.execute("SELECT hash, kind, time FROM seed_cache").fetchall()
+        conn.close()
+        for torrent_hash, kind, added_time in rows:
+            if kind in self._caches:
+                self._caches[kind][torrent_hash] = added_time
+
+    def __is_expired(self, kind: str, added_time: float) -> bool:
+        return kind == self.ERROR and bool(self._error_ttl) and time.time() - added_time > self._error_ttl
+
+    def contains(self, torrent_hash: str, kind: str) -> bool:
+        """
+        是否在指定类型的缓存中
+        """
+        if not torrent_hash:
+            return False
+        with self._lock:
+            added_time = self._caches[kind].get(torrent_hash)
+            if added_time is None:
+                return False
+            if self.__is_expired(kind, added_time):
+                del self._caches[kind][torrent_hash]
+                return False
+            return True
+
+    def is_success(self, torrent_hash: str) -> bool:
+        """
+        是否已辅种成功
+        """
+        return self.contains(torrent_hash, self.SUCCESS)
+
+    def is_error(self, torrent_hash: str) -> bool:
+        """
+        是否辅种出错（含永久出错）
+        """
+        return self.contains(torrent_hash, self.PERMANENT_ERROR) or self.contains(torrent_hash, self.ERROR)
+
+    def add(self, torrent_hash: str, kind: str):
+        """
+        加入缓存，需调用flush持久化
+        """
+        if not torrent_hash:
+            return
+        added_time = time.time()
+        with self._lock:
+            self._caches[kind][torrent_hash] = added_time
+            self._pending.append((torrent_hash, kind, added_time))
+
+    def import_hashes(self, hashes: Optional[Iterable[str]], kind: str) -> int:
+        """
+        导入旧版本保存在插件配置中的缓存列表，返回导入数量
+        """
+        count = 0
+        for torrent_hash in set(hashes or []):
+            self.add(torrent_hash, kind)
+            count += 1
+        return count
+
+    def flush(self) -> int:
+        """
+        持久化新增的记录，返回写入数量
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            with self.__connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO seed_cache (hash, kind, time) VALUES (?, ?, ?)", pending)
+            conn.close()
+        except Exception as e:
+            logger.error(f"保存辅种缓存失败：{e}")
+            with self._lock:
+                self._pending = pending + self._pending
+            return 0
+        return len(pending)
+
+    def clear(self):
+        """
+        清空所有缓存
+        """
+        with self._lock:
+            for cache in self._caches.values():
+                cache.clear()
+            self._pending = []
+        with self.__connect() as conn:
+            conn.execute("DELETE FROM seed_cache")
+        conn.close()
+
+    def count(self, kind: str) -> int:
+        with self._lock:
+            return len(self._caches[kind])
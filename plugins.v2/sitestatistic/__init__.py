@@ -1,4 +1,5 @@
 import gc
+import time
 import warnings
 from datetime import datetime, timedelta
 from threading import Lock
@@ -11,6 +12,7 @@ from app import schemas
 from app.chain.site import SiteChain
 from app.core.config import settings
 from app.core.event import eventmanager, Event
+from app.db import SessionFactory
 from app.db.models.siteuserdata import SiteUserData
 from app.db.site_oper import SiteOper
 from app.helper.sites import SitesHelper
@@ -32,7 +34,7 @@ class SiteStatistic(_PluginBase):
     # 插件图标
     plugin_icon = "statistic.png"
     # 插件版本
-    plugin_version = "1.9"
+    plugin_version = "1.9.1"
     # 插件作者
     plugin_author = "lightolly,jxxghp"
     # 作者主页
@@ -50,11 +52,18 @@ class SiteStatistic(_PluginBase):
     _dashboard_type: str = "today"
     _notify_type = ""
     _scheduler = None
+    # 站点数据缓存：最近统计日期、最近站点数据、上一次站点数据
+    _data_cache: Optional[Tuple[str, List[SiteUserData], List[SiteUserData]]] = None
+    _data_cache_time: float = 0
+    # 缓存有效期（秒），站点数据刷新时立即失效
+    _data_cache_ttl: int = 600
 
     def init_plugin(self, config: dict = None):
 
         # 停止现有任务
         self.stop_service()
+        # 清除站点数据缓存
+        self.__clear_data_cache()
 
         # 配置
         if config:
@@ -206,6 +215,8 @@ class SiteStatistic(_PluginBase):
         """
         站点数据刷新事件时发送消息
         """
+        # 站点数据已更新，清除缓存
+        self.__clear_data_cache()
         if not self._notify_type:
             return
         if event.event_data.get('site_id') != "*":
@@ -273,8 +284,30 @@ class SiteStatistic(_PluginBase):
             self.post_message(mtype=NotificationType.SiteMessage,
                               title="站点数据统计", text="\n".join(sorted_messages))
 
+    def __get_data(self) -> Tuple[str, List[SiteUserData], List[SiteUserData]]:
+        """
+        获取最近一次统计的日期、最近一次统计的站点数据、上一次的站点数据，结果缓存至站点数据刷新
+        """
+        with lock:
+            if self._data_cache and time.time() - self._data_cache_time < self._data_cache_ttl:
+                return self._data_cache
+        data = self.__load_data()
+        with lock:
+            SiteStatistic._data_cache = data
+            SiteStatistic._data_cache_time = time.time()
+        return data
+
+    @staticmethod
+    def __clear_data_cache():
+        """
+        清除站点数据缓存
+        """
+        with lock:
+            SiteStatistic._data_cache = None
+            SiteStatistic._data_cache_time = 0
+
     @staticmethod
-    def __get_data() -> Tuple[str, List[SiteUserData], List[SiteUserData]]:
+    def __load_data() -> Tuple[str, List[SiteUserData], List[SiteUserData]]:
         """
         获取最近一次统计的日期、最近一次统计的站点数据、上一次的站点数据
         如果上一次某个站点数据缺失，则 fallback 到该站点之前最近有数据的日期
@@ -285,37 +318,45 @@ class SiteStatistic(_PluginBase):
             return "", [], []
 
         # 过滤未启用或不存在的站点
-        site_domains = [site.domain for site in SiteOper().list_active()]
+        site_domains = {site.domain for site in SiteOper().list_active()}
         latest_data = [data for data in latest_data if data and data.domain in site_domains]
+        if not latest_data:
+            return "", [], []
 
         # 获取最新日期（用于显示）
         latest_day = max(data.updated_day for data in latest_data)
-        
+
         # 按上传量降序排序
         latest_data.sort(key=lambda x: x.upload or 0, reverse=True)
 
+        # 一次性查询所有站点前8天内的数据，按 (站点, 日期) 索引
+        current_days = {data.updated_day for data in latest_data}
+        start_day = (datetime.strptime(min(current_days), "%Y-%m-%d") - timedelta(days=7)).strftime("%Y-%m-%d")
+        end_day = max(current_days)
+        history_by_site_day: Dict[Tuple[str, str], SiteUserData] = {}
+        with SessionFactory() as db:
+            for data in db.query(SiteUserData) \
+                    .filter(SiteUserData.updated_day >= start_day, SiteUserData.updated_day < end_day) \
+                    .order_by(SiteUserData.id.asc()) \
+                    .all():
+                history_by_site_day[(data.name, data.updated_day)] = data
+            db.expunge_all()
+
         # 为每个站点查找对应的前一天数据
         previous_data = []
         for current_site in latest_data:
             site_name = current_site.name
-            current_day = current_site.updated_day
-            
-            # 计算该站点的前一天日期
-            previous_day_str = (datetime.strptime(current_day, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-            
+            current_day = datetime.strptime(current_site.updated_day, "%Y-%m-%d")
+
             # 获取前一天的数据
-            previous_data_list = SiteOper().get_userdata_by_date(previous_day_str)
-            previous_by_site = {data.name: data for data in previous_data_list}
-            site_prev = previous_by_site.get(site_name)
-            
-            # 如果前一天没有该站点数据，尝试查找更早的数据
+            previous_day_str = (current_day - timedelta(days=1)).strftime("%Y-%m-%d")
+            site_prev = history_by_site_day.get((site_name, previous_day_str))
+
+            # 如果前一天没有该站点数据，尝试查找更早的数据，最多回溯7天
             if not site_prev or site_prev.err_msg:
-                # 最多回溯7天，避免查询过多历史数据
                 for i in range(2, 8):
-                    fallback_date = (datetime.strptime(current_day, "%Y-%m-%d") - timedelta(days=i)).strftime("%Y-%m-%d")
-                    fallback_data_list = SiteOper().get_userdata_by_date(fallback_date)
-                    fallback_by_site = {data.name: data for data in fallback_data_list}
-                    candidate = fallback_by_site.get(site_name)
+                    fallback_date = (current_day - timedelta(days=i)).strftime("%Y-%m-%d")
+                    candidate = history_by_site_day.get((site_name, fallback_date))
                     if candidate and not candidate.err_msg:
                         site_prev = candidate
                         break
@@ -323,9 +364,6 @@ class SiteStatistic(_PluginBase):
             if site_prev:
                 previous_data.append(site_prev)
 
-        # 清理垃圾
-        gc.collect()
-
         return latest_day, latest_data, previous_data
 
     @staticmethod
@@ -965,6 +1003,7 @@ class SiteStatistic(_PluginBase):
         site_info = SitesHelper().get_indexer(domain)
         if site_info:
             site_data = SiteChain().refresh_userdata(site=site_info)
+            SiteStatistic.__clear_data_cache()
             if site_data:
                 return schemas.Response(
                     success=True,
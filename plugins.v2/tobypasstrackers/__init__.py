@@ -17,6 +17,7 @@ from app.db.site_oper import SiteOper
 from app.log import logger
 from app.plugins import _PluginBase
 from app.plugins.tobypasstrackers.dns_helper import DnsHelper
+from app.plugins.tobypasstrackers.ip_index import IPRangeIndex
 from app.schemas.types import EventType, NotificationType
 from app.utils.http import RequestUtils
 
@@ -29,7 +30,7 @@ class ToBypassTrackers(_PluginBase):
     # 插件图标
     plugin_icon = "Clash_A.png"
     # 插件版本
-    plugin_version = "1.4.1"
+    plugin_version = "1.4.3"
     # 插件作者
     plugin_author = "wumode"
     # 作者主页
@@ -525,26 +526,6 @@ class ToBypassTrackers(_PluginBase):
 
     @eventmanager.register(EventType.PluginAction)
     def update_ips(self):
-        def __is_ip_in_subnet(ip_input: str, su_bnet: str) -> bool:
-            """
-            Check if the given IP address is in the specified subnet.
-
-            :param ip_input: IP address as a string (e.g., '192.168.1.1')
-            :param su_bnet: Subnet in CIDR notation (e.g., '192.168.1.0/24')
-            :return: True if IP is in the subnet, False otherwise
-            """
-            ip_obj = ipaddress.ip_address(ip_input)
-            subnet_obj = ipaddress.ip_network(su_bnet, strict=False)
-            return ip_obj in subnet_obj
-
-        def __search_ip(ip, ips_list):
-            i = 0
-            for ip_range in ips_list:
-                if __is_ip_in_subnet(ip, ip_range):
-                    return i
-                i += 1
-            return -1
-
         def __exclude_ip_range(range_b: str, range_a: str):
             """
             Exclude IP range A from IP range B and return the remaining subranges.
@@ -572,12 +553,8 @@ class ToBypassTrackers(_PluginBase):
                     return
 
                 for address in addresses:
-                    has_flag = any(__is_ip_in_subnet(address, subnet) for subnet in ip_list_)
-                    if not has_flag:
-                        if dns_type_ == "AAAA":
-                            ip_list_.append(address)
-                        else:
-                            ip_list_.append(address)
+                    if address not in ip_list_:
+                        ip_list_.append(address)
                     logger.info(f"Resolving【{domain_name_map.get(domain_, domain_)}】{address} ({domain_})")
             except Exception as e:
                 logger.exception(f"处理 {domain_} 出错: {e}")
@@ -598,6 +575,9 @@ class ToBypassTrackers(_PluginBase):
         chnroute_lists_url = "https://ispip.clang.cn/all_cn.txt"
         ipv6_list = []
         ip_list = []
+        # 站点及自定义Tracker的地址，单独保存，不受排除网段影响
+        tracker_ipv6_list = []
+        tracker_ip_list = []
         domains = []
         success_msg = []
         failed_msg = []
@@ -636,19 +616,20 @@ class ToBypassTrackers(_PluginBase):
                 try:
                     socket.inet_pton(socket.AF_INET, custom_tracker)
                     if self._bypass_ipv4:
-                        ip_list.append(f"{custom_tracker}/32")
+                        tracker_ip_list.append(f"{custom_tracker}/32")
                 except socket.error:
                     try:
                         socket.inet_pton(socket.AF_INET6, custom_tracker)
                         if self._bypass_ipv6:
-                            ipv6_list.append(ipaddress.ip_network(f"{custom_tracker}/128", strict=False).compressed)
+                            tracker_ipv6_list.append(
+                                ipaddress.ip_network(f"{custom_tracker}/128", strict=False).compressed)
                     except socket.error:
                         domains.append(custom_tracker)
         v6_ips = []
         v4_ips = []
         asyncio.run(resolve_all(domains, v6_ips, v4_ips))
-        ipv6_list.extend([ipaddress.ip_network(f"{ad}/128", strict=False).compressed for ad in v6_ips])
-        ip_list.extend([f"{ad}/32" for ad in v4_ips])
+        tracker_ipv6_list.extend([ipaddress.ip_network(f"{ad}/128", strict=False).compressed for ad in v6_ips])
+        tracker_ip_list.extend([f"{ad}/32" for ad in v4_ips])
         for result in results:
             if results[result]:
                 success_msg.append(f"【{result}】 Trackers已被添加")
@@ -669,29 +650,40 @@ class ToBypassTrackers(_PluginBase):
                     except socket.error:
                         exempted_domains.append(exempted_domain)
 
-        asyncio.run(resolve_all(exempted_domains, exempted_ip, exempted_ipv6))
+        asyncio.run(resolve_all(exempted_domains, exempted_ipv6, exempted_ip))
+        # 建立网段索引，去除重复及被包含的网段；Tracker地址单独建立索引，避免被合并进大陆网段后随之移除
+        ip_index = IPRangeIndex(version=4)
+        ip_index.extend(ip_list)
+        tracker_ip_index = IPRangeIndex(version=4)
+        tracker_ip_index.extend(tracker_ip_list)
+        ipv6_index = IPRangeIndex(version=6)
+        ipv6_index.extend(ipv6_list)
+        tracker_ipv6_index = IPRangeIndex(version=6)
+        tracker_ipv6_index.extend(tracker_ipv6_list)
         for ip in exempted_ip:
-            index = __search_ip(ip, ip_list)
-            if index == -1:
+            # 优先排除大陆网段，不在大陆网段中时才排除Tracker地址
+            ip_larger = ip_index.pop_network(ip)
+            if not ip_larger:
+                tracker_ip_index.pop_network(ip)
                 continue
-            ip_larger = ip_list[index]
-            ip_list.pop(index)
-            length = int(ip_larger.split('/')[1])
+            length = ip_larger.prefixlen
             if length < 12:
-                remaining_ip = __exclude_ip_range(ip_larger, f"{ip}/{length + 8}")
-                ip_list.extend(remaining_ip)
+                remaining_ip = __exclude_ip_range(str(ip_larger), f"{ip}/{length + 8}")
+                ip_index.extend(remaining_ip)
         for ip in exempted_ipv6:
-            index = __search_ip(ip, ipv6_list)
-            if index == -1:
+            ip_larger = ipv6_index.pop_network(ip)
+            if not ip_larger:
+                tracker_ipv6_index.pop_network(ip)
                 continue
-            ip_larger = ipv6_list[index]
-            ipv6_list.pop(index)
-            length = int(ip_larger.split('/')[1])
+            length = ip_larger.prefixlen
             if length < 32:
-                remaining_ip = __exclude_ip_range(ip_larger, f"{ip}/{min(32, length + 8)}")
-                ipv6_list.extend(remaining_ip)
-        self.ipv4_txt = "\n".join(ip_list)
-        self.ipv6_txt = "\n".join(ipv6_list)
+                remaining_ip = __exclude_ip_range(str(ip_larger), f"{ip}/{min(32, length + 8)}")
+                ipv6_index.extend(remaining_ip)
+        # 合并Tracker地址后输出
+        ip_index.extend(tracker_ip_index.to_cidrs())
+        ipv6_index.extend(tracker_ipv6_index.to_cidrs())
+        self.ipv4_txt = "\n".join(ip_index.to_cidrs())
+        self.ipv6_txt = "\n".join(ipv6_index.to_cidrs())
         self.save_data("ipv4_txt", self.ipv4_txt)
         self.save_data("ipv6_txt", self.ipv6_txt)
         if self._notify:
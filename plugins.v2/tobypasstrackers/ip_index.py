@@ -0,0 +1,126 @@
+import ipaddress
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+class IPRangeIndex:
+    """
+    IP网段索引
+    将CIDR网段转换为按起始地址排序的整数区间，去除被其它网段包含的网段后以二分查找定位地址所在网段，
+    输出时合并相邻区间
+    """
+
+    def __init__(self, version: int = 4):
+        """
+        :param version: IP版本，4或6
+        """
+        self.version = version
+        # 待建立索引的网段：起始地址、前缀长度
+        self._pending: List[Tuple[int, int]] = []
+        # 互不重叠的网段，按起始地址排序
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._prefixes: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._starts) + len(self._pending)
+
+    def add(self, cidr: str) -> bool:
+        """
+        添加网段或单个地址，版本不符或格式错误时返回False
+        """
+        try:
+            network = ipaddress.ip_network(cidr.strip(), strict=False)
+        except ValueError:
+            return False
+        if network.version != self.version:
+            return False
+        self._pending.append((int(network.network_address), network.prefixlen))
+        return True
+
+    def extend(self, cidrs: Iterable[str]) -> int:
+        """
+        批量添加网段，返回添加成功的数量
+        """
+        return sum(1 for cidr in cidrs if cidr and self.add(cidr))
+
+    def build(self):
+        """
+        建立索引，去除重复及被包含的网段
+        """
+        if not self._pending:
+            return
+        bits = 32 if self.version == 4 else 128
+        networks = [(start, start + (1 << (bits - prefix)) - 1, prefix)
+                    for start, prefix in self._pending]
+        networks.extend(zip(self._starts, self._ends, self._prefixes))
+        self._pending = []
+        # 起始地址相同时较大的网段在前，被包含的网段一定排在包含它的网段之后
+        networks.sort(key=lambda item: (item[0], item[2]))
+        self._starts, self._ends, self._prefixes = [], [], []
+        last_end = -1
+        for start, end, prefix in networks:
+            if end <= last_end:
+                continue
+            self._starts.append(start)
+            self._ends.append(end)
+            self._prefixes.append(prefix)
+            last_end = end
+
+    def __find(self, ip: str) -> int:
+        self.build()
+        try:
+            address = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return -1
+        if address.version != self.version:
+            return -1
+        value = int(address)
+        index = bisect_right(self._starts, value) - 1
+        if index >= 0 and self._ends[index] >= value:
+            return index
+        return -1
+
+    def __contains__(self, ip: str) -> bool:
+        return self.__find(ip) >= 0
+
+    def find_network(self, ip: str) -> Optional[IPNetwork]:
+        """
+        查找地址所在的网段
+        """
+        index = self.__find(ip)
+        if index < 0:
+            return None
+        return ipaddress.ip_network((self._starts[index], self._prefixes[index]))
+
+    def pop_network(self, ip: str) -> Optional[IPNetwork]:
+        """
+        查找并移除地址所在的网段
+        """
+        index = self.__find(ip)
+        if index < 0:
+            return None
+        network = ipaddress.ip_network((self._starts[index], self._prefixes[index]))
+        del self._starts[index], self._ends[index], self._prefixes[index]
+        return network
+
+    def to_cidrs(self) -> List[str]:
+        """
+        合并相邻区间，输出CIDR网段列表
+        """
+        self.build()
+        address_class = ipaddress.IPv4Address if self.version == 4 else ipaddress.IPv6Address
+        cidrs = []
+        merged_start = merged_end = None
+        for start, end in zip(self._starts + [None], self._ends + [None]):
+            if start is not None and merged_end is not None and start <= merged_end + 1:
+                merged_end = max(merged_end, end)
+                continue
+            if merged_start is not None:
+                cidrs.extend(str(network) for network in
+                             ipaddress.summarize_address_range(address_class(merged_start),
+                                                               address_class(merged_end)))
+            merged_start, merged_end = start, end
+        return cidrs
@@ -1,6 +1,4 @@
-import re
 import threading
-import time
 from datetime import datetime, timedelta
 from typing import List, Tuple, Dict, Any, Optional
 
@@ -12,6 +10,7 @@ from app.core.config import settings
 from app.helper.downloader import DownloaderHelper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.torrentremover.rules import RemoveRules
 from app.schemas import NotificationType, ServiceInfo
 from app.utils.string import StringUtils
 
@@ -26,7 +25,7 @@ class TorrentRemover(_PluginBase):
     # 插件图标
     plugin_icon = "delete.jpg"
     # 插件版本
-    plugin_version = "2.2"
+    plugin_version = "2.3"
     # 插件作者
     plugin_author = "jxxghp"
     # 作者主页
@@ -60,6 +59,8 @@ class TorrentRemover(_PluginBase):
     _errorkeywords = None
     _torrentstates = None
     _torrentcategorys = None
+    # 每次请求下载器处理的种子数
+    _batch_size = 100
 
     def init_plugin(self, config: dict = None):
 
@@ -626,9 +627,18 @@ class TorrentRemover(_PluginBase):
         """
         定时删除下载器中的下载任务
         """
+        # 动作：日志及消息描述、是否删除、是否删除文件
+        actions = {
+            "pause": ("暂停种子", False, False),
+            "delete": ("删除种子", True, False),
+            "deletefile": ("删除种子及文件", True, True)
+        }
         for downloader in self._downloaders:
             try:
                 with lock:
+                    if self._action not in actions:
+                        continue
+                    action_desc, is_delete, delete_file = actions.get(self._action)
                     # 获取需删除种子列表
                     torrents = self.get_remove_torrents(downloader)
                     logger.info(f"自动删种任务 获取符合处理条件种子数 {len(torrents)}")
@@ -636,47 +646,27 @@ class TorrentRemover(_PluginBase):
                     downlader_obj = self.__get_downloader(downloader)
                     if self._action == "pause":
                         message_text = f"{downloader.title()} 共暂停{len(torrents)}个种子"
-                        for torrent in torrents:
-                            if self._event.is_set():
-                                logger.info(f"自动删种服务停止")
-                                return
-                            text_item = f"{torrent.get('name')} " \
-                                        f"来自站点：{torrent.get('site')} " \
-                                        f"大小：{StringUtils.str_filesize(torrent.get('size'))}"
-                            # 暂停种子
-                            downlader_obj.stop_torrents(ids=[torrent.get("id")])
-                            logger.info(f"自动删种任务 暂停种子：{text_item}")
-                            message_text = f"{message_text}\n{text_item}"
                     elif self._action == "delete":
                         message_text = f"{downloader.title()} 共删除{len(torrents)}个种子"
-                        for torrent in torrents:
-                            if self._event.is_set():
-                                logger.info(f"自动删种服务停止")
-                                return
-                            text_item = f"{torrent.get('name')} " \
-                                        f"来自站点：{torrent.get('site')} " \
-                                        f"大小：{StringUtils.str_filesize(torrent.get('size'))}"
-                            # 删除种子
-                            downlader_obj.delete_torrents(delete_file=False,
-                                                          ids=[torrent.get("id")])
-                            logger.info(f"自动删种任务 删除种子：{text_item}")
-                            message_text = f"{message_text}\n{text_item}"
-                    elif self._action == "deletefile":
+                    else:
                         message_text = f"{downloader.title()} 共删除{len(torrents)}个种子及文件"
-                        for torrent in torrents:
-                            if self._event.is_set():
-                                logger.info(f"自动删种服务停止")
-                                return
+                    # 分批处理
+                    for i in range(0, len(torrents), self._batch_size):
+                        if self._event.is_set():
+                            logger.info(f"自动删种服务停止")
+                            return
+                        chunk = torrents[i:i + self._batch_size]
+                        ids = [torrent.get("id") for torrent in chunk]
+                        if is_delete:
+                            downlader_obj.delete_torrents(delete_file=delete_file, ids=ids)
+                        else:
+                            downlader_obj.stop_torrents(ids=ids)
+                        for torrent in chunk:
                             text_item = f"{torrent.get('name')} " \
                                         f"来自站点：{torrent.get('site')} " \
                                         f"大小：{StringUtils.str_filesize(torrent.get('size'))}"
-                            # 删除种子
-                            downlader_obj.delete_torrents(delete_file=True,
-                                                          ids=[torrent.get("id")])
-                            logger.info(f"自动删种任务 删除种子及文件：{text_item}")
+                            logger.info(f"自动删种任务 {action_desc}：{text_item}")
                             message_text = f"{message_text}\n{text_item}"
-                    else:
-                        continue
                     if torrents and message_text and self._notify:
                         self.post_message(
                             mtype=NotificationType.SiteMessage,
@@ -686,97 +676,6 @@ class TorrentRemover(_PluginBase):
             except Exception as e:
                 logger.error(f"自动删种任务异常：{str(e)}")
 
-    def __get_qb_torrent(self, torrent: Any) -> Optional[dict]:
-        """
-        检查QB下载任务是否符合条件
-        """
-        # 完成时间
-        date_done = torrent.completion_on if torrent.completion_on > 0 else torrent.added_on
-        # 现在时间
-        date_now = int(time.mktime(datetime.now().timetuple()))
-        # 做种时间
-        torrent_seeding_time = date_now - date_done if date_done else 0
-        # 平均上传速度
-        torrent_upload_avs = torrent.uploaded / torrent_seeding_time if torrent_seeding_time else 0
-        # 大小 单位：GB
-        sizes = self._size.split('-') if self._size else []
-        minsize = float(sizes[0]) * 1024 * 1024 * 1024 if sizes else 0
-        maxsize = float(sizes[-1]) * 1024 * 1024 * 1024 if sizes else 0
-        # 分享率
-        if self._ratio and torrent.ratio <= float(self._ratio):
-            return None
-        # 做种时间 单位：小时
-        if self._time and torrent_seeding_time <= float(self._time) * 3600:
-            return None
-        # 文件大小
-        if self._size and (torrent.size >= int(maxsize) or torrent.size <= int(minsize)):
-            return None
-        if self._upspeed and torrent_upload_avs >= float(self._upspeed) * 1024:
-            return None
-        if self._pathkeywords and not re.findall(self._pathkeywords, torrent.save_path, re.I):
-            return None
-        if self._trackerkeywords and not re.findall(self._trackerkeywords, torrent.tracker, re.I):
-            return None
-        if self._torrentstates and torrent.state not in self._torrentstates:
-            return None
-        if self._torrentcategorys and (not torrent.category or torrent.category not in self._torrentcategorys):
-            return None
-        return {
-            "id": torrent.hash,
-            "name": torrent.name,
-            "site": StringUtils.get_url_sld(torrent.tracker),
-            "size": torrent.size
-        }
-
-    def __get_tr_torrent(self, torrent: Any) -> Optional[dict]:
-        """
-        检查TR下载任务是否符合条件
-        """
-        # 完成时间
-        date_done = torrent.date_done or torrent.date_added
-        # 现在时间
-        date_now = int(time.mktime(datetime.now().timetuple()))
-        # 做种时间
-        torrent_seeding_time = date_now - int(time.mktime(date_done.timetuple())) if date_done else 0
-        # 上传量
-        torrent_uploaded = torrent.ratio * torrent.total_size
-        # 平均上传速茺
-        torrent_upload_avs = torrent_uploaded / torrent_seeding_time if torrent_seeding_time else 0
-        # 大小 单位：GB
-        sizes = self._size.split('-') if self._size else []
-        minsize = float(sizes[0]) * 1024 * 1024 * 1024 if sizes else 0
-        maxsize = float(sizes[-1]) * 1024 * 1024 * 1024 if sizes else 0
-        # 分享率
-        if self._ratio and torrent.ratio <= float(self._ratio):
-            return None
-        if self._time and torrent_seeding_time <= float(self._time) * 3600:
-            return None
-        if self._size and (torrent.total_size >= int(maxsize) or torrent.total_size <= int(minsize)):
-            return None
-        if self._upspeed and torrent_upload_avs >= float(self._upspeed) * 1024:
-            return None
-        if self._pathkeywords and not re.findall(self._pathkeywords, torrent.download_dir, re.I):
-            return None
-        if self._trackerkeywords:
-            if not torrent.trackers:
-                return None
-            else:
-                tacker_key_flag = False
-                for tracker in torrent.trackers:
-                    if re.findall(self._trackerkeywords, tracker.get("announce", ""), re.I):
-                        tacker_key_flag = True
-                        break
-                if not tacker_key_flag:
-                    return None
-        if self._errorkeywords and not re.findall(self._errorkeywords, torrent.error_string, re.I):
-            return None
-        return {
-            "id": torrent.hashString,
-            "name": torrent.name,
-            "site": torrent.trackers[0].get("sitename") if torrent.trackers else "",
-            "size": torrent.total_size
-        }
-
     def get_remove_torrents(self, downloader: str):
         """
         获取自动删种任务种子
@@ -796,45 +695,35 @@ class TorrentRemover(_PluginBase):
         torrents, error_flag = downloader_obj.get_torrents(tags=tags or None)
         if error_flag:
             return []
+        # 编译删种条件
+        rules = RemoveRules(size=self._size,
+                            ratio=self._ratio,
+                            seed_time=self._time,
+                            upspeed=self._upspeed,
+                            pathkeywords=self._pathkeywords,
+                            trackerkeywords=self._trackerkeywords,
+                            errorkeywords=self._errorkeywords,
+                            torrentstates=self._torrentstates,
+                            torrentcategorys=self._torrentcategorys)
+        is_qbittorrent = downloader_config.type == "qbittorrent"
         # 处理种子
         for torrent in torrents:
-            if downloader_config.type == "qbittorrent":
-                item = self.__get_qb_torrent(torrent)
-            else:
-                item = self.__get_tr_torrent(torrent)
+            item = rules.match_qb(torrent) if is_qbittorrent else rules.match_tr(torrent)
             if not item:
                 continue
             remove_torrents.append(item)
         # 处理辅种
         if self._samedata and remove_torrents:
-            remove_ids = [t.get("id") for t in remove_torrents]
+            remove_ids = {t.get("id") for t in remove_torrents}
+            # 按名称和大小索引需删除的种子
+            remove_keys = {(t.get("name"), t.get("size")) for t in remove_torrents}
             remove_torrents_plus = []
-            for remove_torrent in remove_torrents:
-                name = remove_torrent.get("name")
-                size = remove_torrent.get("size")
-                for torrent in torrents:
-                    if downloader_config.type == "qbittorrent":
-                        plus_id = torrent.hash
-                        plus_name = torrent.name
-                        plus_size = torrent.size
-                        plus_site = StringUtils.get_url_sld(torrent.tracker)
-                    else:
-                        plus_id = torrent.hashString
-                        plus_name = torrent.name
-                        plus_size = torrent.total_size
-                        plus_site = torrent.trackers[0].get("sitename") if torrent.trackers else ""
-                    # 比对名称和大小
-                    if plus_name == name \
-                            and plus_size == size \
-                            and plus_id not in remove_ids:
-                        remove_torrents_plus.append(
-                            {
-                                "id": plus_id,
-                                "name": plus_name,
-                                "site": plus_site,
-                                "size": plus_size
-                            }
-                        )
+            for torrent in torrents:
+                plus_item = rules.qb_item(torrent) if is_qbittorrent else rules.tr_item(torrent)
+                # 比对名称和大小
+                if (plus_item.get("name"), plus_item.get("size")) in remove_keys \
+                        and plus_item.get("id") not in remove_ids:
+                    remove_torrents_plus.append(plus_item)
             if remove_torrents_plus:
                 remove_torrents.extend(remove_torrents_plus)
         return remove_torrents
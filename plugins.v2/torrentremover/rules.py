@@ -0,0 +1,137 @@
+import re
+import time
+from datetime import datetime
+from typing import Any, Optional, Pattern, Set
+
+from app.log import logger
+from app.utils.string import StringUtils
+
+
+class RemoveRules:
+    """
+    删种规则
+    每次执行前将删种条件预先编译为数值边界、正则及集合，避免在每个种子上重复解析配置
+    """
+
+    def __init__(self, size: Optional[str] = None, ratio: Any = None, seed_time: Any = None, upspeed: Any = None,
+                 pathkeywords: Optional[str] = None, trackerkeywords: Optional[str] = None,
+                 errorkeywords: Optional[str] = None, torrentstates: Optional[str] = None,
+                 torrentcategorys: Optional[str] = None):
+        # 大小 单位：GB，单个值时上下界相同
+        self.min_size = self.max_size = None
+        if size:
+            sizes = size.split('-')
+            self.min_size = int(float(sizes[0]) * 1024 * 1024 * 1024)
+            self.max_size = int(float(sizes[-1]) * 1024 * 1024 * 1024)
+        # 分享率
+        self.ratio = float(ratio) if ratio else None
+        # 做种时间 单位：小时
+        self.seed_time = float(seed_time) * 3600 if seed_time else None
+        # 平均上传速度 单位：KB/s
+        self.upspeed = float(upspeed) * 1024 if upspeed else None
+        # 路径、Tracker、错误信息关键字
+        self.pathkeywords = self.__compile(pathkeywords, "保存路径关键词")
+        self.trackerkeywords = self.__compile(trackerkeywords, "Tracker关键词")
+        self.errorkeywords = self.__compile(errorkeywords, "错误信息关键词")
+        # 任务状态、分类
+        self.torrentstates = self.__split(torrentstates)
+        self.torrentcategorys = self.__split(torrentcategorys)
+        # 本次执行的当前时间
+        self.date_now = int(time.mktime(datetime.now().timetuple()))
+
+    @staticmethod
+    def __compile(pattern: Optional[str], desc: str) -> Optional[Pattern]:
+        """
+        编译关键字正则，正则无效时返回一个不匹配任何内容的正则，避免误删
+        """
+        if not pattern:
+            return None
+        try:
+            return re.compile(pattern, re.I)
+        except re.error as e:
+            logger.error(f"自动删种{desc} {pattern} 不是有效的正则表达式，将不会匹配任何种子，错误详情: {e}")
+            return re.compile(r"(?!)")
+
+    @staticmethod
+    def __split(value: Optional[str]) -> Set[str]:
+        return {item.strip() for item in (value or "").split(",") if item.strip()}
+
+    def __check_common(self, ratio: float, size: int, seeding_time: float, upload_avs: float, save_path: str) -> bool:
+        """
+        检查下载器通用条件
+        """
+        if self.ratio is not None and ratio <= self.ratio:
+            return False
+        if self.seed_time is not None and seeding_time <= self.seed_time:
+            return False
+        if self.min_size is not None and (size >= self.max_size or size <= self.min_size):
+            return False
+        if self.upspeed is not None and upload_avs >= self.upspeed:
+            return False
+        if self.pathkeywords and not self.pathkeywords.search(save_path or ""):
+            return False
+        return True
+
+    def match_qb(self, torrent: Any) -> Optional[dict]:
+        """
+        检查QB下载任务是否符合条件
+        """
+        # 完成时间
+        date_done = torrent.completion_on if torrent.completion_on > 0 else torrent.added_on
+        # 做种时间
+        torrent_seeding_time = self.date_now - date_done if date_done else 0
+        # 平均上传速度
+        torrent_upload_avs = torrent.uploaded / torrent_seeding_time if torrent_seeding_time else 0
+        if not self.__check_common(ratio=torrent.ratio, size=torrent.size, seeding_time=torrent_seeding_time,
+                                   upload_avs=torrent_upload_avs, save_path=torrent.save_path):
+            return None
+        if self.trackerkeywords and not self.trackerkeywords.search(torrent.tracker or ""):
+            return None
+        if self.torrentstates and torrent.state not in self.torrentstates:
+            return None
+        if self.torrentcategorys and (not torrent.category or torrent.category not in self.torrentcategorys):
+            return None
+        return self.qb_item(torrent)
+
+    def match_tr(self, torrent: Any) -> Optional[dict]:
+        """
+        检查TR下载任务是否符合条件
+        """
+        # 完成时间
+        date_done = torrent.date_done or torrent.date_added
+        # 做种时间
+        torrent_seeding_time = self.date_now - int(time.mktime(date_done.timetuple())) if date_done else 0
+        # 上传量
+        torrent_uploaded = torrent.ratio * torrent.total_size
+        # 平均上传速度
+        torrent_upload_avs = torrent_uploaded / torrent_seeding_time if torrent_seeding_time else 0
+        if not self.__check_common(ratio=torrent.ratio, size=torrent.total_size, seeding_time=torrent_seeding_time,
+                                   upload_avs=torrent_upload_avs, save_path=torrent.download_dir):
+            return None
+        if self.trackerkeywords:
+            if not torrent.trackers:
+                return None
+            if not any(self.trackerkeywords.search(tracker.get("announce", "") or "")
+                       for tracker in torrent.trackers):
+                return None
+        if self.errorkeywords and not self.errorkeywords.search(torrent.error_string or ""):
+            return None
+        return self.tr_item(torrent)
+
+    @staticmethod
+    def qb_item(torrent: Any) -> dict:
+        return {
+            "id": torrent.hash,
+            "name": torrent.name,
+            "site": StringUtils.get_url_sld(torrent.tracker),
+            "size": torrent.size
+        }
+
+    @staticmethod
+    def tr_item(torrent: Any) -> dict:
+        return {
+            "id": torrent.hashString,
+            "name": torrent.name,
+            "site": torrent.trackers[0].get("sitename") if torrent.trackers else "",
+            "size": torrent.total_size
+        }
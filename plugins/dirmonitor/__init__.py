@@ -1,10 +1,13 @@
+import copy
 import datetime
 import re
 import shutil
 import threading
 import traceback
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Set
 
 import pytz
 from apscheduler.schedulers.background import BackgroundScheduler
@@ -21,16 +24,23 @@ from app.core.config import settings
 from app.core.context import MediaInfo
 from app.core.event import eventmanager, Event
 from app.core.metainfo import MetaInfoPath
+from app.db import SessionFactory
 from app.db.downloadhistory_oper import DownloadHistoryOper
+from app.db.models.transferhistory import TransferHistory
 from app.db.transferhistory_oper import TransferHistoryOper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.dirmonitor.event_coalescer import FileEventCoalescer
+from app.plugins.dirmonitor.exclude_matcher import ExcludeMatcher
+from app.plugins.dirmonitor.recognize_cache import RecognizeCache
 from app.schemas import NotificationType, TransferInfo
 from app.schemas.types import EventType, MediaType, SystemConfigKey
 from app.utils.string import StringUtils
 from app.utils.system import SystemUtils
 
 lock = threading.Lock()
+# 同一剧集的刮削会写入相同的剧集及季元数据，串行执行
+scrape_lock = threading.Lock()
 
 
 class FileMonitorHandler(FileSystemEventHandler):
@@ -60,7 +70,7 @@ class DirMonitor(_PluginBase):
     # 插件图标
     plugin_icon = "directory.png"
     # 插件版本
-    plugin_version = "2.4"
+    plugin_version = "2.5.2"
     # 插件作者
     plugin_author = "jxxghp"
     # 作者主页
@@ -98,6 +108,14 @@ class DirMonitor(_PluginBase):
     # 存储源目录转移方式
     _transferconf: Dict[str, Optional[str]] = {}
     _medias = {}
+    # 文件过滤规则
+    _matcher: Optional[ExcludeMatcher] = None
+    # 文件事件合并
+    _coalescer: Optional[FileEventCoalescer] = None
+    # 媒体识别结果缓存
+    _recognize_cache: Optional[RecognizeCache] = None
+    # 并发识别的线程数
+    _workers: int = 4
     # 退出事件
     _event = threading.Event()
 
@@ -110,6 +128,8 @@ class DirMonitor(_PluginBase):
         # 清空配置
         self._dirconf = {}
         self._transferconf = {}
+        self._matcher = None
+        self._recognize_cache = RecognizeCache()
 
         # 读取配置
         if config:
@@ -134,6 +154,10 @@ class DirMonitor(_PluginBase):
             # 追加入库消息统一发送服务
             self._scheduler.add_job(self.send_msg, trigger='interval', seconds=15)
 
+            # 文件事件合并后交给线程池处理
+            if self._enabled:
+                self._coalescer = FileEventCoalescer(handler=self.__handle_files, workers=self._workers)
+
             # 读取目录配置
             monitor_dirs = self._monitor_dirs.split("\n")
             if not monitor_dirs:
@@ -267,12 +291,25 @@ class DirMonitor(_PluginBase):
         立即运行一次，全量同步目录中所有文件
         """
         logger.info("开始全量同步监控目录 ...")
-        # 遍历所有监控目录
-        for mon_path in self._dirconf.keys():
-            # 遍历目录下所有文件
-            for file_path in SystemUtils.list_files(Path(mon_path), settings.RMT_MEDIAEXT):
-                self.__handle_file(event_path=str(file_path), mon_path=mon_path)
-        logger.info("全量同步监控目录完成！")
+        # 一次查询所有已整理的源路径，避免逐个文件查询数据库
+        transferred = self.__get_transferred_srcs()
+        total_count = skip_count = 0
+        with ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="dirmonitor-sync") as executor:
+            futures = []
+            # 遍历所有监控目录
+            for mon_path in self._dirconf.keys():
+                # 遍历目录下所有文件，跳过已整理的文件，其余按所在目录分组
+                groups = defaultdict(list)
+                for file_path in SystemUtils.list_files(Path(mon_path), settings.RMT_MEDIAEXT):
+                    total_count += 1
+                    if str(file_path) in transferred:
+                        skip_count += 1
+                        continue
+                    groups[str(file_path.parent)].append(str(file_path))
+                for event_paths in groups.values():
+                    futures.append(executor.submit(self.__handle_files, mon_path, event_paths, transferred))
+            wait(futures)
+        logger.info(f"全量同步监控目录完成！共 {total_count} 个文件，其中 {skip_count} 个已整理过")
 
     def event_handler(self, event, mon_path: str, text: str, event_path: str):
         """
@@ -285,142 +322,181 @@ class DirMonitor(_PluginBase):
         if not event.is_directory:
             # 文件发生变化
             logger.debug("文件%s：%s" % (text, event_path))
-            self.__handle_file(event_path=event_path, mon_path=mon_path)
+            if self._coalescer:
+                # 合并同一文件的多次事件，文件写入完成后再处理
+                self._coalescer.put(event_path=event_path, mon_path=mon_path)
+            else:
+                self.__handle_file(event_path=event_path, mon_path=mon_path)
+
+    def __get_matcher(self) -> ExcludeMatcher:
+        """
+        获取文件过滤规则，配置变化时重新编译
+        """
+        matcher = self._matcher
+        exclude_words = self.systemconfig.get(SystemConfigKey.TransferExcludeWords)
+        key = (self._exclude_keywords, tuple(exclude_words or []), tuple(settings.RMT_MEDIAEXT or []))
+        if not matcher or matcher.key != key:
+            matcher = ExcludeMatcher(exclude_keywords=self._exclude_keywords,
+                                     exclude_words=exclude_words,
+                                     media_exts=settings.RMT_MEDIAEXT)
+            self._matcher = matcher
+        return matcher
+
+    def __is_transferred(self, src: str, transferred: Optional[Set[str]] = None) -> bool:
+        """
+        是否已有整理记录，全量同步时使用预先查询的源路径集合
+        """
+        if transferred is not None:
+            return src in transferred
+        return bool(self.transferhis.get_by_src(src))
+
+    @staticmethod
+    def __get_transferred_srcs() -> Set[str]:
+        """
+        一次查询所有整理记录的源路径
+        """
+        with SessionFactory() as db:
+            return {src for src, in db.query(TransferHistory.src).filter(TransferHistory.src.isnot(None)).all()}
+
+    def __handle_files(self, mon_path: str, event_paths: List[str], transferred: Optional[Set[str]] = None):
+        """
+        同步同一目录下的一组文件，同一媒体只识别一次
+        :param mon_path: 监控目录
+        :param event_paths: 事件文件路径列表
+        :param transferred: 已整理的源路径集合
+        """
+        for event_path in event_paths:
+            if self._event.is_set():
+                return
+            self.__handle_file(event_path=event_path, mon_path=mon_path, transferred=transferred)
 
-    def __handle_file(self, event_path: str, mon_path: str):
+    def __handle_file(self, event_path: str, mon_path: str, transferred: Optional[Set[str]] = None):
         """
-        同步一个文件
+        同步一个文件，识别等耗时操作可并发执行，转移及写入历史记录串行执行
         :param event_path: 事件文件路径
         :param mon_path: 监控目录
+        :param transferred: 已整理的源路径集合，为空时逐个查询数据库
         """
         file_path = Path(event_path)
         try:
             if not file_path.exists():
                 return
-            # 全程加锁
-            with lock:
-                transfer_history = self.transferhis.get_by_src(event_path)
-                if transfer_history:
-                    logger.debug("文件已处理过：%s" % event_path)
-                    return
+            if self.__is_transferred(event_path, transferred):
+                logger.debug("文件已处理过：%s" % event_path)
+                return
 
-                # 回收站及隐藏的文件不处理
-                if event_path.find('/@Recycle/') != -1 \
-                        or event_path.find('/#recycle/') != -1 \
-                        or event_path.find('/.') != -1 \
-                        or event_path.find('/@eaDir') != -1:
-                    logger.debug(f"{event_path} 是回收站或隐藏的文件")
-                    return
+            # 回收站及隐藏的文件不处理
+            if event_path.find('/@Recycle/') != -1 \
+                    or event_path.find('/#recycle/') != -1 \
+                    or event_path.find('/.') != -1 \
+                    or event_path.find('/@eaDir') != -1:
+                logger.debug(f"{event_path} 是回收站或隐藏的文件")
+                return
 
-                # 命中过滤关键字不处理
-                if self._exclude_keywords:
-                    for keyword in self._exclude_keywords.split("\n"):
-                        if keyword and re.findall(keyword, event_path):
-                            logger.info(f"{event_path} 命中过滤关键字 {keyword}，不处理")
-                            return
-
-                # 整理屏蔽词不处理
-                transfer_exclude_words = self.systemconfig.get(SystemConfigKey.TransferExcludeWords)
-                if transfer_exclude_words:
-                    for keyword in transfer_exclude_words:
-                        if not keyword:
-                            continue
-                        if keyword and re.search(r"%s" % keyword, event_path, re.IGNORECASE):
-                            logger.info(f"{event_path} 命中整理屏蔽词 {keyword}，不处理")
-                            return
+            matcher = self.__get_matcher()
+            # 命中过滤关键字不处理
+            keyword = matcher.match_keyword(event_path)
+            if keyword:
+                logger.info(f"{event_path} 命中过滤关键字 {keyword}，不处理")
+                return
 
-                # 不是媒体文件不处理
-                if file_path.suffix.casefold() not in map(str.casefold, settings.RMT_MEDIAEXT):
-                    logger.debug(f"{event_path} 不是媒体文件")
-                    return
+            # 整理屏蔽词不处理
+            keyword = matcher.match_word(event_path)
+            if keyword:
+                logger.info(f"{event_path} 命中整理屏蔽词 {keyword}，不处理")
+                return
 
-                # 判断是不是蓝光目录
-                bluray_flag = False
-                if re.search(r"BDMV[/\\]STREAM", event_path, re.IGNORECASE):
-                    bluray_flag = True
-                    # 截取BDMV前面的路径
-                    blurray_dir = event_path[:event_path.find("BDMV")]
-                    file_path = Path(blurray_dir)
-                    logger.info(f"{event_path} 是蓝光目录，更正文件路径为：{str(file_path)}")
+            # 不是媒体文件不处理
+            if not matcher.is_media(file_path.suffix):
+                logger.debug(f"{event_path} 不是媒体文件")
+                return
 
-                # 查询历史记录，已转移的不处理
-                if self.transferhis.get_by_src(str(file_path)):
-                    logger.info(f"{file_path} 已整理过")
-                    return
+            # 判断是不是蓝光目录
+            bluray_flag = False
+            if re.search(r"BDMV[/\\]STREAM", event_path, re.IGNORECASE):
+                bluray_flag = True
+                # 截取BDMV前面的路径
+                blurray_dir = event_path[:event_path.find("BDMV")]
+                file_path = Path(blurray_dir)
+                logger.info(f"{event_path} 是蓝光目录，更正文件路径为：{str(file_path)}")
+
+            # 查询历史记录，已转移的不处理
+            if self.__is_transferred(str(file_path), transferred):
+                logger.info(f"{file_path} 已整理过")
+                return
 
-                # 元数据
-                file_meta = MetaInfoPath(file_path)
-                if not file_meta.name:
-                    logger.error(f"{file_path.name} 无法识别有效信息")
-                    return
+            # 元数据
+            file_meta = MetaInfoPath(file_path)
+            if not file_meta.name:
+                logger.error(f"{file_path.name} 无法识别有效信息")
+                return
 
-                # 判断文件大小
-                if self._size and float(self._size) > 0 and file_path.stat().st_size < float(self._size) * 1024 ** 3:
-                    logger.info(f"{file_path} 文件大小小于监控文件大小，不处理")
-                    return
+            # 判断文件大小
+            if self._size and float(self._size) > 0 and file_path.stat().st_size < float(self._size) * 1024 ** 3:
+                logger.info(f"{file_path} 文件大小小于监控文件大小，不处理")
+                return
 
-                # 查询转移目的目录
-                target: Path = self._dirconf.get(mon_path)
-                # 查询转移方式
-                transfer_type = self._transferconf.get(mon_path)
-
-                # 根据父路径获取下载历史
-                download_history = None
-                if bluray_flag:
-                    # 蓝光原盘，按目录名查询
-                    # FIXME 理论上DownloadHistory表中的path应该是全路径，但实际表中登记的数据只有目录名，暂按目录名查询
-                    download_history = self.downloadhis.get_by_path(file_path.name)
-                else:
-                    # 按文件全路径查询
-                    download_file = self.downloadhis.get_file_by_fullpath(str(file_path))
-                    if download_file:
-                        download_history = self.downloadhis.get_by_hash(download_file.download_hash)
-
-                # 识别媒体信息
-                if download_history and download_history.tmdbid:
-                    mediainfo: MediaInfo = self.mediaChain.recognize_media(mtype=MediaType(download_history.type),
-                                                                           tmdbid=download_history.tmdbid,
-                                                                           doubanid=download_history.doubanid)
-                else:
-                    mediainfo: MediaInfo = self.mediaChain.recognize_by_meta(file_meta)
-                if not mediainfo:
-                    logger.warn(f'未识别到媒体信息，标题：{file_meta.name}')
-                    # 新增转移成功历史记录
+            # 查询转移目的目录
+            target: Path = self._dirconf.get(mon_path)
+            # 查询转移方式
+            transfer_type = self._transferconf.get(mon_path)
+
+            # 根据父路径获取下载历史
+            download_history = None
+            if bluray_flag:
+                # 蓝光原盘，按目录名查询
+                # FIXME 理论上DownloadHistory表中的path应该是全路径，但实际表中登记的数据只有目录名，暂按目录名查询
+                download_history = self.downloadhis.get_by_path(file_path.name)
+            else:
+                # 按文件全路径查询
+                download_file = self.downloadhis.get_file_by_fullpath(str(file_path))
+                if download_file:
+                    download_history = self.downloadhis.get_by_hash(download_file.download_hash)
+
+            # 识别媒体信息，同一目录下相同媒体及季在缓存有效期内只识别一次
+            if download_history and download_history.tmdbid:
+                recognize_key = (download_history.type, download_history.tmdbid, file_meta.begin_season)
+            else:
+                recognize_key = (file_meta.type, file_meta.name, file_meta.year, file_meta.begin_season)
+            recognize_cache = self._recognize_cache
+            cached = recognize_cache.get(str(file_path.parent), recognize_key) if recognize_cache else None
+            if cached:
+                mediainfo, episodes_info = cached
+                mediainfo = copy.deepcopy(mediainfo)
+            else:
+                mediainfo, episodes_info = self.__recognize(file_meta=file_meta, download_history=download_history)
+                if mediainfo and recognize_cache:
+                    recognize_cache.put(str(file_path.parent), recognize_key, (mediainfo, episodes_info))
+            if not mediainfo:
+                logger.warn(f'未识别到媒体信息，标题：{file_meta.name}')
+                # 新增转移成功历史记录
+                with lock:
                     his = self.transferhis.add_fail(
                         src_path=file_path,
                         mode=transfer_type,
                         meta=file_meta
                     )
-                    if self._notify:
-                        self.post_message(
-                            mtype=NotificationType.Manual,
-                            title=f"{file_path.name} 未识别到媒体信息，无法入库！\n"
-                                  f"回复：```\n/redo {his.id} [tmdbid]|[类型]\n``` 手动识别转移。"
-                        )
-                    return
+                if self._notify:
+                    self.post_message(
+                        mtype=NotificationType.Manual,
+                        title=f"{file_path.name} 未识别到媒体信息，无法入库！\n"
+                              f"回复：```\n/redo {his.id} [tmdbid]|[类型]\n``` 手动识别转移。"
+                    )
+                return
 
-                # 如果未开启新增已入库媒体是否跟随TMDB信息变化则根据tmdbid查询之前的title
-                if not settings.SCRAP_FOLLOW_TMDB:
-                    transfer_history = self.transferhis.get_by_type_tmdbid(tmdbid=mediainfo.tmdb_id,
-                                                                           mtype=mediainfo.type.value)
-                    if transfer_history:
-                        mediainfo.title = transfer_history.title
-                logger.info(f"{file_path.name} 识别为：{mediainfo.type.value} {mediainfo.title_year}")
-
-                # 更新媒体图片
-                self.chain.obtain_images(mediainfo=mediainfo)
-
-                # 获取集数据
-                if mediainfo.type == MediaType.TV:
-                    episodes_info = self.tmdbchain.tmdb_episodes(tmdbid=mediainfo.tmdb_id,
-                                                                 season=file_meta.begin_season or 1)
-                else:
-                    episodes_info = None
+            logger.info(f"{file_path.name} 识别为：{mediainfo.type.value} {mediainfo.title_year}")
 
-                # 获取下载Hash
-                download_hash = None
-                if download_history:
-                    download_hash = download_history.download_hash
+            # 获取下载Hash
+            download_hash = None
+            if download_history:
+                download_hash = download_history.download_hash
+
+            # 转移及写入历史记录串行执行
+            with lock:
+                # 并发处理时可能已被其它任务整理
+                if self.transferhis.get_by_src(str(file_path)):
+                    logger.info(f"{file_path} 已整理过")
+                    return
 
                 # 转移
                 transferinfo: TransferInfo = self.chain.transfer(mediainfo=mediainfo,
@@ -479,27 +555,29 @@ class DirMonitor(_PluginBase):
                     transferinfo=transferinfo
                 )
 
-                # 刮削单个文件
-                if self._scrape:
+            # 刮削单个文件，不占用转移锁，刮削之间串行执行
+            if self._scrape:
+                with scrape_lock:
                     self.chain.scrape_metadata(path=transferinfo.target_path,
                                                mediainfo=mediainfo,
                                                transfer_type=transfer_type)
 
-                """
-                {
-                    "title_year season": {
-                        "files": [
-                            {
-                                "path":,
-                                "mediainfo":,
-                                "file_meta":,
-                                "transferinfo":
-                            }
-                        ],
-                        "time": "2023-08-24 23:23:23.332"
-                    }
+            """
+            {
+                "title_year season": {
+                    "files": [
+                        {
+                            "path":,
+                            "mediainfo":,
+                            "file_meta":,
+                            "transferinfo":
+                        }
+                    ],
+                    "time": "2023-08-24 23:23:23.332"
                 }
-                """
+            }
+            """
+            with lock:
                 # 发送消息汇总
                 media_list = self._medias.get(mediainfo.title_year + " " + file_meta.season) or {}
                 if media_list:
@@ -544,14 +622,15 @@ class DirMonitor(_PluginBase):
                     }
                 self._medias[mediainfo.title_year + " " + file_meta.season] = media_list
 
-                # 广播事件
-                self.eventmanager.send_event(EventType.TransferComplete, {
-                    'meta': file_meta,
-                    'mediainfo': mediainfo,
-                    'transferinfo': transferinfo
-                })
+            # 广播事件
+            self.eventmanager.send_event(EventType.TransferComplete, {
+                'meta': file_meta,
+                'mediainfo': mediainfo,
+                'transferinfo': transferinfo
+            })
 
-                # 移动模式删除空目录
+            # 移动模式删除空目录
+            with lock:
                 if transfer_type == "move":
                     for file_dir in file_path.parents:
                         if len(str(file_dir)) <= len(str(Path(mon_path))):
@@ -565,6 +644,37 @@ class DirMonitor(_PluginBase):
         except Exception as e:
             logger.error("目录监控发生错误：%s - %s" % (str(e), traceback.format_exc()))
 
+    def __recognize(self, file_meta: MetaInfoPath, download_history: Any) -> Tuple[Optional[MediaInfo], Any]:
+        """
+        识别媒体信息并获取图片及集数据
+        """
+        if download_history and download_history.tmdbid:
+            mediainfo: MediaInfo = self.mediaChain.recognize_media(mtype=MediaType(download_history.type),
+                                                                   tmdbid=download_history.tmdbid,
+                                                                   doubanid=download_history.doubanid)
+        else:
+            mediainfo: MediaInfo = self.mediaChain.recognize_by_meta(file_meta)
+        if not mediainfo:
+            return None, None
+
+        # 如果未开启新增已入库媒体是否跟随TMDB信息变化则根据tmdbid查询之前的title
+        if not settings.SCRAP_FOLLOW_TMDB:
+            transfer_history = self.transferhis.get_by_type_tmdbid(tmdbid=mediainfo.tmdb_id,
+                                                                   mtype=mediainfo.type.value)
+            if transfer_history:
+                mediainfo.title = transfer_history.title
+
+        # 更新媒体图片
+        self.chain.obtain_images(mediainfo=mediainfo)
+
+        # 获取集数据
+        if mediainfo.type == MediaType.TV:
+            episodes_info = self.tmdbchain.tmdb_episodes(tmdbid=mediainfo.tmdb_id,
+                                                         season=file_meta.begin_season or 1)
+        else:
+            episodes_info = None
+        return mediainfo, episodes_info
+
     def send_msg(self):
         """
         定时检查是否有媒体处理完，发送统一消息
@@ -1008,6 +1118,9 @@ class DirMonitor(_PluginBase):
                 except Exception as e:
                     print(str(e))
         self._observer = []
+        if self._coalescer:
+            self._coalescer.stop()
+            self._coalescer = None
         if self._scheduler:
             self._scheduler.remove_all_jobs()
             if self._scheduler.running:
@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Set, Tuple
+
+from app.log import logger
+
+
+class FileEventCoalescer:
+    """
+    文件事件合并
+    同一文件的多次事件合并为一次，文件大小在一段时间内不再变化后才处理；
+    同一目录下同时就绪的文件作为一组交给线程池处理，便于同一媒体只识别一次
+    """
+
+    def __init__(self, handler: Callable[[str, List[str]], None],
+                 workers: int = 4, settle: float = 3, interval: float = 1):
+        """
+        :param handler: 处理函数，参数为监控目录和同一目录下的文件路径列表
+        :param workers: 并发处理的线程数
+        :param settle: 文件大小保持不变多少秒后开始处理
+        :param interval: 检查文件大小的间隔秒数
+        """
+        self._handler = handler
+        self._settle = settle
+        self._interval = interval
+        self._lock = threading.Lock()
+        # 文件路径 -> [监控目录, 文件大小, 最后一次变化的时间]
+        self._pending: Dict[str, list] = {}
+        # 正在处理的文件，处理完成前收到的事件留到之后再处理
+        self._running: Set[str] = set()
+        self._stop_event = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dirmonitor")
+        self._thread = threading.Thread(target=self.__run, name="dirmonitor-coalescer", daemon=True)
+        self._thread.start()
+
+    def put(self, event_path: str, mon_path: str):
+        """
+        登记文件事件
+        """
+        with self._lock:
+            item = self._pending.get(event_path)
+            if item:
+                item[0] = mon_path
+                item[2] = time.monotonic()
+            else:
+                self._pending[event_path] = [mon_path, -1, time.monotonic()]
+
+    def stop(self):
+        """
+        停止处理，未就绪的事件直接丢弃
+        """
+        self._stop_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._pending.clear()
+
+    def __run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.__flush()
+            except Exception as e:
+                logger.error(f"目录监控事件处理出错：{str(e)}")
+
+    def __flush(self):
+        """
+        检查登记的文件，将大小已稳定的文件按目录分组提交处理
+        """
+        with self._lock:
+            pending = [path for path in self._pending if path not in self._running]
+        if not pending:
+            return
+        # 在锁外获取文件大小，避免阻塞事件登记
+        sizes = {}
+        for path in pending:
+            try:
+                sizes[path] = os.stat(path).st_size
+            except OSError:
+                sizes[path] = None
+        now = time.monotonic()
+        groups: Dict[Tuple[str, str], List[str]] = {}
+        with self._lock:
+            for path in pending:
+                item = self._pending.get(path)
+                if not item:
+                    continue
+                size = sizes.get(path)
+                if size is None:
+                    # 文件已不存在
+                    self._pending.pop(path, None)
+                    continue
+                if size != item[1]:
+                    item[1] = size
+                    item[2] = now
+                    continue
+                if now - item[2] < self._settle:
+                    continue
+                self._pending.pop(path, None)
+                self._running.add(path)
+                groups.setdefault((item[0], os.path.dirname(path)), []).append(path)
+        for (mon_path, _), paths in groups.items():
+            self._executor.submit(self.__handle, mon_path, sorted(paths))
+
+    def __handle(self, mon_path: str, paths: List[str]):
+        try:
+            self._handler(mon_path, paths)
+        except Exception as e:
+            logger.error(f"目录监控处理文件出错：{str(e)}")
+        finally:
+            with self._lock:
+                self._running.difference_update(paths)
@@ -0,0 +1,65 @@
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+from app.log import logger
+
+
+class ExcludeMatcher:
+    """
+    文件过滤规则
+    预先编译过滤关键字、整理屏蔽词及媒体文件扩展名，配置不变时重复使用
+    """
+
+    def __init__(self, exclude_keywords: Optional[str], exclude_words: Optional[Iterable[str]],
+                 media_exts: Iterable[str]):
+        """
+        :param exclude_keywords: 插件配置的过滤关键字，每行一个正则
+        :param exclude_words: 系统配置的整理屏蔽词
+        :param media_exts: 媒体文件扩展名
+        """
+        exclude_words = tuple(exclude_words or [])
+        media_exts = tuple(media_exts or [])
+        self.key = (exclude_keywords, exclude_words, media_exts)
+        self._keywords = self.__compile(exclude_keywords.split("\n") if exclude_keywords else [])
+        self._words = self.__compile(exclude_words, re.IGNORECASE)
+        self._media_exts = frozenset(ext.casefold() for ext in media_exts)
+
+    @staticmethod
+    def __compile(keywords: Iterable[str], flags: int = 0) -> List[Tuple[str, Pattern]]:
+        """
+        编译正则，无效的正则按普通文本匹配
+        """
+        patterns = []
+        for keyword in keywords:
+            if not keyword:
+                continue
+            try:
+                patterns.append((keyword, re.compile(keyword, flags)))
+            except re.error as e:
+                logger.warn(f"目录监控过滤规则 {keyword} 不是有效的正则表达式，按普通文本匹配：{str(e)}")
+                patterns.append((keyword, re.compile(re.escape(keyword), flags)))
+        return patterns
+
+    def match_keyword(self, path: str) -> Optional[str]:
+        """
+        返回命中的过滤关键字
+        """
+        for keyword, pattern in self._keywords:
+            if pattern.search(path):
+                return keyword
+        return None
+
+    def match_word(self, path: str) -> Optional[str]:
+        """
+        返回命中的整理屏蔽词
+        """
+        for word, pattern in self._words:
+            if pattern.search(path):
+                return word
+        return None
+
+    def is_media(self, suffix: str) -> bool:
+        """
+        是否为媒体文件扩展名
+        """
+        return suffix.casefold() in self._media_exts
@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class RecognizeCache:
+    """
+    媒体识别结果缓存
+    按文件所在目录及识别关键字缓存识别成功的结果，同一目录下陆续下载完成的剧集在有效期内只识别一次
+    """
+
+    def __init__(self, ttl: float = 300):
+        """
+        :param ttl: 识别结果的有效秒数
+        """
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # (目录, 识别关键字) -> (过期时间, 识别结果)
+        self._items: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+
+    def get(self, dir_path: str, key: Hashable) -> Optional[Any]:
+        """
+        获取未过期的识别结果
+        """
+        with self._lock:
+            item = self._items.get((dir_path, key))
+            if not item:
+                return None
+            if item[0] < time.monotonic():
+                self._items.pop((dir_path, key), None)
+                return None
+            return item[1]
+
+    def put(self, dir_path: str, key: Hashable, value: Any):
+        """
+        缓存识别结果，同时清理已过期的结果
+        """
+        now = time.monotonic()
+        with self._lock:
+            for cache_key in [k for k, (expires, _) in self._items.items() if expires < now]:
+                del self._items[cache_key]
+            self._items[(dir_path, key)] = (now + self._ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -1,10 +1,10 @@
 import datetime
+import itertools
 import json
 import os
-import re
 import time
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, Iterator
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -18,6 +18,8 @@ from app.log import logger
 from app.modules.emby import Emby
 from app.modules.jellyfin import Jellyfin
 from app.plugins import _PluginBase
+from app.plugins.mediasyncdel.log_tailer import LogTailer, parse_deleted_media, EMBY_PATTERN, EMBY_KEYWORD, \
+    JELLYFIN_PATTERN, JELLYFIN_KEYWORD
 from app.schemas.types import NotificationType, EventType, MediaType, MediaImageType
 
 
@@ -29,7 +31,7 @@ class MediaSyncDel(_PluginBase):
     # 插件图标
     plugin_icon = "mediasyncdel.png"
     # 插件版本
-    plugin_version = "1.7.1"
+    plugin_version = "1.7.2"
     # 插件作者
     plugin_author = "thsrite"
     # 作者主页
@@ -955,6 +957,8 @@ class MediaSyncDel(_PluginBase):
         # 读取历史记录
         history = self.get_data('history') or []
         last_time = self.get_data("last_time") or None
+        # 各日志文件已读取到的位置
+        log_offsets = self.get_data("log_offsets") or {}
         del_medias = []
 
         # 媒体服务器类型，多个以,分隔
@@ -963,20 +967,16 @@ class MediaSyncDel(_PluginBase):
         media_servers = settings.MEDIASERVER.split(',')
         for media_server in media_servers:
             if media_server == 'emby':
-                del_medias.extend(self.parse_emby_log(last_time))
+                del_medias.append(self.parse_emby_log(last_time, log_offsets.setdefault("emby", {})))
             elif media_server == 'jellyfin':
-                del_medias.extend(self.parse_jellyfin_log(last_time))
+                del_medias.append(self.parse_jellyfin_log(last_time, log_offsets.setdefault("jellyfin", {})))
             elif media_server == 'plex':
                 # TODO plex解析日志
                 return
 
-        if not del_medias:
-            logger.error("未解析到已删除媒体信息")
-            return
-
-        # 遍历删除
+        # 遍历删除，日志边解析边处理
         last_del_time = None
-        for del_media in del_medias:
+        for del_media in itertools.chain.from_iterable(del_medias):
             # 删除时间
             del_time = del_media.get("time")
             last_del_time = del_time or datetime.datetime.now()
@@ -999,7 +999,7 @@ class MediaSyncDel(_PluginBase):
                     self._exclude_path.split(",")):
                 logger.info(f"媒体路径 {media_path} 已被排除，暂不处理")
                 self.save_data("last_time", last_del_time)
-                return
+                continue
 
             # 处理路径映射 (处理同一媒体多分辨率的情况)
             if self._library_path:
@@ -1126,6 +1126,13 @@ class MediaSyncDel(_PluginBase):
                 "del_time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time()))
             })
 
+        # 保存日志读取位置
+        self.save_data("log_offsets", log_offsets)
+
+        if not last_del_time:
+            logger.info("未解析到新的已删除媒体信息")
+            return
+
         # 保存历史
         self.save_data("history", history)
 
@@ -1339,84 +1346,23 @@ class MediaSyncDel(_PluginBase):
         return handle_torrent_hashs
 
     @staticmethod
-    def parse_emby_log(last_time):
+    def __get_log_url(host: str, apikey: str, path: str) -> Optional[str]:
         """
-        获取emby日志列表、解析emby日志
+        拼装媒体服务器日志下载地址
         """
+        if not host or not apikey:
+            return None
+        if not host.endswith("/"):
+            host += "/"
+        if not host.startswith("http"):
+            host = "http://" + host
+        return f"{host}{path}&api_key={apikey}" if "?" in path else f"{host}{path}?api_key={apikey}"
 
-        def __parse_log(file_name: str, del_list: list):
-            """
-            解析emby日志
-            """
-            log_url = f"[HOST]System/Logs/{file_name}?api_key=[APIKEY]"
-            log_res = Emby().get_data(log_url)
-            if not log_res or log_res.status_code != 200:
-                logger.error("获取emby日志失败，请检查服务器配置")
-                return del_list
-
-            # 正则解析删除的媒体信息
-            pattern = r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}.\d{3}) Info App: Removing item from database, Type: (\w+), Name: (.*), Path: (.*), Id: (\d+)'
-            matches = re.findall(pattern, log_res.text)
-
-            # 循环获取媒体信息
-            for match in matches:
-                mtime = match[0]
-                # 排除已处理的媒体信息
-                if last_time and mtime < last_time:
-                    continue
-
-                mtype = match[1]
-                name = match[2]
-                path = match[3]
-
-                year = None
-                year_pattern = r'\(\d+\)'
-                year_match = re.search(year_pattern, path)
-                if year_match:
-                    year = year_match.group()[1:-1]
-
-                season = None
-                episode = None
-                if mtype == 'Episode' or mtype == 'Season':
-                    name_pattern = r"\/([\u4e00-\u9fa5]+)(?= \()"
-                    season_pattern = r"Season\s*(\d+)"
-                    episode_pattern = r"S\d+E(\d+)"
-                    name_match = re.search(name_pattern, path)
-                    season_match = re.search(season_pattern, path)
-                    episode_match = re.search(episode_pattern, path)
-
-                    if name_match:
-                        name = name_match.group(1)
-
-                    if season_match:
-                        season = season_match.group(1)
-                        if int(season) < 10:
-                            season = f'S0{season}'
-                        else:
-                            season = f'S{season}'
-                    else:
-                        season = None
-
-                    if episode_match:
-                        episode = episode_match.group(1)
-                        episode = f'E{episode}'
-                    else:
-                        episode = None
-
-                media = {
-                    "time": mtime,
-                    "type": mtype,
-                    "name": name,
-                    "year": year,
-                    "path": path,
-                    "season": season,
-                    "episode": episode,
-                }
-                logger.debug(f"解析到删除媒体：{json.dumps(media)}")
-                del_list.append(media)
-
-            return del_list
-
+    @staticmethod
+    def parse_emby_log(last_time, log_states: dict) -> Iterator[dict]:
+        """
+        获取emby日志列表、增量解析emby日志
+        """
         log_files = []
         try:
             # 获取所有emby日志
@@ -1434,93 +1380,26 @@ class MediaSyncDel(_PluginBase):
         if not log_files:
             log_files.append("embyserver.txt")
 
-        del_medias = []
+        log_url = MediaSyncDel.__get_log_url(settings.EMBY_HOST, settings.EMBY_API_KEY, "System/Logs/{name}")
+        if not log_url:
+            logger.error("获取emby日志失败，请检查服务器配置")
+            return
+        tailer = LogTailer(log_url=log_url, states=log_states)
+        tailer.prune(log_files)
         log_files.reverse()
         for log_file in log_files:
-            del_medias = __parse_log(file_name=log_file,
-                                     del_list=del_medias)
-
-        return del_medias
+            for media in parse_deleted_media(lines=tailer.tail(log_file),
+                                             pattern=EMBY_PATTERN,
+                                             keyword=EMBY_KEYWORD,
+                                             last_time=last_time):
+                logger.debug(f"解析到删除媒体：{json.dumps(media)}")
+                yield media
 
     @staticmethod
-    def parse_jellyfin_log(last_time: datetime):
+    def parse_jellyfin_log(last_time, log_states: dict) -> Iterator[dict]:
         """
-        获取jellyfin日志列表、解析jellyfin日志
+        获取jellyfin日志列表、增量解析jellyfin日志
         """
-
-        def __parse_log(file_name: str, del_list: list):
-            """
-            解析jellyfin日志
-            """
-            log_url = f"[HOST]System/Logs/Log?name={file_name}&api_key=[APIKEY]"
-            log_res = Jellyfin().get_data(log_url)
-            if not log_res or log_res.status_code != 200:
-                logger.error("获取jellyfin日志失败，请检查服务器配置")
-                return del_list
-
-            # 正则解析删除的媒体信息
-            pattern = r'\[(.*?)\].*?Removing item, Type: "(.*?)", Name: "(.*?)", Path: "(.*?)"'
-            matches = re.findall(pattern, log_res.text)
-
-            # 循环获取媒体信息
-            for match in matches:
-                mtime = match[0]
-                # 排除已处理的媒体信息
-                if last_time and mtime < last_time:
-                    continue
-
-                mtype = match[1]
-                name = match[2]
-                path = match[3]
-
-                year = None
-                year_pattern = r'\(\d+\)'
-                year_match = re.search(year_pattern, path)
-                if year_match:
-                    year = year_match.group()[1:-1]
-
-                season = None
-                episode = None
-                if mtype == 'Episode' or mtype == 'Season':
-                    name_pattern = r"\/([\u4e00-\u9fa5]+)(?= \()"
-                    season_pattern = r"Season\s*(\d+)"
-                    episode_pattern = r"S\d+E(\d+)"
-                    name_match = re.search(name_pattern, path)
-                    season_match = re.search(season_pattern, path)
-                    episode_match = re.search(episode_pattern, path)
-
-                    if name_match:
-                        name = name_match.group(1)
-
-                    if season_match:
-                        season = season_match.group(1)
-                        if int(season) < 10:
-                            season = f'S0{season}'
-                        else:
-                            season = f'S{season}'
-                    else:
-                        season = None
-
-                    if episode_match:
-                        episode = episode_match.group(1)
-                        episode = f'E{episode}'
-                    else:
-                        episode = None
-
-                media = {
-                    "time": mtime,
-                    "type": mtype,
-                    "name": name,
-                    "year": year,
-                    "path": path,
-                    "season": season,
-                    "episode": episode,
-                }
-                logger.debug(f"解析到删除媒体：{json.dumps(media)}")
-                del_list.append(media)
-
-            return del_list
-
         log_files = []
         try:
             # 获取所有jellyfin日志
@@ -1538,13 +1417,21 @@ class MediaSyncDel(_PluginBase):
         if not log_files:
             log_files.append("log_%s.log" % datetime.date.today().strftime("%Y%m%d"))
 
-        del_medias = []
+        log_url = MediaSyncDel.__get_log_url(settings.JELLYFIN_HOST, settings.JELLYFIN_API_KEY,
+                                             "System/Logs/Log?name={name}")
+        if not log_url:
+            logger.error("获取jellyfin日志失败，请检查服务器配置")
+            return
+        tailer = LogTailer(log_url=log_url, states=log_states)
+        tailer.prune(log_files)
         log_files.reverse()
         for log_file in log_files:
-            del_medias = __parse_log(file_name=log_file,
-                                     del_list=del_medias)
-
-        return del_medias
+            for media in parse_deleted_media(lines=tailer.tail(log_file),
+                                             pattern=JELLYFIN_PATTERN,
+                                             keyword=JELLYFIN_KEYWORD,
+                                             last_time=last_time):
+                logger.debug(f"解析到删除媒体：{json.dumps(media)}")
+                yield media
 
     def get_state(self):
         return self._enabled
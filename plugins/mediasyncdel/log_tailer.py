@@ -0,0 +1,155 @@
+import re
+from typing import Any, Dict, Iterable, Iterator, Optional, Pattern, Tuple
+
+from app.log import logger
+from app.utils.http import RequestUtils
+
+# Emby删除媒体日志
+EMBY_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}.\d{3}) Info App: Removing item from database, '
+                          r'Type: (\w+), Name: (.*), Path: (.*), Id: (\d+)')
+EMBY_KEYWORD = "Removing item from database"
+# Jellyfin删除媒体日志
+JELLYFIN_PATTERN = re.compile(r'\[(.*?)\].*?Removing item, Type: "(.*?)", Name: "(.*?)", Path: "(.*?)"')
+JELLYFIN_KEYWORD = "Removing item, Type"
+
+_YEAR_PATTERN = re.compile(r'\(\d+\)')
+_NAME_PATTERN = re.compile(r"\/([\u4e00-\u9fa5]+)(?= \()")
+_SEASON_PATTERN = re.compile(r"Season\s*(\d+)")
+_EPISODE_PATTERN = re.compile(r"S\d+E(\d+)")
+
+
+class LogTailer:
+    """
+    媒体服务器日志增量读取
+    按文件记录已读取到的字节位置及其前一小段内容，服务器支持Range时只下载新增部分，不支持时在本地跳过已读部分；
+    已读位置之前的内容与记录不一致或文件变短时视为日志已轮转，从头读取
+    """
+
+    # 用于识别日志轮转的内容长度
+    tail_size = 64
+
+    def __init__(self, log_url: str, states: Dict[str, dict]):
+        """
+        :param log_url: 日志下载地址，文件名以{name}代替
+        :param states: 各日志文件的读取状态，读取过程中原地更新，由调用方保存
+        """
+        self._log_url = log_url
+        self._states = states
+
+    def prune(self, file_names: Iterable[str]):
+        """
+        清理已不在日志列表中的文件状态
+        """
+        file_names = set(file_names)
+        for name in list(self._states):
+            if name not in file_names:
+                self._states.pop(name, None)
+
+    def __request(self, file_name: str, start: int = 0) -> Optional[Any]:
+        headers = {"Range": f"bytes={start}-"} if start else None
+        return RequestUtils(headers=headers).get_res(self._log_url.format(name=file_name))
+
+    def __fetch(self, file_name: str) -> Optional[Tuple[bytes, int, int]]:
+        """
+        获取日志中未读取的部分，返回内容、内容第一个字节在文件中的位置及内容中新增部分的起始位置
+        """
+        state = self._states.get(file_name) or {}
+        offset = state.get("offset") or 0
+        tail = bytes.fromhex(state.get("tail") or "")
+        start = offset - len(tail)
+        res = self.__request(file_name, start)
+        if res is not None and res.status_code == 206:
+            # 只返回了请求的部分
+            if res.content.startswith(tail):
+                return res.content, start, len(tail)
+        elif res is not None and res.status_code == 200:
+            # 不支持Range时返回完整文件
+            if offset and res.content[start:offset] == tail:
+                return res.content[start:], start, len(tail)
+            return res.content, 0, 0
+        elif res is None or res.status_code != 416:
+            return None
+        # 日志已轮转，从头读取
+        logger.info(f"日志 {file_name} 已轮转，重新读取")
+        res = self.__request(file_name)
+        if res is None or res.status_code != 200:
+            return None
+        return res.content, 0, 0
+
+    def tail(self, file_name: str) -> Iterator[str]:
+        """
+        逐行返回日志中新增的完整行，每一行在被取走后才记为已读取，末尾未写完的行留到下次读取
+        """
+        fetched = self.__fetch(file_name)
+        if not fetched:
+            logger.error(f"获取日志 {file_name} 失败，请检查服务器配置")
+            return
+        # 跳过作为校验的已读内容
+        content, base, pos = fetched
+        state = self._states.setdefault(file_name, {})
+        if not pos:
+            state.update(offset=0, tail="")
+        end = content.rfind(b"\n") + 1
+        while pos < end:
+            line_end = content.find(b"\n", pos) + 1
+            yield content[pos:line_end].decode("utf-8", errors="ignore")
+            pos = line_end
+            state["offset"] = base + pos
+            state["tail"] = content[max(pos - self.tail_size, 0):pos].hex()
+
+
+def parse_deleted_media(lines: Iterable[str], pattern: Pattern, keyword: str,
+                        last_time: Optional[str] = None) -> Iterator[dict]:
+    """
+    从日志行中解析已删除的媒体信息
+    """
+    for line in lines:
+        if keyword not in line:
+            continue
+        match = pattern.search(line)
+        if not match:
+            continue
+        mtime, mtype, name, path = match.group(1, 2, 3, 4)
+        # 排除已处理的媒体信息
+        if last_time and mtime < last_time:
+            continue
+        yield build_media(mtime=mtime, mtype=mtype, name=name, path=path)
+
+
+def build_media(mtime: str, mtype: str, name: str, path: str) -> dict:
+    """
+    根据删除日志组装媒体信息
+    """
+    year = None
+    year_match = _YEAR_PATTERN.search(path)
+    if year_match:
+        year = year_match.group()[1:-1]
+
+    season = None
+    episode = None
+    if mtype == 'Episode' or mtype == 'Season':
+        name_match = _NAME_PATTERN.search(path)
+        if name_match:
+            name = name_match.group(1)
+
+        season_match = _SEASON_PATTERN.search(path)
+        if season_match:
+            season = season_match.group(1)
+            if int(season) < 10:
+                season = f'S0{season}'
+            else:
+                season = f'S{season}'
+
+        episode_match = _EPISODE_PATTERN.search(path)
+        if episode_match:
+            episode = f'E{episode_match.group(1)}'
+
+    return {
+        "time": mtime,
+        "type": mtype,
+        "name": name,
+        "year": year,
+        "path": path,
+        "season": season,
+        "episode": episode,
+    }
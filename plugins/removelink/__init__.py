@@ -10,6 +10,7 @@ from watchdog.observers import Observer
 from app.db.transferhistory_oper import TransferHistoryOper
 from app.log import logger
 from app.plugins import _PluginBase
+from app.plugins.removelink.link_index import LinkIndex
 from app.schemas import NotificationType
 from app.core.event import eventmanager
 from app.schemas.types import EventType
@@ -42,7 +43,7 @@ class FileMonitorHandler(FileSystemEventHandler):
         # 新增文件记录
         with state_lock:
             try:
-                self.sync.state_set[str(file_path)] = file_path.stat().st_ino
+                self.sync.link_index.add(str(file_path))
             except Exception as e:
                 logger.error(f"新增文件记录失败：{str(e)}")
 
@@ -60,7 +61,8 @@ class FileMonitorHandler(FileSystemEventHandler):
                     return
         # 新增文件记录
         with state_lock:
-            self.sync.state_set[str(file_path)] = file_path.stat().st_ino
+            self.sync.link_index.remove(event.src_path)
+            self.sync.link_index.add(str(file_path))
 
     def on_deleted(self, event):
         file_path = Path(event.src_path)
@@ -86,28 +88,19 @@ class FileMonitorHandler(FileSystemEventHandler):
         self.sync.handle_deleted(file_path)
 
 
-def updateState(monitor_dirs: List[str]):
+def updateState(link_index: LinkIndex, monitor_dirs: List[str]):
     """
-    更新监控目录的文件列表
+    更新监控目录的文件列表，修改时间未变化的目录沿用快照
     """
     # 记录开始时间
     start_time = time.time()
-    state_set = {}
-    for mon_path in monitor_dirs:
-        for root, dirs, files in os.walk(mon_path):
-            for file in files:
-                file = Path(root) / file
-                if not file.exists():
-                    continue
-                # 记录文件inode
-                state_set[str(file)] = file.stat().st_ino
+    reused, scanned = link_index.refresh(monitor_dirs)
     # 记录结束时间
     end_time = time.time()
     # 计算耗时
     elapsed_time = end_time - start_time
-    logger.info(f"更新文件列表完成，共计{len(state_set)}个文件，耗时：{elapsed_time}秒")
-
-    return state_set
+    logger.info(f"更新文件列表完成，共计{len(link_index)}个文件，"
+                f"沿用快照目录{reused}个，重新扫描目录{scanned}个，耗时：{elapsed_time}秒")
 
 
 class RemoveLink(_PluginBase):
@@ -118,7 +111,7 @@ class RemoveLink(_PluginBase):
     # 插件图标
     plugin_icon = "Ombi_A.png"
     # 插件版本
-    plugin_version = "2.2"
+    plugin_version = "2.3.1"
     # 插件作者
     plugin_author = "DzAvril"
     # 作者主页
@@ -140,8 +133,8 @@ class RemoveLink(_PluginBase):
     _delete_torrents = False
     _delete_history = False
     _observer = []
-    # 监控目录的文件列表
-    state_set: Dict[str, int] = {}
+    # 监控目录的文件硬链接索引
+    link_index: LinkIndex = LinkIndex()
 
     def init_plugin(self, config: dict = None):
         logger.info(f"Hello, RemoveLink! config {config}")
@@ -183,7 +176,15 @@ class RemoveLink(_PluginBase):
                     self.systemmessage.put(f"{mon_path} 启动目录监控失败：{err_msg}", title="清理硬链接")
             # 更新监控集合
             with state_lock:
-                self.state_set = updateState(monitor_dirs)
+                self.link_index = LinkIndex()
+                self.link_index.load(self.__snapshot_file())
+                updateState(self.link_index, monitor_dirs)
+
+    def __snapshot_file(self) -> Path:
+        """
+        目录快照文件
+        """
+        return self.get_data_path() / "link_index.json.gz"
 
     def __update_config(self):
         """
@@ -427,6 +428,12 @@ class RemoveLink(_PluginBase):
                 except Exception as e:
                     print(str(e))
                     logger.error(f"停止目录监控失败：{str(e)}")
+            # 保存目录快照，运行期间有变化的目录修改时间已改变，下次启动时会重新扫描
+            with state_lock:
+                try:
+                    self.link_index.save(self.__snapshot_file())
+                except Exception as e:
+                    logger.error(f"保存目录快照失败：{str(e)}")
         self._observer = []
 
     def __is_excluded(self, file_path: Path) -> bool:
@@ -556,39 +563,38 @@ class RemoveLink(_PluginBase):
             # 删除历史记录
             self.delete_history(str(file_path))
             # 删除的文件inode
-            deleted_inode = self.state_set.get(str(file_path))
-            if not deleted_inode:
+            deleted_key = self.link_index.remove(str(file_path))
+            if not deleted_key:
                 logger.info(f"文件 {file_path} 未在监控列表中，不处理")
                 return
-            else:
-                self.state_set.pop(str(file_path))
+            inode = deleted_key[1]
             try:
-                # 在current_set中查找与deleted_inode有相同inode的文件并删除
-                for path, inode in self.state_set.copy().items():
-                    if inode == deleted_inode:
-                        file = Path(path)
-                        if self.__is_excluded(file):
-                            logger.info(f"文件 {file} 在不删除目录中，不处理")
-                            continue
-                        # 删除硬链接文件
-                        logger.info(f"删除硬链接文件：{path}， inode: {inode}")
-                        file.unlink()
-                        # 清理刮削文件
-                        self.delete_scrap_infos(file_path)
-                        if self._delete_torrents:
-                            # 发送事件
-                            eventmanager.send_event(
-                                EventType.DownloadFileDeleted, {"src": str(file_path)}
-                            )
-                        # 删除历史记录
-                        self.delete_history(str(file_path))
-                        if self._notify:
-                            self.post_message(
-                                mtype=NotificationType.SiteMessage,
-                                title=f"【清理硬链接】",
-                                text=f"监控到删除源文件：[{file_path}]\n"
-                                     f"同步删除硬链接文件：[{path}]",
-                            )
+                # 从索引中取出与删除文件inode相同的文件并删除
+                for path in self.link_index.links(deleted_key):
+                    file = Path(path)
+                    if self.__is_excluded(file):
+                        logger.info(f"文件 {file} 在不删除目录中，不处理")
+                        continue
+                    # 删除硬链接文件
+                    logger.info(f"删除硬链接文件：{path}， inode: {inode}")
+                    self.link_index.remove(path)
+                    file.unlink()
+                    # 清理刮削文件
+                    self.delete_scrap_infos(file_path)
+                    if self._delete_torrents:
+                        # 发送事件
+                        eventmanager.send_event(
+                            EventType.DownloadFileDeleted, {"src": str(file_path)}
+                        )
+                    # 删除历史记录
+                    self.delete_history(str(file_path))
+                    if self._notify:
+                        self.post_message(
+                            mtype=NotificationType.SiteMessage,
+                            title=f"【清理硬链接】",
+                            text=f"监控到删除源文件：[{file_path}]\n"
+                                 f"同步删除硬链接文件：[{path}]",
+                        )
             except Exception as e:
                 logger.error(
                     "删除硬链接文件发生错误：%s - %s" % (str(e), traceback.format_exc())
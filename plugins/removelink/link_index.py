@@ -0,0 +1,161 @@
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.log import logger
+
+# 设备号、inode
+FileKey = Tuple[int, int]
+
+
+class LinkIndex:
+    """
+    硬链接索引
+    同时维护 文件 -> inode 和 inode -> 文件集合 两个方向的索引，删除文件时直接取出同一inode的其它文件；
+    目录快照按目录记录修改时间、设备号及其中的文件，启动时只需检查各目录的修改时间及设备号，未变化的目录直接使用快照；
+    重新挂载后设备号可能变化，此时整个目录重新扫描，保证快照中的文件与实时事件使用相同的设备号
+    """
+
+    # 快照格式版本
+    snapshot_version = 2
+
+    def __init__(self):
+        self._inodes: Dict[str, FileKey] = {}
+        self._links: Dict[FileKey, Set[str]] = {}
+        # 目录快照：目录 -> [修改时间, 设备号, [[文件名, inode], ...], [子目录名, ...]]
+        self._dirs: Dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return len(self._inodes)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._inodes
+
+    def __set(self, path: str, key: FileKey):
+        old_key = self._inodes.get(path)
+        if old_key == key:
+            return
+        if old_key:
+            self.__unlink(path, old_key)
+        self._inodes[path] = key
+        self._links.setdefault(key, set()).add(path)
+
+    def __unlink(self, path: str, key: FileKey):
+        paths = self._links.get(key)
+        if paths is None:
+            return
+        paths.discard(path)
+        if not paths:
+            del self._links[key]
+
+    def add(self, path: str):
+        """
+        记录新增或移动后的文件，文件不存在时抛出异常
+        """
+        stat = os.stat(path)
+        self.__set(path, (stat.st_dev, stat.st_ino))
+
+    def remove(self, path: str) -> Optional[FileKey]:
+        """
+        移除文件记录，返回文件原来的inode
+        """
+        key = self._inodes.pop(path, None)
+        if key:
+            self.__unlink(path, key)
+        return key
+
+    def links(self, key: FileKey) -> List[str]:
+        """
+        获取同一inode的所有文件
+        """
+        return sorted(self._links.get(key) or [])
+
+    def refresh(self, monitor_dirs: Iterable[str]) -> Tuple[int, int]:
+        """
+        按目录快照重建索引，修改时间或设备号变化及新增的目录重新扫描，返回沿用快照和重新扫描的目录数
+        """
+        dirs: Dict[str, list] = {}
+        reused = scanned = 0
+        stack = [str(Path(mon_path)) for mon_path in monitor_dirs if mon_path]
+        while stack:
+            dir_path = stack.pop()
+            if dir_path in dirs:
+                continue
+            try:
+                stat = os.stat(dir_path)
+            except OSError:
+                continue
+            cached = self._dirs.get(dir_path)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_dev:
+                reused += 1
+                entry = cached
+            else:
+                scanned += 1
+                entry = self.__scan_dir(dir_path, stat.st_mtime_ns, stat.st_dev)
+            dirs[dir_path] = entry
+            stack.extend(os.path.join(dir_path, name) for name in entry[3])
+        self._dirs = dirs
+        self._inodes = {}
+        self._links = {}
+        for dir_path, (_, dev, files, _) in dirs.items():
+            for name, ino in files:
+                self.__set(os.path.join(dir_path, name), (dev, ino))
+        return reused, scanned
+
+    @staticmethod
+    def __scan_dir(dir_path: str, mtime: int, dev: int) -> list:
+        """
+        扫描目录中的文件及子目录，先记录修改时间再扫描，扫描期间目录变化时下次启动会重新扫描；
+        文件与所在目录位于同一设备，只记录目录的设备号
+        """
+        files, subdirs = [], []
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            continue
+                        if entry.is_dir():
+                            # 指向目录的软链接不进入
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files.append([entry.name, stat.st_ino])
+        except OSError as e:
+            logger.warn(f"扫描目录 {dir_path} 失败：{str(e)}")
+        return [mtime, dev, files, subdirs]
+
+    def load(self, snapshot_file: Path) -> bool:
+        """
+        加载目录快照
+        """
+        if not snapshot_file.exists():
+            return False
+        try:
+            with gzip.open(snapshot_file, "rt", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != self.snapshot_version:
+                return False
+            self._dirs = snapshot.get("dirs") or {}
+            return True
+        except Exception as e:
+            logger.warn(f"加载硬链接快照失败：{str(e)}")
+            self._dirs = {}
+            return False
+
+    def save(self, snapshot_file: Path):
+        """
+        保存目录快照，先写临时文件再替换
+        """
+        tmp_file = snapshot_file.with_suffix(".tmp")
+        try:
+            with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+                json.dump({"version": self.snapshot_version, "dirs": self._dirs},
+                          f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_file, snapshot_file)
+        except Exception as e:
+            logger.warn(f"保存硬链接快照失败：{str(e)}")
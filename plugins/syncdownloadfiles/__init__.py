@@ -1,12 +1,16 @@
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Tuple, Optional, Set
 
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from app.core.config import settings
+from app.db import SessionFactory
 from app.db.downloadhistory_oper import DownloadHistoryOper
+from app.db.models.downloadhistory import DownloadHistory, DownloadFiles
+from app.db.models.transferhistory import TransferHistory
 from app.db.transferhistory_oper import TransferHistoryOper
 from app.log import logger
 from app.modules.qbittorrent import Qbittorrent
@@ -22,7 +26,7 @@ class SyncDownloadFiles(_PluginBase):
     # 插件图标
     plugin_icon = "Youtube-dl_A.png"
     # 插件版本
-    plugin_version = "1.1.1"
+    plugin_version = "1.2"
     # 插件作者
     plugin_author = "thsrite"
     # 作者主页
@@ -45,6 +49,10 @@ class SyncDownloadFiles(_PluginBase):
     _clear = False
     _downloaders = []
     _dirs = None
+    # 每批同步的种子数
+    _batch_size = 200
+    # 并发获取种子文件的线程数
+    _workers = 8
     downloadhis = None
     transferhis = None
 
@@ -118,87 +126,24 @@ class SyncDownloadFiles(_PluginBase):
             torrents = self.__get_origin_torrents(torrents, downloader)
             logger.info(f"下载器 {downloader} 去除辅种，获取到源种子数：{len(torrents)}")
 
+            # 上次同步之后添加的种子
+            sync_torrents = []
             for torrent in torrents:
                 # 返回false，标识后续种子已被同步
-                sync_flag = self.__compare_time(torrent, downloader, last_sync_time)
-
-                if not sync_flag:
+                if not self.__compare_time(torrent, downloader, last_sync_time):
                     logger.info(f"最后同步时间{last_sync_time}, 之前种子已被同步，结束当前下载器 {downloader} 任务")
                     break
+                sync_torrents.append(torrent)
+
+            # 未补充下载hash的转移记录 源路径 -> 记录ID
+            transfer_srcs = self.__get_transfer_srcs() if self._history else {}
 
-                # 获取种子hash
-                hash_str = self.__get_hash(torrent, downloader)
-
-                # 判断是否是mp下载，判断download_hash是否在downloadhistory表中，是则不处理
-                downloadhis = self.downloadhis.get_by_hash(hash_str)
-                if downloadhis:
-                    downlod_files = self.downloadhis.get_files_by_hash(hash_str)
-                    if downlod_files:
-                        logger.info(f"种子 {hash_str} 通过MoviePilot下载，跳过处理")
-                        continue
-
-                # 获取种子download_dir
-                download_dir = self.__get_download_dir(torrent, downloader)
-
-                # 处理路径映射
-                if self._dirs:
-                    paths = self._dirs.split("\n")
-                    for path in paths:
-                        sub_paths = path.split(":")
-                        download_dir = download_dir.replace(sub_paths[0], sub_paths[1]).replace('\\', '/')
-
-                # 获取种子name
-                torrent_name = self.__get_torrent_name(torrent, downloader)
-                # 种子保存目录
-                save_path = Path(download_dir).joinpath(torrent_name)
-                # 获取种子文件
-                torrent_files = self.__get_torrent_files(torrent, downloader, downloader_obj)
-                logger.info(f"开始同步种子 {hash_str}, 文件数 {len(torrent_files)}")
-
-                download_files = []
-                for file in torrent_files:
-                    # 过滤掉没下载的文件
-                    if not self.__is_download(file, downloader):
-                        continue
-                    # 种子文件路径
-                    file_path_str = self.__get_file_path(file, downloader)
-                    file_path = Path(file_path_str)
-                    # 只处理视频格式
-                    if not file_path.suffix \
-                            or file_path.suffix not in settings.RMT_MEDIAEXT:
-                        continue
-                    # 种子文件根路程
-                    root_path = file_path.parts[0]
-                    # 不含种子名称的种子文件相对路径
-                    if root_path == torrent_name:
-                        rel_path = str(file_path.relative_to(root_path))
-                    else:
-                        rel_path = str(file_path)
-                    # 完整路径
-                    full_path = save_path.joinpath(rel_path)
-                    if self._history:
-                        transferhis = self.transferhis.get_by_src(str(full_path))
-                        if transferhis and not transferhis.download_hash:
-                            logger.info(f"开始补充转移记录：{transferhis.id} download_hash {hash_str}")
-                            self.transferhis.update_download_hash(historyid=transferhis.id,
-                                                                  download_hash=hash_str)
-
-                    # 种子文件记录
-                    download_files.append(
-                        {
-                            "download_hash": hash_str,
-                            "downloader": downloader,
-                            "fullpath": str(full_path),
-                            "savepath": str(save_path),
-                            "filepath": rel_path,
-                            "torrentname": torrent_name,
-                        }
-                    )
-
-                if download_files:
-                    # 登记下载文件
-                    self.downloadhis.add_files(download_files)
-                logger.info(f"种子 {hash_str} 同步完成")
+            # 分批同步，每批一次查询下载记录、并发获取种子文件、一次登记下载文件
+            for i in range(0, len(sync_torrents), self._batch_size):
+                self.__sync_torrents(torrents=sync_torrents[i:i + self._batch_size],
+                                     downloader=downloader,
+                                     downloader_obj=downloader_obj,
+                                     transfer_srcs=transfer_srcs)
 
             logger.info(f"下载器种子文件同步完成！")
             self.save_data(f"last_sync_time_{downloader}",
@@ -209,6 +154,121 @@ class SyncDownloadFiles(_PluginBase):
 
             logger.info(f"下载器任务文件记录已同步完成。总耗时 {(end_time - start_time).seconds} 秒")
 
+    def __sync_torrents(self, torrents: list, downloader: str, downloader_obj: Any, transfer_srcs: Dict[str, int]):
+        """
+        同步一批种子的文件记录
+        """
+        hashes = [self.__get_hash(torrent, downloader) for torrent in torrents]
+        # 判断是否是mp下载，download_hash在downloadhistory表中且已登记文件的不处理
+        mp_hashes = self.__get_mp_hashes(hashes)
+
+        sync_torrents = []
+        for torrent, hash_str in zip(torrents, hashes):
+            if hash_str in mp_hashes:
+                logger.info(f"种子 {hash_str} 通过MoviePilot下载，跳过处理")
+                continue
+            sync_torrents.append((torrent, hash_str))
+        if not sync_torrents:
+            return
+
+        # 并发获取种子文件，每个种子需请求一次下载器
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            torrents_files = list(executor.map(
+                lambda item: self.__get_torrent_files(item[0], downloader, downloader_obj), sync_torrents))
+
+        download_files = []
+        for (torrent, hash_str), torrent_files in zip(sync_torrents, torrents_files):
+            # 获取种子download_dir
+            download_dir = self.__get_download_dir(torrent, downloader)
+
+            # 处理路径映射
+            if self._dirs:
+                paths = self._dirs.split("\n")
+                for path in paths:
+                    sub_paths = path.split(":")
+                    download_dir = download_dir.replace(sub_paths[0], sub_paths[1]).replace('\\', '/')
+
+            # 获取种子name
+            torrent_name = self.__get_torrent_name(torrent, downloader)
+            # 种子保存目录
+            save_path = Path(download_dir).joinpath(torrent_name)
+            logger.info(f"开始同步种子 {hash_str}, 文件数 {len(torrent_files)}")
+
+            for file in torrent_files:
+                # 过滤掉没下载的文件
+                if not self.__is_download(file, downloader):
+                    continue
+                # 种子文件路径
+                file_path_str = self.__get_file_path(file, downloader)
+                file_path = Path(file_path_str)
+                # 只处理视频格式
+                if not file_path.suffix \
+                        or file_path.suffix not in settings.RMT_MEDIAEXT:
+                    continue
+                # 种子文件根路程
+                root_path = file_path.parts[0]
+                # 不含种子名称的种子文件相对路径
+                if root_path == torrent_name:
+                    rel_path = str(file_path.relative_to(root_path))
+                else:
+                    rel_path = str(file_path)
+                # 完整路径
+                full_path = save_path.joinpath(rel_path)
+                if self._history:
+                    transferhis_id = transfer_srcs.pop(str(full_path), None)
+                    if transferhis_id:
+                        logger.info(f"开始补充转移记录：{transferhis_id} download_hash {hash_str}")
+                        self.transferhis.update_download_hash(historyid=transferhis_id,
+                                                              download_hash=hash_str)
+
+                # 种子文件记录
+                download_files.append(
+                    {
+                        "download_hash": hash_str,
+                        "downloader": downloader,
+                        "fullpath": str(full_path),
+                        "savepath": str(save_path),
+                        "filepath": rel_path,
+                        "torrentname": torrent_name,
+                    }
+                )
+            logger.info(f"种子 {hash_str} 同步完成")
+
+        if download_files:
+            # 登记下载文件
+            self.downloadhis.add_files(download_files)
+
+    @staticmethod
+    def __get_mp_hashes(hashes: List[str]) -> Set[str]:
+        """
+        一次查询有下载记录且已登记下载文件的种子hash
+        """
+        hashes = [hash_str for hash_str in hashes if hash_str]
+        if not hashes:
+            return set()
+        with SessionFactory() as db:
+            history_hashes = {hash_str for hash_str, in db.query(DownloadHistory.download_hash)
+                              .filter(DownloadHistory.download_hash.in_(hashes)).all()}
+            if not history_hashes:
+                return set()
+            return {hash_str for hash_str, in db.query(DownloadFiles.download_hash)
+                    .filter(DownloadFiles.download_hash.in_(list(history_hashes))).distinct().all()}
+
+    @staticmethod
+    def __get_transfer_srcs() -> Dict[str, int]:
+        """
+        一次查询所有未补充下载hash的转移记录
+        """
+        with SessionFactory() as db:
+            histories = db.query(TransferHistory.src, TransferHistory.id, TransferHistory.download_hash) \
+                .filter(TransferHistory.src.isnot(None)) \
+                .order_by(TransferHistory.id).all()
+        # 同一源路径有多条记录时与get_by_src一致，只看第一条
+        first_histories = {}
+        for src, historyid, download_hash in histories:
+            first_histories.setdefault(src, (historyid, download_hash))
+        return {src: historyid for src, (historyid, download_hash) in first_histories.items() if not download_hash}
+
     def __update_config(self):
         self.update_config({
             "enabled": self._enabled,